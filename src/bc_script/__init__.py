@@ -3,57 +3,100 @@ from __future__ import annotations
 __version__ = "0.0.1"
 
 
-import bcsfe
+from typing import TYPE_CHECKING, Any
 
-from bc_script import log, parser
+from bc_script import adb, changes, config, log, trace
 
+if TYPE_CHECKING:
+    import bcsfe
 
+    from bc_script import parser
+
+
+def __getattr__(name: str):
+    # the parser is only imported once a script is parsed
+    if name == "parser":
+        import importlib
+
+        return importlib.import_module("bc_script.parser")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# the state of a single script run, so that runs can share a process
 class Ctx:
-    def __init__(self):
+    def __init__(
+        self,
+        logger: log.Log | None = None,
+        tracer: trace.Tracer | None = None,
+        interactive: bool = True,
+        dry_run: bool = False,
+    ):
         self.pkg: parser.pkg.Pkg | None = None
         self.info: parser.info.Info | None = None
         self.load: parser.bcsfe.load.Load | None = None
         self.edit: parser.bcsfe.edit.Edit | None = None
         self.save: parser.bcsfe.save.Save | None = None
 
+        self.logger = logger if logger is not None else log.Log()
+        self.locale = config.LocaleConfig()
+        self.tracer = tracer if tracer is not None else trace.Tracer()
+        # whether `__input__` values prompt the user
+        self.interactive = interactive
+        # dry runs record the changes edits make and never write the save
+        self.dry_run = dry_run
+        self.changes = changes.ChangeSet(dry_run)
+        # the hash of the loaded save bytes and where they were loaded from,
+        # so that unchanged saves aren't written back
+        self.input_hash: str | None = None
+        self.input_source: tuple[str, ...] | None = None
+        # one of output.FSYNC_MODES
+        self.fsync = "always"
+        # shared by loading and saving with adb
+        self.adb = adb.AdbPool()
+
+    # the adb pool has locks and connections that can't be sent to a batch
+    # worker, so a worker starts its own
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["adb"]
+        return state
 
-logger = log.Log()
-ctx = Ctx()
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state)
+        self.adb = adb.AdbPool()
 
 
 def setup_adb(
+    ctx: Ctx,
     device: str | None,
     package_name: str | None,
     save: bcsfe.core.SaveFile | None = None,
-):
-    adb_handler = bcsfe.core.AdbHandler()
-    if device is not None:
-        adb_handler.set_device(device)
-    else:
-        devices = adb_handler.get_connected_devices()
+) -> bcsfe.core.AdbHandler | None:
+    if device is None:
+        devices = ctx.adb.get_devices()
         if not devices:
-            logger.add_error("There are no devices connected with adb")
-            return
+            ctx.logger.add_error("There are no devices connected with adb")
+            return None
         if len(devices) > 1:
-            logger.add_error(
+            ctx.logger.add_error(
                 f"There are multiple devices found. Please disconnect some / specify device id. {devices}"
             )
-            return
-        adb_handler.set_device(devices[0])
+            return None
+        device = devices[0]
 
-    if package_name is not None:
-        adb_handler.set_package_name(package_name)
-    else:
+    if package_name is None:
         if save is not None and save.used_storage and save.package_name is not None:
-            adb_handler.set_package_name(save.package_name)
+            package_name = save.package_name
         else:
-            package_names = adb_handler.get_battlecats_packages()
+            package_names = ctx.adb.get_packages(device)
             if not package_names:
-                logger.add_error("There are no game versions installed")
+                ctx.logger.add_error("There are no game versions installed")
+                return None
             if len(package_names) > 1:
-                logger.add_error(
+                ctx.logger.add_error(
                     f"There are multiple game versions installed. Please specifiy package name. {package_names}"
                 )
-            adb_handler.set_package_name(package_names[0])
+                return None
+            package_name = package_names[0]
 
-    return adb_handler
+    return ctx.adb.get(device, package_name)
@@ -1,10 +1,23 @@
+from __future__ import annotations
+
 import argparse
+import importlib
+import json
 import os
-
-import bcsfe
-import toml
+import sys
 
 import bc_script
+from bc_script import cache, log, output, trace
+
+# commands that can be given instead of a script path, and the modules with
+# their main functions. they are only imported when they are run
+COMMANDS = {
+    "bench": "bc_script.bench",
+    "check": "bc_script.check",
+    "devices": "bc_script.devices",
+    "prefetch": "bc_script.prefetch",
+    "watch": "bc_script.watch",
+}
 
 
 def load_args():
@@ -31,6 +44,83 @@ def load_args():
         type=str,
         help="path to the output save file. overrides the save section in the script",
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        dest="batch",
+        default=None,
+        type=str,
+        help="glob pattern or directory of input save files to apply the script to",
+    )
+    parser.add_argument(
+        "-m",
+        "--manifest",
+        dest="manifest",
+        default=None,
+        type=str,
+        help="path to a file listing input save files, one per line. an output path can follow each input after a tab",
+    )
+    parser.add_argument(
+        "--out-dir",
+        dest="out_dir",
+        default=None,
+        type=str,
+        help="directory to write batch output saves to. defaults to overwriting the input saves",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        dest="jobs",
+        default=None,
+        type=int,
+        help="number of worker processes to use in batch mode. defaults to the cpu count",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeout",
+        default=None,
+        type=float,
+        help="max number of seconds each save can take in batch mode",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="always parse the script instead of using the compiled script cache",
+    )
+    parser.add_argument(
+        "--offline",
+        dest="offline",
+        action="store_true",
+        help="only use game data downloaded with `bc_script prefetch`, never the network",
+    )
+    parser.add_argument(
+        "--fsync",
+        dest="fsync",
+        default="always",
+        choices=output.FSYNC_MODES,
+        help="when to flush written files to disk: always before replacing the old file, batch to flush them together at the end of the run, or never",
+    )
+    parser.add_argument(
+        "--dry-run",
+        dest="dry_run",
+        action="store_true",
+        help="apply the edits without saving anything, and print the changes they would make as json",
+    )
+    parser.add_argument(
+        "--dry-run-output",
+        dest="dry_run_path",
+        default="-",
+        type=str,
+        help="file to write the changes of a dry run to instead of printing them",
+    )
+    parser.add_argument(
+        "--trace",
+        dest="trace_path",
+        default=None,
+        type=str,
+        help="write a chrome trace event json file of how long each part of the run took",
+    )
     parser.add_argument(
         "-v",
         "--version",
@@ -45,18 +135,24 @@ def load_args():
     )
 
     args = parser.parse_args()
+    if args.dry_run and (args.batch is not None or args.manifest is not None):
+        parser.error("--dry-run can't be used in batch mode")
     if args.out_save_path is None:
         args.out_save_path = args.in_save_path
     return args
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        importlib.import_module(COMMANDS[sys.argv[1]]).main(sys.argv[2:])
+        return
+
     args = load_args()
     if not os.path.exists(args.script_path):
         print(f"File not found: {args.script_path}")
         return
-    with open(args.script_path, "r") as f:
-        data = toml.load(f)
+
+    import bcsfe
 
     in_path = args.in_save_path
     if in_path is not None:
@@ -66,11 +162,99 @@ def main():
     if out_path is not None:
         out_path = bcsfe.core.Path(out_path)
 
-    bc_script.logger.show_info = args.debug
+    if args.trace_path is not None:
+        trace.instrument()
+    ctx = bc_script.Ctx(
+        log.Log(show_info=args.debug),
+        trace.Tracer(args.trace_path is not None),
+        dry_run=args.dry_run,
+    )
+    ctx.fsync = args.fsync
+    if args.offline and not use_offline_cache():
+        ctx.logger.add_warning(
+            "No game data has been prefetched, run `bc_script prefetch` first"
+        )
+
+    if args.batch is not None or args.manifest is not None:
+        run_batch(ctx, args)
+        return
+
+    with ctx.tracer.span("load_script", path=args.script_path):
+        loaded = cache.load_script(ctx, args.script_path, not args.no_cache)
+    if loaded is not None:
+        with ctx.tracer.span("run"):
+            bc_script.parser.parse.run(ctx, in_path, out_path)
+        output.sync_pending()
+        write_changes(ctx, args)
+
+    write_trace(ctx, args)
+    ctx.logger.print()
+
+
+def write_changes(ctx: bc_script.Ctx, args: argparse.Namespace):
+    if not args.dry_run:
+        return
+    if args.dry_run_path == "-":
+        print(json.dumps(ctx.changes.to_dict(), indent=4))
+        return
+    try:
+        ctx.changes.to_file(args.dry_run_path)
+    except OSError as e:
+        ctx.logger.add_warning(f"Failed to write changes file: {e}")
+
+
+def use_offline_cache() -> list[str]:
+    from bc_script import game_data
+
+    return game_data.use_offline_cache()
+
+
+def write_trace(ctx: bc_script.Ctx, args: argparse.Namespace):
+    if args.trace_path is None:
+        return
+    try:
+        ctx.tracer.to_file(args.trace_path)
+    except OSError as e:
+        ctx.logger.add_warning(f"Failed to write trace file: {e}")
+
+
+def run_batch(ctx: bc_script.Ctx, args: argparse.Namespace):
+    from bc_script import batch
+
+    entries: list[tuple[str, str | None]] = []
+    if args.batch is not None:
+        entries.extend((path, None) for path in batch.find_inputs(args.batch))
+    if args.manifest is not None:
+        if not os.path.exists(args.manifest):
+            print(f"File not found: {args.manifest}")
+            return
+        entries.extend(batch.read_manifest(args.manifest))
+    if not entries:
+        print("No input save files found")
+        return
+
+    try:
+        jobs = batch.create_jobs(entries, args.out_dir)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    if args.out_dir is not None:
+        os.makedirs(args.out_dir, exist_ok=True)
 
-    bc_script.parser.parse.do(data, in_path, out_path)
+    with ctx.tracer.span("load_script", path=args.script_path):
+        loaded = cache.load_script(ctx, args.script_path, not args.no_cache)
+    if loaded is None:
+        write_trace(ctx, args)
+        ctx.logger.print()
+        sys.exit(1)
 
-    bc_script.logger.print()
+    batch_run = batch.Batch(ctx, jobs, args.jobs, args.timeout)
+    with ctx.tracer.span("batch", jobs=len(jobs)):
+        batch_run.run()
+    write_trace(ctx, args)
+    batch_run.print_summary()
+    if batch_run.get_failed():
+        sys.exit(1)
 
 
 if __name__ == "__main__":
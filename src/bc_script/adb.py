@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from bc_script import output
+
+if TYPE_CHECKING:
+    import bcsfe
+
+# seconds that the connected devices and the game packages installed on them
+# are remembered for, across runs too, so that running scripts back to back
+# against the same phone doesn't find them again every time
+DISCOVERY_TTL = 60.0
+
+
+def get_cache_dir() -> str:
+    from bc_script import cache as script_cache
+
+    return script_cache.get_cache_dir()
+
+
+def get_discovery_path() -> str:
+    return os.path.join(get_cache_dir(), "adb.json")
+
+
+def get_device_dir(device: str) -> str:
+    # device ids can be addresses like 192.168.0.2:5555
+    return re.sub(r"[^\w.-]", "_", device)
+
+
+# one shell command. None if the device has no sha256sum or the save
+def get_save_hash(handler: bcsfe.core.AdbHandler) -> str | None:
+    path = handler.get_battlecats_save_path().to_str_forwards()
+    if handler.adb_root_success():
+        result = handler.run_shell(f"sha256sum {path}")
+    else:
+        result = handler.run_root_shell(f"sha256sum {path}")
+    if not result.success:
+        return None
+    parts = result.result.split()
+    if not parts or not re.fullmatch(r"[0-9a-fA-F]{64}", parts[0]):
+        return None
+    return parts[0].lower()
+
+
+# results of device and package discovery, kept in memory and in the cache dir
+# until they're DISCOVERY_TTL seconds old. empty results aren't cached, so a
+# device that was just plugged in is found straight away
+class DiscoveryCache:
+    def __init__(self, path: str | None = None, ttl: float = DISCOVERY_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: dict[str, dict[str, Any]] = {}
+
+    def is_fresh(self, entry: Any, now: float) -> bool:
+        if not isinstance(entry, dict) or not isinstance(entry.get("value"), list):
+            return False
+        age = now - entry.get("time", 0)
+        return 0 <= age <= self.ttl
+
+    def get_path(self) -> str:
+        # found when it's first needed, as runs that don't use adb never need it
+        if self.path is None:
+            self.path = get_discovery_path()
+        return self.path
+
+    def read(self) -> dict[str, Any]:
+        try:
+            with open(self.get_path(), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def write(self, data: dict[str, Any]):
+        # the cache only saves time, so failing to write it isn't an error
+        try:
+            path = self.get_path()
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def get(self, key: str) -> list[str] | None:
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if not self.is_fresh(entry, now):
+                entry = self.read().get(key)
+                if not self.is_fresh(entry, now):
+                    return None
+                self.entries[key] = entry
+        return list(entry["value"])
+
+    def put(self, key: str, value: list[str]):
+        if not value:
+            return
+        now = time.time()
+        entry = {"time": now, "value": list(value)}
+        with self.lock:
+            self.entries[key] = entry
+            data = {
+                name: cached
+                for name, cached in self.read().items()
+                if self.is_fresh(cached, now)
+            }
+            data[key] = entry
+            self.write(data)
+
+    def remove(self, *keys: str):
+        with self.lock:
+            data = self.read()
+            for key in keys:
+                self.entries.pop(key, None)
+                data.pop(key, None)
+            self.write(data)
+
+
+# the save last pulled from or pushed to each device and package, so that it
+# isn't pulled or pushed again while the device still has the same save
+class SaveCache:
+    def __init__(self, path: str | None = None):
+        self.path = path
+
+    def get_path(self, device: str, package_name: str) -> str:
+        if self.path is None:
+            self.path = os.path.join(get_cache_dir(), "adb_saves")
+        return os.path.join(self.path, get_device_dir(device), package_name)
+
+    def get(self, device: str, package_name: str) -> bytes | None:
+        try:
+            with open(self.get_path(device, package_name), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, device: str, package_name: str, data: bytes):
+        path = self.get_path(device, package_name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            output.atomic_write(path, lambda f: f.write(data), "never")
+        except OSError:
+            pass
+
+    def remove(self, device: str, package_name: str):
+        try:
+            os.remove(self.get_path(device, package_name))
+        except OSError:
+            pass
+
+
+# the adb handlers of a run, so that loading and saving share one connection
+# instead of starting adb, getting root and finding the game again for each
+class AdbPool:
+    def __init__(
+        self, discovery: DiscoveryCache | None = None, saves: SaveCache | None = None
+    ):
+        self.discovery = discovery if discovery is not None else DiscoveryCache()
+        self.saves = saves if saves is not None else SaveCache()
+        self.lock = threading.Lock()
+        # held while running adb commands for a device, so that devices can
+        # be set up at the same time
+        self.device_locks: dict[str, threading.Lock] = {}
+        self.base: bcsfe.core.AdbHandler | None = None
+        self.devices: dict[str, bcsfe.core.AdbHandler] = {}
+        self.handlers: dict[tuple[str, str], bcsfe.core.AdbHandler] = {}
+
+    def get_base(self) -> bcsfe.core.AdbHandler:
+        import bcsfe
+
+        with self.lock:
+            if self.base is None:
+                # checks that adb is installed and starts the adb server
+                self.base = bcsfe.core.AdbHandler()
+            return self.base
+
+    def get_device_lock(self, device: str) -> threading.Lock:
+        with self.lock:
+            return self.device_locks.setdefault(device, threading.Lock())
+
+    def get_device_handler(self, device: str) -> bcsfe.core.AdbHandler:
+        with self.get_device_lock(device):
+            handler = self.devices.get(device)
+            if handler is None:
+                handler = copy.copy(self.get_base())
+                # runs adb root
+                handler.set_device(device)
+                self.devices[device] = handler
+            return handler
+
+    def get_devices(self) -> list[str]:
+        devices = self.discovery.get("devices")
+        if devices is None:
+            devices = self.get_base().get_connected_devices()
+            self.discovery.put("devices", devices)
+        return devices
+
+    def get_packages(self, device: str) -> list[str]:
+        key = f"packages:{device}"
+        packages = self.discovery.get(key)
+        if packages is None:
+            handler = self.get_device_handler(device)
+            with self.get_device_lock(device):
+                packages = handler.get_battlecats_packages()
+            self.discovery.put(key, packages)
+        return packages
+
+    def get(self, device: str, package_name: str) -> bcsfe.core.AdbHandler:
+        handler = self.get_device_handler(device)
+        with self.lock:
+            key = (device, package_name)
+            if key not in self.handlers:
+                self.handlers[key] = copy.copy(handler)
+                self.handlers[key].set_package_name(package_name)
+            return self.handlers[key]
+
+    # e.g after a command failed because the device was disconnected
+    def forget(self, device: str):
+        with self.lock:
+            self.devices.pop(device, None)
+            for key in [key for key in self.handlers if key[0] == device]:
+                del self.handlers[key]
+        self.discovery.remove("devices", f"packages:{device}")
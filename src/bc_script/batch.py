@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import dataclasses
+import glob
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import traceback
+from typing import Any
+
+import colorama
+
+import bc_script
+from bc_script import log, output, trace
+
+
+@dataclasses.dataclass
+class Job:
+    in_path: str
+    out_path: str
+
+
+@dataclasses.dataclass
+class JobResult:
+    job: Job
+    success: bool = False
+    timed_out: bool = False
+    errors: list[str] = dataclasses.field(default_factory=list)
+    warnings: list[str] = dataclasses.field(default_factory=list)
+    duration: float = 0.0
+
+
+def find_inputs(pattern: str) -> list[str]:
+    if os.path.isdir(pattern):
+        paths = [
+            os.path.join(pattern, name)
+            for name in os.listdir(pattern)
+            if not name.startswith(".")
+        ]
+        return sorted(path for path in paths if os.path.isfile(path))
+
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+# each line of a manifest is an input save path, optionally followed by a tab
+# and an output path
+def read_manifest(path: str) -> list[tuple[str, str | None]]:
+    entries: list[tuple[str, str | None]] = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split("\t")
+            in_path = parts[0].strip()
+            out_path = parts[1].strip() if len(parts) > 1 else None
+            entries.append((in_path, out_path or None))
+    return entries
+
+
+# inputs without an output path keep their path relative to the directory all
+# of them are in, so inputs with the same name in different directories don't
+# write the same file in out_dir
+def create_jobs(
+    entries: list[tuple[str, str | None]], out_dir: str | None
+) -> list[Job]:
+    root: str | None = None
+    in_dirs = [
+        os.path.dirname(os.path.abspath(in_path))
+        for in_path, out_path in entries
+        if out_path is None
+    ]
+    if out_dir is not None and in_dirs:
+        try:
+            root = os.path.commonpath(in_dirs)
+        except ValueError:
+            # e.g inputs on different drives
+            root = None
+
+    jobs: list[Job] = []
+    for in_path, out_path in entries:
+        if out_path is None:
+            if out_dir is not None and root is not None:
+                out_path = os.path.join(
+                    out_dir, os.path.relpath(os.path.abspath(in_path), root)
+                )
+            elif out_dir is not None:
+                out_path = os.path.join(out_dir, os.path.basename(in_path))
+            else:
+                out_path = in_path
+        jobs.append(Job(in_path, out_path))
+
+    duplicates = get_duplicate_outputs(jobs)
+    if duplicates:
+        raise ValueError(f"Multiple saves would be written to: {', '.join(duplicates)}")
+    return jobs
+
+
+def get_duplicate_outputs(jobs: list[Job]) -> list[str]:
+    seen: set[str] = set()
+    duplicates: list[str] = []
+    for job in jobs:
+        path = os.path.normcase(os.path.abspath(job.out_path))
+        if path in seen and job.out_path not in duplicates:
+            duplicates.append(job.out_path)
+        seen.add(path)
+    return duplicates
+
+
+def run_job(ctx: bc_script.Ctx, job: Job, conn: Any):
+    # runs inside the worker process, the script has already been parsed
+    import bcsfe
+
+    start = time.perf_counter()
+    ctx.logger = log.Log(show_warnings=False, show_errors=False)
+    if ctx.save is not None:
+        ctx.save.path = job.out_path
+    # only send back what this job recorded, the parent already has the rest
+    ctx.tracer.events = []
+    trace.reset_call_counts()
+
+    try:
+        with ctx.tracer.span("batch.job", path=job.in_path):
+            bc_script.parser.parse.run(
+                ctx, bcsfe.core.Path(job.in_path), bcsfe.core.Path(job.out_path)
+            )
+    except Exception as e:
+        ctx.logger.add_error(
+            "".join(traceback.format_exception_only(type(e), e)).strip()
+        )
+
+    errors = ctx.logger.errors
+    conn.send(
+        {
+            "success": not errors,
+            "errors": errors,
+            "warnings": ctx.logger.warnings,
+            "duration": time.perf_counter() - start,
+            "trace_events": ctx.tracer.events,
+            "bcsfe_calls": trace.get_call_counts(),
+            "pending_sync": output.take_pending(),
+        }
+    )
+    conn.close()
+
+
+def get_mp_context() -> Any:
+    # fork lets workers reuse the already imported modules and parsed script
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context("spawn")
+
+
+class Batch:
+    def __init__(
+        self,
+        ctx: bc_script.Ctx,
+        jobs: list[Job],
+        workers: int | None = None,
+        timeout: float | None = None,
+    ):
+        self.ctx = ctx
+        self.jobs = jobs
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.timeout = timeout
+        self.results: list[JobResult] = []
+        self.duration = 0.0
+
+    def run(self) -> list[JobResult]:
+        mp_ctx = get_mp_context()
+        start = time.perf_counter()
+        pending = list(reversed(self.jobs))
+        running: dict[Any, tuple[Job, Any, Any, float]] = {}
+
+        while pending or running:
+            while pending and len(running) < self.workers:
+                job = pending.pop()
+                recv_conn, send_conn = mp_ctx.Pipe(duplex=False)
+                process = mp_ctx.Process(
+                    target=run_job, args=(self.ctx, job, send_conn), daemon=True
+                )
+                process.start()
+                send_conn.close()
+                # the pipe becomes readable once the worker sends its result
+                # or when it exits without sending one
+                running[recv_conn] = (
+                    job,
+                    process,
+                    recv_conn,
+                    time.perf_counter(),
+                )
+
+            wait_time = None
+            if self.timeout is not None:
+                now = time.perf_counter()
+                wait_time = max(
+                    0.0,
+                    min(
+                        started + self.timeout - now
+                        for _, _, _, started in running.values()
+                    ),
+                )
+
+            ready = multiprocessing.connection.wait(list(running.keys()), wait_time)
+            for conn in ready:
+                job, process, recv_conn, started = running.pop(conn)
+                self.results.append(self.finish(job, process, recv_conn, started))
+
+            if self.timeout is not None:
+                now = time.perf_counter()
+                for conn, (job, process, recv_conn, started) in list(running.items()):
+                    if now - started < self.timeout:
+                        continue
+                    del running[conn]
+                    process.kill()
+                    process.join()
+                    recv_conn.close()
+                    self.results.append(
+                        JobResult(
+                            job,
+                            timed_out=True,
+                            errors=[f"Timed out after {self.timeout}s"],
+                            duration=now - started,
+                        )
+                    )
+
+        # with batch fsync, the files the workers wrote are synced together
+        with self.ctx.tracer.span("batch.sync"):
+            output.sync_pending()
+        self.duration = time.perf_counter() - start
+        return self.results
+
+    def finish(self, job: Job, process: Any, recv_conn: Any, started: float):
+        try:
+            data = recv_conn.recv()
+        except (EOFError, OSError):
+            data = None
+        recv_conn.close()
+        process.join()
+
+        if data is None:
+            return JobResult(
+                job,
+                errors=[f"Worker crashed with exit code {process.exitcode}"],
+                duration=time.perf_counter() - started,
+            )
+        # perf_counter uses the same clock in every process, so the worker
+        # events are already relative to the start of the parent's tracer
+        self.ctx.tracer.add_events(data["trace_events"])
+        trace.add_call_counts(data["bcsfe_calls"])
+        output.add_pending(data["pending_sync"])
+        return JobResult(
+            job,
+            success=data["success"],
+            errors=data["errors"],
+            warnings=data["warnings"],
+            duration=data["duration"],
+        )
+
+    def get_failed(self) -> list[JobResult]:
+        return [result for result in self.results if not result.success]
+
+    def print_summary(self):
+        succeeded = len(self.results) - len(self.get_failed())
+        timed_out = len([result for result in self.results if result.timed_out])
+        failed = len(self.results) - succeeded - timed_out
+
+        for result in self.get_failed():
+            reason = result.errors[-1] if result.errors else "unknown error"
+            print(
+                f"{colorama.Fore.RED}FAILED: {result.job.in_path}: {reason}{colorama.Style.RESET_ALL}"
+            )
+
+        color = colorama.Fore.RED if self.get_failed() else colorama.Fore.GREEN
+        print(
+            f"{color}Processed {len(self.results)} saves in {self.duration:.2f}s with {self.workers} jobs: "
+            f"{succeeded} succeeded, {failed} failed, {timed_out} timed out{colorama.Style.RESET_ALL}"
+        )
@@ -0,0 +1,400 @@
+# benchmarks, run with `bc_script bench`. game data is downloaded the first
+# time it's needed, so run it with a warm game data cache for stable results
+
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import bcsfe
+
+import bc_script
+from bc_script import log
+
+IMPORT_MODULE = "bc_script.__main__"
+
+# modules that starting bc_script shouldn't import
+HEAVY_MODULES = ["bcsfe", "bc_script.parser.bcsfe", "bc_script.game_data", "requests"]
+
+
+def create_script(entries: int) -> dict[str, Any]:
+    cats: list[dict[str, Any]] = []
+    skills: list[dict[str, Any]] = []
+    for i in range(entries):
+        cats.append(
+            {
+                "ids": [i, f"rarity-{i % 6}"],
+                "unlock": True,
+                "upgrade": ["max", i % 90],
+                "true_form": True,
+                "claim_cat_guide": True,
+                "talents": {"talents": {"all": "max"}, "keep_existing": False},
+            }
+        )
+        skills.append({"ids": [i % 11], "upgrade": [10, "max"]})
+
+    return {
+        "pkg": {"schema": "bcsfe", "version": "3.0.0"},
+        "info": {"name": "bench", "author": "bench"},
+        "load": {"path": "bench"},
+        "edit": {
+            "basic_items": {"catfood": 100, "catamins": [1, 2, 3]},
+            "cats": cats,
+            "special_skills": skills,
+        },
+        "save": {"path": "bench"},
+    }
+
+
+EDIT_BENCHMARKS: dict[str, dict[str, Any]] = {
+    "basic_items": {
+        "basic_items": {
+            "catfood": 45000,
+            "xp": 99999999,
+            "normal_tickets": 2999,
+            "rare_tickets": 299,
+            "platinum_tickets": 9,
+            "legend_tickets": 4,
+            "platinum_shards": 9,
+            "np": 9999,
+            "leadership": 9999,
+            "battle_items": [9999] * 6,
+            "catamins": [9999] * 3,
+            "catseyes": {str(i): 9999 for i in range(5)},
+            "catfruit": {str(i): 998 for i in range(10)},
+        },
+    },
+    "cats": {
+        "cats": [
+            {
+                "ids": "all",
+                "unlock": True,
+                "upgrade": ["max", "max"],
+                "true_form": True,
+                "ultra_form": True,
+                "claim_cat_guide": True,
+            }
+        ],
+    },
+    "talents": {
+        "cats": [{"ids": "all", "talents": {"talents": {"all": "max"}}}],
+    },
+    "talent_orbs": {
+        "basic_items": {"talent_orbs": {"orbs": {"all": 10}}},
+    },
+    "special_skills": {
+        "special_skills": [{"ids": "all", "upgrade": ["max", "max"]}],
+    },
+}
+
+
+def create_edit_script(edit: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "pkg": {"schema": "bcsfe", "version": "3.0.0"},
+        "info": {"name": "bench", "author": "bench"},
+        "load": {"path": "bench"},
+        "edit": {"managed_items": [], **copy.deepcopy(edit)},
+    }
+
+
+def create_save(cats: int = 750, cc: str = "en") -> bcsfe.core.Data:
+    save = bcsfe.core.SaveFile(cc=bcsfe.core.CountryCode.from_code(cc))
+    save.cats = bcsfe.core.Cats([bcsfe.core.Cat.init(i) for i in range(cats)])
+    # a new save of the latest game version has empty lists for these, so
+    # give them the sizes a played save has
+    save.menu_unlocks = save.menu_unlocks or [0] * 6
+    save.catfruit = save.catfruit or [0] * 60
+    save.catseyes = save.catseyes or [0] * 6
+    save.catamins = save.catamins or [0] * 3
+    return save.to_data()
+
+
+def create_ctx() -> bc_script.Ctx:
+    return bc_script.Ctx(log.Log(show_warnings=False, show_errors=False))
+
+
+def time_func(func: Callable[[Any], Any], setup: Callable[[], Any], repeat: int):
+    times: list[float] = []
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def measure_peak_memory(func: Callable[[Any], Any], setup: Callable[[], Any]) -> int:
+    arg = setup()
+    tracemalloc.start()
+    try:
+        func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def create_result(
+    name: str, times: list[float], peak_memory: int, **extra: Any
+) -> dict[str, Any]:
+    best = min(times)
+    return {
+        "name": name,
+        "repeat": len(times),
+        "best": best,
+        "mean": sum(times) / len(times),
+        "ops_per_sec": 1 / best if best else 0.0,
+        "peak_memory": peak_memory,
+        **extra,
+    }
+
+
+def bench_parser(entries: int = 10000, repeat: int = 3) -> dict[str, Any]:
+    script = create_script(entries)
+
+    def func(data: dict[str, Any]):
+        bc_script.parser.parse.parse(data, create_ctx())
+
+    def setup():
+        return copy.deepcopy(script)
+
+    peak_memory = measure_peak_memory(func, setup)
+    times = time_func(func, setup, repeat)
+    result = create_result("parser", times, peak_memory, entries=entries)
+    result["entries_per_sec"] = entries * result["ops_per_sec"]
+    return result
+
+
+# imports module in a new process, returns the seconds it took and the modules
+# it imported
+def measure_import_time(module: str) -> tuple[float, list[str]]:
+    env = dict(os.environ)
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(bc_script.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(
+        path for path in (src_dir, env.get("PYTHONPATH")) if path
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    # lines look like "import time: self [us] | cumulative | imported package"
+    total = 0.0
+    modules: list[str] = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        modules.append(name)
+        if name == module:
+            total = int(parts[1]) / 1_000_000
+    return total, modules
+
+
+def bench_import(repeat: int = 3) -> dict[str, Any]:
+    times: list[float] = []
+    modules: list[str] = []
+    for _ in range(repeat):
+        total, modules = measure_import_time(IMPORT_MODULE)
+        times.append(total)
+    return create_result(
+        "import",
+        times,
+        0,
+        module=IMPORT_MODULE,
+        modules=len(modules),
+        heavy_modules=[module for module in HEAVY_MODULES if module in modules],
+    )
+
+
+def bench_edit(
+    name: str, save_data: bcsfe.core.Data, repeat: int = 3
+) -> dict[str, Any]:
+    ctx = create_ctx()
+    bc_script.parser.parse.parse(create_edit_script(EDIT_BENCHMARKS[name]), ctx)
+    edit = ctx.edit
+    if edit is None:
+        raise ValueError(f"Failed to parse {name} benchmark: {ctx.logger.errors}")
+
+    def func(save: bcsfe.core.SaveFile):
+        edit.apply(ctx, save)
+
+    def setup():
+        return bcsfe.core.SaveFile(save_data)
+
+    peak_memory = measure_peak_memory(func, setup)
+    errors_before = len(ctx.logger.errors)
+    times = time_func(func, setup, repeat)
+    # errors usually mean game data could not be downloaded, so the result
+    # doesn't measure the full edit
+    return create_result(
+        name,
+        times,
+        peak_memory,
+        errors=ctx.logger.errors[errors_before:][:5],
+        warnings=len(ctx.logger.warnings),
+    )
+
+
+# a benchmark regressed if its best time got slower by more than threshold,
+# e.g 0.1 for 10%, or if it imports heavy modules that it didn't before
+def compare(
+    results: list[dict[str, Any]],
+    baseline: list[dict[str, Any]],
+    threshold: float,
+) -> list[dict[str, Any]]:
+    baseline_results = {result["name"]: result for result in baseline}
+    comparison: list[dict[str, Any]] = []
+    for result in results:
+        base = baseline_results.get(result["name"])
+        if base is None or not base["best"]:
+            continue
+        change = result["best"] / base["best"] - 1
+        new_heavy_modules = [
+            module
+            for module in result.get("heavy_modules", [])
+            if module not in base.get("heavy_modules", [])
+        ]
+        comparison.append(
+            {
+                "name": result["name"],
+                "baseline_best": base["best"],
+                "best": result["best"],
+                "change": change,
+                "memory_change": result["peak_memory"] - base["peak_memory"],
+                "new_heavy_modules": new_heavy_modules,
+                "regressed": change > threshold or bool(new_heavy_modules),
+            }
+        )
+    return comparison
+
+
+def load_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="bc_script bench",
+        description="Benchmark bc_script",
+    )
+    parser.add_argument(
+        "benchmarks",
+        nargs="*",
+        default=[],
+        help=f"benchmarks to run. defaults to all of them: import, parser, {', '.join(EDIT_BENCHMARKS)}",
+    )
+    parser.add_argument(
+        "--entries",
+        type=int,
+        default=10000,
+        help="number of [[edit.cats]] and [[edit.special_skills]] entries to parse",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="number of times to run each benchmark",
+    )
+    parser.add_argument(
+        "--save",
+        dest="save_path",
+        default=None,
+        type=str,
+        help="save file to run the edit benchmarks on. defaults to a generated save",
+    )
+    parser.add_argument(
+        "--cats",
+        type=int,
+        default=750,
+        help="number of cats in the generated save",
+    )
+    parser.add_argument(
+        "--cc",
+        type=str,
+        default="en",
+        help="country code of the generated save",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        default=None,
+        type=str,
+        help="file to write the results to as json, e.g to use as a baseline later",
+    )
+    parser.add_argument(
+        "--baseline",
+        dest="baseline_path",
+        default=None,
+        type=str,
+        help="results file from a previous run to compare against. exits with 1 if a benchmark regressed",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="how much slower than the baseline a benchmark can get before it is a regression",
+    )
+    args = parser.parse_args(argv)
+    for name in args.benchmarks:
+        if name not in ("import", "parser") and name not in EDIT_BENCHMARKS:
+            parser.error(f"unknown benchmark: {name}")
+    return args
+
+
+def main(argv: list[str] | None = None):
+    args = load_args(argv)
+    names = args.benchmarks or ["import", "parser", *EDIT_BENCHMARKS.keys()]
+
+    save_data = None
+    if any(name in EDIT_BENCHMARKS for name in names):
+        if args.save_path is not None:
+            save_data = bcsfe.core.Path(args.save_path).read()
+        else:
+            save_data = create_save(args.cats, args.cc)
+
+    results: list[dict[str, Any]] = []
+    for name in names:
+        if name == "import":
+            results.append(bench_import(args.repeat))
+        elif name == "parser":
+            results.append(bench_parser(args.entries, args.repeat))
+        elif save_data is not None:
+            results.append(bench_edit(name, save_data, args.repeat))
+
+    output: dict[str, Any] = {
+        "bc_script_version": bc_script.__version__,
+        "bcsfe_version": bcsfe.__version__,
+        "python_version": platform.python_version(),
+        "results": results,
+    }
+
+    regressed = False
+    if args.baseline_path is not None:
+        with open(args.baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        comparison = compare(results, baseline["results"], args.threshold)
+        output["comparison"] = comparison
+        regressed = any(item["regressed"] for item in comparison)
+
+    if args.output_path is not None:
+        with open(args.output_path, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=4)
+    print(json.dumps(output, indent=4))
+
+    if regressed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
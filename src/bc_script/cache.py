@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import os
+import tempfile
+from typing import Any
+
+import toml
+
+import bc_script
+from bc_script import json_file
+
+
+def get_cache_dir() -> str:
+    path = os.environ.get("BC_SCRIPT_CACHE_DIR")
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "bc_script")
+
+
+source_fingerprint: str | None = None
+
+
+# whether any value in a toml table prompts for input
+def has_input(value: Any) -> bool:
+    if bc_script.parser.parse.InputField.has_input(value):
+        return True
+    if isinstance(value, dict):
+        return any(has_input(val) for val in value.values())  # type: ignore
+    if isinstance(value, list):
+        return any(has_input(val) for val in value)  # type: ignore
+    return False
+
+
+# the mtime and size of each source file, so that entries written by other
+# code aren't used even when the version wasn't bumped
+def get_source_fingerprint() -> str:
+    global source_fingerprint
+    if source_fingerprint is None:
+        hasher = hashlib.sha256()
+        root = os.path.dirname(os.path.abspath(bc_script.__file__))
+        for directory, _, files in sorted(os.walk(root)):
+            for name in sorted(files):
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(directory, name)
+                stat = os.stat(path)
+                hasher.update(
+                    f"{os.path.relpath(path, root)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode()
+                )
+        source_fingerprint = hasher.hexdigest()
+    return source_fingerprint
+
+
+def get_script_key(script_data: bytes) -> str:
+    hasher = hashlib.sha256()
+    hasher.update(bc_script.__version__.encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(toml.__version__.encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(get_source_fingerprint().encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(script_data)
+    return hasher.hexdigest()
+
+
+@dataclasses.dataclass
+class CompiledScript:
+    pkg: bc_script.parser.pkg.Pkg | None = None
+    info: bc_script.parser.info.Info | None = None
+    load: bc_script.parser.bcsfe.load.Load | None = None
+    edit: bc_script.parser.bcsfe.edit.Edit | None = None
+    save: bc_script.parser.bcsfe.save.Save | None = None
+    warnings: list[str] = dataclasses.field(default_factory=list)
+
+    @staticmethod
+    def from_ctx(ctx: bc_script.Ctx, warnings: list[str]) -> CompiledScript:
+        return CompiledScript(
+            ctx.pkg, ctx.info, ctx.load, ctx.edit, ctx.save, list(warnings)
+        )
+
+    def to_ctx(self, ctx: bc_script.Ctx) -> bc_script.Ctx:
+        ctx.pkg = self.pkg
+        ctx.info = self.info
+        ctx.load = self.load
+        ctx.edit = self.edit
+        ctx.save = self.save
+        return ctx
+
+
+# the toml table of each script, stored as json so that reading an entry can't
+# run code. the table is parsed like the script, so its values are checked too
+class ScriptCache:
+    def __init__(self, path: str | None = None):
+        if path is None:
+            path = os.path.join(get_cache_dir(), "scripts")
+        self.path = path
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as f:
+                # entries written by other users could change what a script does
+                if hasattr(os, "getuid") and os.fstat(f.fileno()).st_uid != os.getuid():
+                    return None
+                entry = json_file.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # the entry is corrupt
+            self.remove(key)
+            return None
+        if not isinstance(entry, dict) or not isinstance(entry.get("data"), dict):
+            self.remove(key)
+            return None
+        return entry["data"]
+
+    def put(self, ctx: bc_script.Ctx, key: str, data: dict[str, Any]):
+        try:
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                json_file.dump({"data": data}, f)
+            os.replace(tmp_path, self.get_path(key))
+        except (OSError, TypeError, ValueError) as e:
+            ctx.logger.add_warning(f"Failed to cache script: {e}")
+
+    def remove(self, key: str):
+        try:
+            os.remove(self.get_path(key))
+        except OSError:
+            pass
+
+
+def load_script(
+    ctx: bc_script.Ctx, path: str, use_cache: bool = True
+) -> bc_script.Ctx | None:
+    with open(path, "rb") as f:
+        script_data = f.read()
+    script_text = script_data.decode("utf-8")
+
+    if not use_cache:
+        return parse_script(ctx, script_text)
+
+    cache = ScriptCache()
+    key = get_script_key(script_data)
+    with ctx.tracer.span("cache.get"):
+        data = cache.get(key)
+    # scripts that prompt for input can give a different result every run
+    if data is None:
+        with ctx.tracer.span("toml.loads"):
+            data = toml.loads(script_text)
+        if not has_input(data):
+            with ctx.tracer.span("cache.put"):
+                cache.put(ctx, key, data)
+    with ctx.tracer.span("parse"):
+        return bc_script.parser.parse.parse(data, ctx)
+
+
+def parse_script(ctx: bc_script.Ctx, script_text: str) -> bc_script.Ctx | None:
+    with ctx.tracer.span("toml.loads"):
+        data = toml.loads(script_text)
+    with ctx.tracer.span("parse"):
+        return bc_script.parser.parse.parse(data, ctx)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from typing import Any
+
+
+@dataclasses.dataclass
+class Change:
+    field: str
+    old: Any
+    new: Any
+    id: int | None = None
+    key: int | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {"field": self.field}
+        if self.id is not None:
+            data["id"] = self.id
+        if self.key is not None:
+            data["key"] = self.key
+        data["old"] = self.old
+        data["new"] = self.new
+        return data
+
+
+# the changes edits make to a save, recorded as they make them. ids are of the
+# cat, special skill, orb or item index that changed, and talents also have the
+# talent id as the key. when disabled nothing is recorded, so it can be left in
+# hot code
+class ChangeSet:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.changes: list[Change] = []
+
+    def add(
+        self,
+        field: str,
+        old: Any,
+        new: Any,
+        id: int | None = None,
+        key: int | None = None,
+    ):
+        if self.enabled and old != new:
+            self.changes.append(Change(field, old, new, id, key))
+
+    def add_state_changes(
+        self,
+        prefix: str,
+        id: int,
+        old: dict[str, Any],
+        new: dict[str, Any],
+    ):
+        # old and new are snapshots of the state of a cat or skill
+        for name, value in new.items():
+            old_value = old.get(name)
+            if isinstance(value, dict):
+                for key, key_value in value.items():  # type: ignore
+                    self.add(f"{prefix}.{name}", old_value.get(key), key_value, id, key)
+            else:
+                self.add(f"{prefix}.{name}", old_value, value, id)
+
+    def to_dict(self) -> dict[str, Any]:
+        fields: dict[str, int] = {}
+        for change in self.changes:
+            fields[change.field] = fields.get(change.field, 0) + 1
+        return {
+            "count": len(self.changes),
+            "fields": fields,
+            "changes": [change.to_dict() for change in self.changes],
+        }
+
+    def to_file(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=4)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from typing import Any
+
+import toml
+
+import bc_script
+from bc_script import batch, cache, log
+
+# below this many scripts per worker, starting the workers takes longer than
+# checking the scripts
+MIN_SCRIPTS_PER_JOB = 16
+
+
+# directories are searched recursively for .toml files
+def find_scripts(paths: list[str]) -> list[str]:
+    scripts: list[str] = []
+    for path in paths:
+        if not os.path.isdir(path):
+            scripts.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(name for name in dirs if not name.startswith("."))
+            for name in sorted(files):
+                if name.endswith(".toml") and not name.startswith("."):
+                    scripts.append(os.path.join(root, name))
+    return scripts
+
+
+def check_script(path: str) -> dict[str, Any]:
+    # `__input__` values are replaced with placeholders instead of prompting
+    ctx = bc_script.Ctx(
+        log.Log(show_warnings=False, show_errors=False), interactive=False
+    )
+    needs_input = False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            script_text = f.read()
+        data = toml.loads(script_text)
+        needs_input = cache.has_input(data)
+        if bc_script.parser.parse.parse(data, ctx) is None:
+            ctx.logger.add_error("Failed to parse script")
+    except (OSError, UnicodeDecodeError, toml.TomlDecodeError) as e:
+        ctx.logger.add_error(f"Failed to read script: {e}")
+    except Exception as e:
+        ctx.logger.add_error(
+            "".join(traceback.format_exception_only(type(e), e)).strip()
+        )
+
+    return {
+        "path": path,
+        "valid": not ctx.logger.errors,
+        "errors": ctx.logger.errors,
+        "warnings": ctx.logger.warnings,
+        "needs_input": needs_input,
+    }
+
+
+def check_scripts(paths: list[str], jobs: int | None = None) -> list[dict[str, Any]]:
+    if jobs is None:
+        jobs = min(os.cpu_count() or 1, len(paths) // MIN_SCRIPTS_PER_JOB)
+    jobs = min(jobs, len(paths))
+    if jobs <= 1:
+        return [check_script(path) for path in paths]
+
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with batch.get_mp_context().Pool(jobs) as pool:
+        return pool.map(check_script, paths, chunksize)
+
+
+def create_report(results: list[dict[str, Any]], duration: float) -> dict[str, Any]:
+    return {
+        "bc_script_version": bc_script.__version__,
+        "summary": {
+            "scripts": len(results),
+            "valid": sum(result["valid"] for result in results),
+            "invalid": sum(not result["valid"] for result in results),
+            "with_warnings": sum(bool(result["warnings"]) for result in results),
+            "duration": duration,
+        },
+        "scripts": results,
+    }
+
+
+def load_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="bc_script check",
+        description="Check that scripts are valid without loading a save",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="scripts, or directories to search for .toml scripts",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of worker processes to use. defaults to the cpu count, or fewer when there are only a few scripts",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        default=None,
+        type=str,
+        help="file to write the json report to instead of printing it",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="fail scripts that have warnings, e.g unknown keys",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = load_args(argv)
+    paths = find_scripts(args.paths)
+    if not paths:
+        print("No scripts found", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    results = check_scripts(paths, args.jobs)
+    if args.strict:
+        for result in results:
+            result["valid"] = result["valid"] and not result["warnings"]
+    report = create_report(results, time.perf_counter() - start)
+
+    if args.output_path is not None:
+        with open(args.output_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+    if report["summary"]["invalid"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
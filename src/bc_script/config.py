@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+from typing import Any, Iterator
+
+
+# bcsfe only reads its config from the global core_data.config, so runs in
+# the same process that need different values take turns
+class LocaleConfig:
+
+    condition = threading.Condition()
+    active = 0
+    active_key: tuple[tuple[str, Any], ...] | None = None
+    previous: dict[Any, Any] = {}
+
+    def __init__(self, forced_locale: str | None = None):
+        self.forced_locale = forced_locale
+
+    def get_values(self) -> dict[Any, Any]:
+        if self.forced_locale is None:
+            return {}
+        import bcsfe
+
+        return {
+            bcsfe.core.ConfigKey.FORCE_LANG_GAME_DATA: True,
+            bcsfe.core.ConfigKey.LOCALE: self.forced_locale,
+        }
+
+    @contextlib.contextmanager
+    def apply(self) -> Iterator[None]:
+        values = self.get_values()
+        if not values:
+            yield
+            return
+
+        import bcsfe
+
+        # the config only exists once bcsfe's data has been initialized
+        if not hasattr(bcsfe.core.core_data, "config"):
+            bcsfe.core.core_data.init_data()
+        key = tuple(sorted((str(k), v) for k, v in values.items()))
+        cls = LocaleConfig
+        with cls.condition:
+            while cls.active and cls.active_key != key:
+                cls.condition.wait()
+            if not cls.active:
+                config = bcsfe.core.core_data.config.config
+                cls.previous = {k: config.get(k, None) for k in values}
+                config.update(values)
+                cls.active_key = key
+            cls.active += 1
+        try:
+            yield
+        finally:
+            with cls.condition:
+                cls.active -= 1
+                if not cls.active:
+                    config = bcsfe.core.core_data.config.config
+                    for k, v in cls.previous.items():
+                        if v is None:
+                            config.pop(k, None)
+                        else:
+                            config[k] = v
+                    cls.previous = {}
+                    cls.active_key = None
+                    cls.condition.notify_all()
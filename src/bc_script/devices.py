@@ -0,0 +1,331 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import dataclasses
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+import colorama
+
+import bc_script
+from bc_script import adb, cache, log, output
+
+
+@dataclasses.dataclass
+class DeviceJob:
+    script_path: str
+    # the job only runs on this device if it's set, otherwise on any device
+    device: str | None = None
+
+
+@dataclasses.dataclass
+class DeviceJobResult:
+    job: DeviceJob
+    device: str
+    success: bool = False
+    errors: list[str] = dataclasses.field(default_factory=list)
+    warnings: list[str] = dataclasses.field(default_factory=list)
+    duration: float = 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "script": self.job.script_path,
+            "device": self.device,
+            "success": self.success,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "duration": self.duration,
+        }
+
+
+@dataclasses.dataclass
+class DeviceStats:
+    device: str
+    jobs: int = 0
+    succeeded: int = 0
+    busy: float = 0.0
+
+    def to_dict(self, duration: float) -> dict[str, Any]:
+        return {
+            "device": self.device,
+            "jobs": self.jobs,
+            "succeeded": self.succeeded,
+            "failed": self.jobs - self.succeeded,
+            "busy": self.busy,
+            "jobs_per_minute": self.jobs / duration * 60 if duration else 0.0,
+            "utilization": self.busy / duration if duration else 0.0,
+        }
+
+
+# each device has a thread that takes the next job it can run as soon as its
+# last one is done, so one device can be pulling a save while another is
+# pushing one. pulled saves are kept in out_dir/<device>
+class DevicePool:
+    def __init__(
+        self,
+        ctx: bc_script.Ctx,
+        devices: list[str],
+        jobs: list[DeviceJob],
+        scripts: dict[str, cache.CompiledScript],
+        out_dir: str,
+    ):
+        self.ctx = ctx
+        self.devices = list(dict.fromkeys(devices))
+        self.pending = list(jobs)
+        self.scripts = scripts
+        self.out_dir = out_dir
+        self.lock = threading.Lock()
+        self.results: list[DeviceJobResult] = []
+        self.stats = {device: DeviceStats(device) for device in self.devices}
+        self.duration = 0.0
+
+    def next_job(self, device: str) -> DeviceJob | None:
+        with self.lock:
+            for i, job in enumerate(self.pending):
+                if job.device is None or job.device == device:
+                    return self.pending.pop(i)
+        return None
+
+    def run(self) -> list[DeviceJobResult]:
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self.run_device, args=(device,), daemon=True)
+            for device in self.devices
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self.ctx.tracer.span("devices.sync"):
+            output.sync_pending()
+        self.duration = time.perf_counter() - start
+        return self.results
+
+    def run_device(self, device: str):
+        while True:
+            job = self.next_job(device)
+            if job is None:
+                return
+            result = self.run_job(device, job)
+            with self.lock:
+                self.results.append(result)
+                stats = self.stats[device]
+                stats.jobs += 1
+                stats.succeeded += result.success
+                stats.busy += result.duration
+
+    def create_ctx(self, device: str, job: DeviceJob) -> bc_script.Ctx:
+        ctx = bc_script.Ctx(
+            log.Log(show_warnings=False, show_errors=False),
+            self.ctx.tracer,
+            interactive=False,
+        )
+        ctx.fsync = self.ctx.fsync
+        # adb is only started and each device set up once for every job
+        ctx.adb = self.ctx.adb
+        copy.deepcopy(self.scripts[job.script_path]).to_ctx(ctx)
+
+        # jobs on the same device run one at a time, so they can share a path
+        path = os.path.join(self.out_dir, adb.get_device_dir(device))
+        if ctx.load is not None and ctx.load.adb is not None:
+            ctx.load.path = path
+            ctx.load.adb.device = device
+        if ctx.save is not None and ctx.save.adb is not None:
+            ctx.save.path = path
+            ctx.save.adb.device = device
+        return ctx
+
+    def run_job(self, device: str, job: DeviceJob) -> DeviceJobResult:
+        start = time.perf_counter()
+        ctx = self.create_ctx(device, job)
+        try:
+            with ctx.tracer.span("devices.job", device=device, script=job.script_path):
+                bc_script.parser.parse.run(ctx, None, None)
+        except Exception as e:
+            ctx.logger.add_error(
+                "".join(traceback.format_exception_only(type(e), e)).strip()
+            )
+        return DeviceJobResult(
+            job,
+            device,
+            success=not ctx.logger.errors,
+            errors=ctx.logger.errors,
+            warnings=ctx.logger.warnings,
+            duration=time.perf_counter() - start,
+        )
+
+    def get_failed(self) -> list[DeviceJobResult]:
+        return [result for result in self.results if not result.success]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "bc_script_version": bc_script.__version__,
+            "summary": {
+                "jobs": len(self.results),
+                "succeeded": len(self.results) - len(self.get_failed()),
+                "failed": len(self.get_failed()),
+                "not_run": len(self.pending),
+                "duration": self.duration,
+            },
+            "devices": [
+                self.stats[device].to_dict(self.duration) for device in self.devices
+            ],
+            "jobs": [result.to_dict() for result in self.results],
+        }
+
+    def print_summary(self):
+        for result in self.get_failed():
+            reason = result.errors[-1] if result.errors else "unknown error"
+            print(
+                f"{colorama.Fore.RED}FAILED: {result.device}: {result.job.script_path}: {reason}{colorama.Style.RESET_ALL}"
+            )
+        for device in self.devices:
+            stats = self.stats[device].to_dict(self.duration)
+            print(
+                f"{device}: {stats['jobs']} jobs, {stats['failed']} failed, "
+                f"{stats['jobs_per_minute']:.1f} jobs/min, {stats['utilization']:.0%} busy"
+            )
+        if self.pending:
+            print(
+                f"{colorama.Fore.RED}{len(self.pending)} jobs were pinned to devices that aren't in the pool{colorama.Style.RESET_ALL}"
+            )
+
+        failed = len(self.get_failed())
+        color = colorama.Fore.RED if failed or self.pending else colorama.Fore.GREEN
+        print(
+            f"{color}Ran {len(self.results)} jobs in {self.duration:.2f}s on {len(self.devices)} devices: "
+            f"{len(self.results) - failed} succeeded, {failed} failed{colorama.Style.RESET_ALL}"
+        )
+
+
+def load_scripts(
+    ctx: bc_script.Ctx, paths: list[str]
+) -> dict[str, cache.CompiledScript] | None:
+    # parsed before any job runs, so that `__input__` is only prompted for once
+    scripts: dict[str, cache.CompiledScript] = {}
+    for path in dict.fromkeys(paths):
+        if not os.path.exists(path):
+            ctx.logger.add_error(f"File not found: {path}")
+            return None
+        script_ctx = bc_script.Ctx(ctx.logger, ctx.tracer)
+        if cache.load_script(script_ctx, path) is None:
+            return None
+        load = script_ctx.load
+        save = script_ctx.save
+        if (load is None or load.adb is None) and (save is None or save.adb is None):
+            ctx.logger.add_error(f"{path}: Script doesn't load from or save to adb")
+            return None
+        scripts[path] = cache.CompiledScript.from_ctx(script_ctx, [])
+    return scripts
+
+
+def load_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="bc_script devices",
+        description="Run scripts that load from and save to adb on a pool of devices",
+    )
+    parser.add_argument(
+        "scripts",
+        nargs="+",
+        help="scripts to queue. each one is a job that runs on the next free device",
+    )
+    parser.add_argument(
+        "--device",
+        dest="devices",
+        action="append",
+        default=None,
+        help="device id to add to the pool. can be given multiple times. defaults to every connected device",
+    )
+    parser.add_argument(
+        "--each",
+        action="store_true",
+        help="queue the scripts once for every device instead of once in total",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="number of times to queue the scripts",
+    )
+    parser.add_argument(
+        "--out-dir",
+        dest="out_dir",
+        default=None,
+        type=str,
+        help="directory to keep the save pulled from each device in. defaults to devices in the cache dir",
+    )
+    parser.add_argument(
+        "--fsync",
+        dest="fsync",
+        default="always",
+        choices=output.FSYNC_MODES,
+        help="when to flush written files to disk",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        dest="output_path",
+        default=None,
+        type=str,
+        help="file to write a json report of the jobs and the throughput of each device to",
+    )
+    parser.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="show debug messages",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = load_args(argv)
+    ctx = bc_script.Ctx(log.Log(show_info=args.debug))
+    ctx.fsync = args.fsync
+
+    scripts = load_scripts(ctx, args.scripts)
+    if scripts is None:
+        ctx.logger.print()
+        sys.exit(1)
+
+    devices = args.devices
+    if devices is None:
+        devices = ctx.adb.get_devices()
+    if not devices:
+        print("There are no devices connected with adb", file=sys.stderr)
+        sys.exit(1)
+
+    jobs: list[DeviceJob] = []
+    for _ in range(max(args.repeat, 0)):
+        if args.each:
+            jobs.extend(
+                DeviceJob(path, device) for device in devices for path in args.scripts
+            )
+        else:
+            jobs.extend(DeviceJob(path) for path in args.scripts)
+
+    out_dir = args.out_dir
+    if out_dir is None:
+        out_dir = os.path.join(cache.get_cache_dir(), "devices")
+    os.makedirs(out_dir, exist_ok=True)
+
+    pool = DevicePool(ctx, devices, jobs, scripts, out_dir)
+    pool.run()
+
+    if args.output_path is not None:
+        with open(args.output_path, "w", encoding="utf-8") as f:
+            json.dump(pool.to_dict(), f, indent=4)
+    pool.print_summary()
+    if pool.get_failed() or pool.pending:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, TypeVar
+
+import bcsfe
+
+from bc_script import cache as script_cache
+
+T = TypeVar("T")
+
+
+# tables built from game data, shared by every run in the process and keyed
+# by the locale and game version of the save they were built for. tables that
+# failed to build are cached as None too, like bcsfe does
+class GameDataCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tables: dict[tuple[str, str, str, int], Any] = {}
+
+    @staticmethod
+    def get_key(name: str, s: bcsfe.core.SaveFile) -> tuple[str, str, str, int]:
+        # get_cc_lang takes the forced locale into account
+        return (
+            name,
+            s.cc.get_code(),
+            s.cc.get_cc_lang().get_code(),
+            s.game_version.game_version,
+        )
+
+    def get(
+        self,
+        name: str,
+        s: bcsfe.core.SaveFile,
+        build: Callable[[bcsfe.core.SaveFile], T | None],
+    ) -> T | None:
+        key = self.get_key(name, s)
+        with self.lock:
+            if key in self.tables:
+                return self.tables[key]
+        table = build(s)
+        with self.lock:
+            return self.tables.setdefault(key, table)
+
+    def clear(self):
+        with self.lock:
+            self.tables.clear()
+
+
+cache = GameDataCache()
+
+# the game data files each edit section needs, as pack/file
+GAME_DATA_FILES: dict[str, list[str]] = {
+    "cats": [
+        "DataLocal/unitbuy.csv",
+        "DataLocal/unitlimit.csv",
+        "DataLocal/nyankoPictureBookData.csv",
+        "DataLocal/drop_chara.csv",
+        "DataLocal/GatyaDataSetR1.csv",
+        "resLocal/localizable.tsv",
+    ],
+    "talents": [
+        "DataLocal/SkillLevel.csv",
+        "DataLocal/SkillAcquisition.csv",
+        "resLocal/SkillDescriptions.csv",
+    ],
+    "talent_orbs": [
+        "DataLocal/equipmentlist.json",
+        "DataLocal/equipmentgrade.csv",
+        "resLocal/attribute_explonation.tsv",
+        "resLocal/equipment_explonation.tsv",
+    ],
+    "special_skills": ["DataLocal/AbilityData.csv"],
+}
+
+
+def get_ability_data(
+    s: bcsfe.core.SaveFile,
+) -> list[bcsfe.core.AbilityDataItem] | None:
+    return cache.get(
+        "ability_data", s, lambda s: bcsfe.core.AbilityData(s).ability_data
+    )
+
+
+# talent orb ids indexed by effect, grade and attribute. each can be looked
+# up by its id or by the first word of its name, e.g `attack` for "Attack Up"
+class OrbIndex:
+    def __init__(self, orbs: list[bcsfe.core.OrbInfo]):
+        self.orb_ids: list[int] = []
+        self.effects: dict[str, set[int]] = {}
+        self.grades: dict[str, set[int]] = {}
+        self.attributes: dict[str, set[int]] = {}
+        self.patterns: dict[tuple[str | None, ...], list[int]] = {}
+        self.lock = threading.Lock()
+
+        for orb in orbs:
+            raw = orb.raw_orb_info
+            orb_id = raw.orb_id
+            self.orb_ids.append(orb_id)
+            self.add(self.effects, raw.effect_id, orb.effect, orb_id)
+            self.add(self.grades, raw.grade_id, orb.grade, orb_id)
+            self.add(self.attributes, raw.attribute_id, orb.attribute, orb_id)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return name.lower().replace(" ", "_").split("_")[0]
+
+    @staticmethod
+    def normalize_key(key: str) -> str:
+        if key.isdigit():
+            return str(int(key))
+        return key
+
+    def add(
+        self,
+        index: dict[str, set[int]],
+        id: int | None,
+        name: str | None,
+        orb_id: int,
+    ):
+        if id is not None:
+            index.setdefault(str(id), set()).add(orb_id)
+        if name is not None:
+            index.setdefault(self.normalize(name), set()).add(orb_id)
+
+    def select(
+        self, effect: str | None, grade: str | None, attribute: str | None
+    ) -> list[int]:
+        key = (effect, grade, attribute)
+        with self.lock:
+            orb_ids = self.patterns.get(key)
+        if orb_ids is not None:
+            return orb_ids
+
+        # parts that are None match every orb
+        selected: set[int] | None = None
+        for part, index in (
+            (effect, self.effects),
+            (grade, self.grades),
+            (attribute, self.attributes),
+        ):
+            if part is None:
+                continue
+            ids = index.get(self.normalize_key(part), set())
+            selected = ids if selected is None else selected & ids
+            if not selected:
+                break
+
+        if selected is None:
+            orb_ids = list(self.orb_ids)
+        else:
+            orb_ids = sorted(selected)
+        with self.lock:
+            self.patterns[key] = orb_ids
+        return orb_ids
+
+
+def create_orb_index(s: bcsfe.core.SaveFile) -> OrbIndex | None:
+    orb_info_list = bcsfe.core.OrbInfoList.create(s)
+    if orb_info_list is None:
+        return None
+    return OrbIndex(orb_info_list.orb_info_list)
+
+
+def get_orb_index(s: bcsfe.core.SaveFile) -> OrbIndex | None:
+    return cache.get("orb_index", s, create_orb_index)
+
+
+def create_cat_rarities(s: bcsfe.core.SaveFile) -> list[int] | None:
+    unit_buy = bcsfe.core.UnitBuy(s).unit_buy
+    if unit_buy is None:
+        return None
+    return [cat.rarity for cat in unit_buy]
+
+
+def get_cat_rarities(s: bcsfe.core.SaveFile) -> list[int] | None:
+    return cache.get("cat_rarities", s, create_cat_rarities)
+
+
+def get_gatya_data_set(s: bcsfe.core.SaveFile) -> list[list[int]] | None:
+    return cache.get(
+        "gatya_data_set", s, lambda s: bcsfe.core.GatyaDataSet(s).gatya_data_set
+    )
+
+
+def create_obtainable_cat_ids(s: bcsfe.core.SaveFile) -> list[int] | None:
+    cats = bcsfe.core.game.catbase.cat.NyankoPictureBook(s).get_obtainable_cats()
+    if cats is None:
+        return None
+    return [cat.cat_id for cat in cats]
+
+
+def get_obtainable_cat_ids(s: bcsfe.core.SaveFile) -> list[int] | None:
+    return cache.get("obtainable_cat_ids", s, create_obtainable_cat_ids)
+
+
+@dataclasses.dataclass
+class TalentInfo:
+    ability_id: int
+    name: str
+    max_level: int
+
+
+def create_talent_tables(
+    s: bcsfe.core.SaveFile,
+) -> dict[int, list[TalentInfo]] | None:
+    talent_data = bcsfe.core.TalentData.from_game_data(s)
+    if talent_data is None:
+        return None
+    tables: dict[int, list[TalentInfo]] = {}
+    for cat_id, cat_skill in talent_data.cats.skills.items():
+        table: list[TalentInfo] = []
+        for skill in cat_skill.skills:
+            name = talent_data.get_skill_name(skill.text_id)
+            if name is None:
+                continue
+            table.append(
+                TalentInfo(skill.ability_id, name.split("<br>")[0], skill.max_lv or 1)
+            )
+        tables[cat_id] = table
+    return tables
+
+
+# the talents each cat can have by cat id, which are matched to the talents
+# of a cat in a save by ability id
+def get_talent_tables(s: bcsfe.core.SaveFile) -> dict[int, list[TalentInfo]] | None:
+    return cache.get("talent_tables", s, create_talent_tables)
+
+
+# the keys of GAME_DATA_FILES that the edits of a script need
+def get_script_features(script_data: dict[str, Any]) -> set[str]:
+    features: set[str] = set()
+    edit = script_data.get("edit")
+    if not isinstance(edit, dict):
+        return features
+    cats = edit.get("cats")
+    if cats:
+        features.add("cats")
+        if isinstance(cats, list) and any(
+            isinstance(cat, dict) and "talents" in cat for cat in cats
+        ):
+            features.add("talents")
+    basic_items = edit.get("basic_items")
+    if isinstance(basic_items, dict) and "talent_orbs" in basic_items:
+        features.add("talent_orbs")
+    if edit.get("special_skills"):
+        features.add("special_skills")
+    return features
+
+
+def get_index_path() -> str:
+    return os.path.join(script_cache.get_cache_dir(), "game_data.json")
+
+
+# the prefetched game data by locale, with the game version the files were
+# downloaded for
+def read_index() -> dict[str, Any]:
+    try:
+        with open(get_index_path(), "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict):
+        return {}
+    return index
+
+
+def write_index(index: dict[str, Any]):
+    path = get_index_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+# only reads game data that has already been downloaded, for the game version
+# recorded by `bc_script prefetch`
+class OfflineGameDataGetter(bcsfe.core.GameDataGetter):
+    def __init__(self, cc: bcsfe.core.CountryCode, version: str | None):
+        config = bcsfe.core.core_data.config
+        self.url = config.get_str(bcsfe.core.ConfigKey.GAME_DATA_REPO)
+        self.lang = config.get_str(bcsfe.core.ConfigKey.LOCALE)
+        self.real_cc = cc
+        self.cc = cc.get_cc_lang()
+        self.cc = self.cc if not self.cc.is_lang() else self.real_cc
+        self.all_versions = None
+        self.latest_version = version
+
+    def get_file(self, pack_name: str, file_name: str) -> bcsfe.core.Data | None:
+        return None
+
+
+# returns the locales that have been prefetched
+def use_offline_cache() -> list[str]:
+    index = read_index()
+    getters: dict[str, OfflineGameDataGetter] = {}
+    lock = threading.Lock()
+    for locale, entry in index.items():
+        cc = bcsfe.core.CountryCode.from_code(locale)
+        getters[locale] = OfflineGameDataGetter(cc, entry.get("version"))
+
+    def get_game_data_getter(
+        self: Any,
+        save: bcsfe.core.SaveFile | None = None,
+        cc: bcsfe.core.CountryCode | None = None,
+    ) -> bcsfe.core.GameDataGetter:
+        if cc is None and save is not None:
+            cc = save.cc
+        if cc is None:
+            raise ValueError("cc must be provided if save is not provided")
+        locale = cc.get_cc_lang().get_code()
+        with lock:
+            getter = getters.get(locale)
+            if getter is None:
+                # the locale wasn't prefetched, so every file is missing
+                getter = OfflineGameDataGetter(cc, None)
+                getters[locale] = getter
+        return getter
+
+    bcsfe.core.CoreData.get_game_data_getter = get_game_data_getter
+    return sorted(index.keys())
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import gzip
+import io
+import json
+from typing import IO, TYPE_CHECKING, Any
+
+from bc_script import output
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+if TYPE_CHECKING:
+    import bc_script
+
+
+def get_compression(path: str) -> str | None:
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def get_zstandard() -> Any:
+    if zstandard is None:
+        raise ValueError(
+            "zstandard is needed for .zst files, install it with `pip install zstandard`"
+        )
+    return zstandard
+
+
+# .gz and .zst files are compressed with gzip and zstd
+def read(path: str) -> Any:
+    compression = get_compression(path)
+    with open(path, "rb") as f:
+        if compression == "gzip":
+            data = gzip.GzipFile(fileobj=f, mode="rb").read()
+        elif compression == "zstd":
+            with get_zstandard().ZstdDecompressor().stream_reader(f) as reader:
+                data = reader.read()
+        else:
+            data = f.read()
+    return loads(data)
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj: Any, f: IO[bytes]):
+    # both backends write the same json, with the indent of 2 that is the only
+    # one orjson supports. orjson can't stream, it encodes the whole document
+    # in memory first, but it is still faster than json.dump
+    if orjson is not None:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+    # json.dump encodes the object in chunks, so the whole string is never in
+    # memory at once
+    writer = io.TextIOWrapper(f, encoding="utf-8")
+    json.dump(obj, writer, indent=2, ensure_ascii=False)
+    writer.flush()
+    writer.detach()
+
+
+def write(ctx: bc_script.Ctx, path: str, obj: Any):
+    compression = get_compression(path)
+
+    def write_to(f: IO[bytes]):
+        if compression == "gzip":
+            # mtime 0 so the same json always gives the same file
+            with gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as gz:
+                dump(obj, gz)
+        elif compression == "zstd":
+            compressor = get_zstandard().ZstdCompressor()
+            with compressor.stream_writer(f, closefd=False) as writer:
+                dump(obj, writer)
+        else:
+            dump(obj, f)
+
+    output.write_stream(ctx, path, write_to)
@@ -1,5 +1,24 @@
+import threading
+from typing import Any
+
 import colorama
 
+colorama_initialized = False
+
+# held while a message is printed and stored, so that messages logged from
+# threads at the same time, e.g by save sinks, don't interleave. it's shared
+# by every Log so that they don't interleave with each other either, and so
+# that a Log can still be pickled
+lock = threading.Lock()
+
+
+def init_colorama():
+    # colorama wraps stdout again on every init, so only do it once
+    global colorama_initialized
+    if not colorama_initialized:
+        colorama.init()
+        colorama_initialized = True
+
 
 class Log:
     def __init__(
@@ -11,31 +30,63 @@ class Log:
         self.warnings: list[str] = []
         self.errors: list[str] = []
         self.info: list[str] = []
+        self.counts: dict[str, int] = {}
 
         self.show_warnings = show_warnings
         self.show_errors = show_errors
         self.show_info = show_info
 
-        colorama.init()
+        init_colorama()
 
-    def add_warning(self, warning: str):
-        if self.show_warnings:
-            print(f"{colorama.Fore.YELLOW}WARNING: {warning}{colorama.Style.RESET_ALL}")
-        self.warnings.append(warning)
+    # messages can be given as a str.format template with args, so that they
+    # are only formatted if they are actually used
 
-    def add_error(self, error: str):
-        if self.show_errors:
-            print(f"{colorama.Fore.RED}ERROR: {error}{colorama.Style.RESET_ALL}")
-        self.errors.append(error)
+    def add_warning(self, warning: str, *args: Any):
+        if args:
+            warning = warning.format(*args)
+        with lock:
+            if self.show_warnings:
+                print(
+                    f"{colorama.Fore.YELLOW}WARNING: {warning}{colorama.Style.RESET_ALL}"
+                )
+            self.warnings.append(warning)
 
-    def add_info(self, info: str):
-        if self.show_info:
+    def add_error(self, error: str, *args: Any):
+        if args:
+            error = error.format(*args)
+        with lock:
+            if self.show_errors:
+                print(f"{colorama.Fore.RED}ERROR: {error}{colorama.Style.RESET_ALL}")
+            self.errors.append(error)
+
+    def add_info(self, info: str, *args: Any):
+        if not self.show_info:
+            return
+        if args:
+            info = info.format(*args)
+        with lock:
             print(
                 f"{colorama.Fore.LIGHTBLACK_EX}INFO: {info}{colorama.Style.RESET_ALL}"
             )
-        self.info.append(info)
+            self.info.append(info)
+
+    # counts messages that would otherwise be logged once per item. message
+    # is a template for the total, e.g "Upgraded {} cats"
+    def add_count(self, message: str, amount: int = 1):
+        if not self.show_info:
+            return
+        with lock:
+            self.counts[message] = self.counts.get(message, 0) + amount
+
+    def flush_counts(self):
+        with lock:
+            counts = self.counts
+            self.counts = {}
+        for message, amount in counts.items():
+            self.add_info(message, amount)
 
     def print(self):
+        self.flush_counts()
         if self.show_errors:
             color = colorama.Fore.RED if len(self.errors) > 0 else colorama.Fore.GREEN
             print(
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import os
+import threading
+from typing import IO, TYPE_CHECKING, Any, Callable, Iterator
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
+if TYPE_CHECKING:
+    import bcsfe
+
+    import bc_script
+
+# how written files are flushed to disk:
+# always: each file is fsynced before it replaces the old one
+# batch: files are fsynced together by sync_pending, e.g at the end of a batch
+# never: leave it to the os
+FSYNC_MODES = ["always", "batch", "never"]
+
+O_BINARY = getattr(os, "O_BINARY", 0)
+
+pending: list[str] = []
+pending_lock = threading.Lock()
+
+
+def get_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def set_input(
+    ctx: bc_script.Ctx, data: bcsfe.core.Data, source: tuple[str, ...] | None = None
+):
+    # source is where the save came from, e.g ("adb", device, package)
+    ctx.input_hash = get_hash(data.to_bytes())
+    ctx.input_source = source
+
+
+def is_unchanged(
+    ctx: bc_script.Ctx, data: bytes, source: tuple[str, ...] | None = None
+) -> bool:
+    # if source is given, the save must also have been loaded from there
+    if ctx.input_hash is None:
+        return False
+    if source is not None and ctx.input_source != source:
+        return False
+    return get_hash(data) == ctx.input_hash
+
+
+def has_content(path: str, data: bytes) -> bool:
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def lock_path(path: str) -> Iterator[None]:
+    # runs writing to the same file take turns. the lock is on a .lock file
+    # next to it, as the file itself is replaced when it is written
+    if fcntl is None:
+        yield
+        return
+    directory, name = os.path.split(os.path.abspath(path))
+    with open(os.path.join(directory, f".{name}.lock"), "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def fsync_dir(directory: str):
+    # makes the rename durable. directories can't be opened on windows
+    if fcntl is None:
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# readers see either the old or the new file, never a partly written one
+def atomic_write(path: str, write: Callable[[IO[bytes]], Any], fsync: str = "always"):
+    directory, name = os.path.split(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.tmp")
+    # unlike mkstemp, this creates the file with the usual permissions
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | O_BINARY, 0o666)
+    try:
+        with contextlib.suppress(OSError):
+            os.chmod(tmp_path, os.stat(path).st_mode)
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            if fsync == "always":
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    if fsync == "always":
+        fsync_dir(directory)
+    elif fsync == "batch":
+        with pending_lock:
+            pending.append(path)
+
+
+# e.g to sync the files a batch worker wrote in the parent process
+def take_pending() -> list[str]:
+    with pending_lock:
+        paths = list(dict.fromkeys(pending))
+        pending.clear()
+    return paths
+
+
+def add_pending(paths: list[str]):
+    with pending_lock:
+        pending.extend(paths)
+
+
+def sync_pending():
+    sync_files(take_pending())
+
+
+def sync_files(paths: list[str]):
+    directories: set[str] = set()
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        directories.add(os.path.dirname(os.path.abspath(path)))
+    for directory in directories:
+        with contextlib.suppress(OSError):
+            fsync_dir(directory)
+
+
+def write_file(ctx: bc_script.Ctx, path: str, data: bytes) -> bool:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with lock_path(path):
+        if has_content(path, data):
+            ctx.logger.add_info(f"File is unchanged, skipped writing: {path}")
+            return False
+        atomic_write(path, lambda f: f.write(data), ctx.fsync)
+    return True
+
+
+# for large files that shouldn't be built in memory first
+def write_stream(ctx: bc_script.Ctx, path: str, write: Callable[[IO[bytes]], Any]):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with lock_path(path):
+        atomic_write(path, write, ctx.fsync)
+
+
+def write_save(
+    ctx: bc_script.Ctx, s: bcsfe.core.SaveFile, path: bcsfe.core.Path
+) -> bool:
+    return write_file(ctx, str(path), s.to_data().to_bytes())
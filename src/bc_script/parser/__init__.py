@@ -1 +1,10 @@
-from bc_script.parser import info, parse, pkg, bcsfe
+from bc_script.parser import info, parse, pkg
+
+
+def __getattr__(name: str):
+    # the bcsfe sections are only imported once a script uses them
+    if name == "bcsfe":
+        import importlib
+
+        return importlib.import_module("bc_script.parser.bcsfe")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
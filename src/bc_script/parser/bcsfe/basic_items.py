@@ -1,16 +1,14 @@
 from __future__ import annotations
 
 import dataclasses
-from typing import Any
+from typing import TYPE_CHECKING
 
-
-from bcsfe.core import ManagedItemType, SaveFile, OrbInfoList
+if TYPE_CHECKING:
+    from bcsfe.core import SaveFile
 
 import bc_script
 from bc_script.parser.parse import BaseParser
 
-from typeguard import typechecked
-
 
 @dataclasses.dataclass
 class BasicItems(BaseParser):
@@ -32,87 +30,78 @@ class BasicItems(BaseParser):
 
     talent_orbs: TalentOrbs | None = None
 
-    def apply(self, s: SaveFile):
-        edit = bc_script.ctx.edit
+    def apply(self, ctx: bc_script.Ctx, s: SaveFile):
+        from bcsfe.core import ManagedItemType
+
+        edit = ctx.edit
         if edit is None:
             return
 
         if self.catfood is not None:
-            prev = s.catfood
-            s.set_catfood(self.catfood)
-            new = s.catfood
-            bc_script.logger.add_info(f"Set catfood to: {self.catfood}")
-
-            edit.add_managed_item(s, new - prev, ManagedItemType.CATFOOD)
+            change = self.set_item(ctx, s, "catfood", self.catfood)
+            edit.add_managed_item(ctx, s, change, ManagedItemType.CATFOOD)
 
         if self.xp is not None:
-            s.set_xp(self.xp)
-            bc_script.logger.add_info(f"Set xp to: {self.xp}")
+            self.set_item(ctx, s, "xp", self.xp)
 
         if self.normal_tickets is not None:
-            s.set_normal_tickets(self.normal_tickets)
-            bc_script.logger.add_info(f"Set normal tickets to: {self.normal_tickets}")
+            self.set_item(ctx, s, "normal_tickets", self.normal_tickets)
 
         if self.rare_tickets is not None:
-            prev = s.rare_tickets
-            s.set_rare_tickets(self.rare_tickets)
-            new = s.rare_tickets
-            bc_script.logger.add_info(f"Set rare tickets to: {self.rare_tickets}")
-
-            edit.add_managed_item(s, new - prev, ManagedItemType.RARE_TICKET)
+            change = self.set_item(ctx, s, "rare_tickets", self.rare_tickets)
+            edit.add_managed_item(ctx, s, change, ManagedItemType.RARE_TICKET)
 
         if self.platinum_tickets is not None:
-            prev = s.platinum_tickets
-            s.set_platinum_tickets(self.platinum_tickets)
-            new = s.platinum_tickets
-            bc_script.logger.add_info(
-                f"Set platinum tickets to: {self.platinum_tickets}"
-            )
-
-            edit.add_managed_item(s, new - prev, ManagedItemType.PLATINUM_TICKET)
+            change = self.set_item(ctx, s, "platinum_tickets", self.platinum_tickets)
+            edit.add_managed_item(ctx, s, change, ManagedItemType.PLATINUM_TICKET)
 
         if self.legend_tickets is not None:
-            prev = s.legend_tickets
-            s.set_legend_tickets(self.legend_tickets)
-            new = s.legend_tickets
-            bc_script.logger.add_info(f"Set legend tickets to: {self.legend_tickets}")
-
-            edit.add_managed_item(s, new - prev, ManagedItemType.LEGEND_TICKET)
+            change = self.set_item(ctx, s, "legend_tickets", self.legend_tickets)
+            edit.add_managed_item(ctx, s, change, ManagedItemType.LEGEND_TICKET)
 
         if self.platinum_shards is not None:
-            s.set_platinum_shards(self.platinum_shards)
-            bc_script.logger.add_info(f"Set platinum shards to: {self.platinum_shards}")
+            self.set_item(ctx, s, "platinum_shards", self.platinum_shards)
 
         if self.np is not None:
-            s.set_np(self.np)
-            bc_script.logger.add_info(f"Set np to: {self.np}")
+            self.set_item(ctx, s, "np", self.np)
 
         if self.leadership is not None:
-            s.set_leadership(self.leadership)
-            bc_script.logger.add_info(f"Set leadership to: {self.leadership}")
+            self.set_item(ctx, s, "leadership", self.leadership)
 
         if self.battle_items is not None:
 
             data = [item.amount for item in s.battle_items.items]
 
-            self.set_grouped_data(self.battle_items, data, "battle_items")
+            self.set_grouped_data(ctx, self.battle_items, data, "battle_items")
             for i, amount in enumerate(data):
                 s.battle_items.items[i].amount = amount
 
         if self.catamins is not None:
-            self.set_grouped_data(self.catamins, s.catamins, "catamins")
+            self.set_grouped_data(ctx, self.catamins, s.catamins, "catamins")
 
         if self.catseyes is not None:
-            self.set_grouped_data(self.catseyes, s.catseyes, "catseyes")
+            self.set_grouped_data(ctx, self.catseyes, s.catseyes, "catseyes")
 
         if self.catfruit is not None:
-            self.set_grouped_data(self.catfruit, s.catfruit, "catfruit")
+            self.set_grouped_data(ctx, self.catfruit, s.catfruit, "catfruit")
 
         if self.talent_orbs is not None:
-            self.talent_orbs.apply(s)
+            with ctx.tracer.span("edit.basic_items.talent_orbs"):
+                self.talent_orbs.apply(ctx, s)
+
+    @staticmethod
+    def set_item(ctx: bc_script.Ctx, s: SaveFile, name: str, value: int) -> int:
+        # returns how much the item changed by
+        prev = getattr(s, name)
+        getattr(s, f"set_{name}")(value)
+        new = getattr(s, name)
+        ctx.changes.add(name, prev, new)
+        ctx.logger.add_info(f"Set {name.replace('_', ' ')} to: {value}")
+        return new - prev
 
     def set_grouped_data(
         self,
+        ctx: bc_script.Ctx,
         data: dict[str, int] | list[int] | None,
         save_data: list[int],
         group_name: str,
@@ -120,22 +109,24 @@ class BasicItems(BaseParser):
         if isinstance(data, list):
             for i, amount in enumerate(data):
                 if i < 0 or i >= len(save_data):
-                    bc_script.logger.add_error(f"Invalid {group_name} index: {i}")
+                    ctx.logger.add_error(f"Invalid {group_name} index: {i}")
                 else:
+                    ctx.changes.add(group_name, save_data[i], amount, i)
                     save_data[i] = amount
         elif isinstance(data, dict):  # type: ignore
             for i, amount in data.items():
                 if i.isdigit():
                     if int(i) < 0 or int(i) >= len(save_data):
-                        bc_script.logger.add_error(f"Invalid {group_name} index: {i}")
+                        ctx.logger.add_error(f"Invalid {group_name} index: {i}")
                     else:
+                        ctx.changes.add(group_name, save_data[int(i)], amount, int(i))
                         save_data[int(i)] = amount
                 else:
-                    bc_script.logger.add_error(f"Invalid key for {group_name}: {i}")
+                    ctx.logger.add_error(f"Invalid key for {group_name}: {i}")
         else:
-            bc_script.logger.add_error(f"Invalid type for {group_name}: {type(data)}")
+            ctx.logger.add_error(f"Invalid type for {group_name}: {type(data)}")
 
-        bc_script.logger.add_info(f"Set {group_name} to: {data}")
+        ctx.logger.add_info("Set {} to: {}", group_name, data)
         return save_data
 
     @dataclasses.dataclass
@@ -145,134 +136,79 @@ class BasicItems(BaseParser):
         orbs: dict[str, int | str] | None = None
         keep_previous: bool = True
 
-        @typechecked
-        def __new__(
-            cls,
-            orbs: dict[str, int | str] | None = None,
-            keep_previous: bool = True,
-            **kwargs: Any,
-        ):
-            return super().__new__(cls)
-
-        def apply(self, s: SaveFile):
-            edit = bc_script.ctx.edit
+        def apply(self, ctx: bc_script.Ctx, s: SaveFile):
+            from bcsfe.core import TalentOrb
+
+            from bc_script import game_data
+
+            edit = ctx.edit
             if edit is None:
                 return
 
             if self.orbs is not None:
-                orb_info_list = OrbInfoList.create(s)
-                if orb_info_list is None:
-                    bc_script.logger.add_error("Failed to create orb info list")
+                orb_index = game_data.get_orb_index(s)
+                if orb_index is None:
+                    ctx.logger.add_error("Failed to create orb info list")
                     return
-                all_orbs = orb_info_list.orb_info_list
 
-                if not self.keep_previous:
-                    s.talent_orbs.orbs.clear()
-                    bc_script.logger.add_info("Cleared talent orbs")
+                # orbs set by later keys override earlier ones, and are all
+                # written to the save at the end
+                new_orbs: dict[int, int] = {}
 
                 for talent, amount in self.orbs.items():
                     if not str(amount).isdigit():
-                        bc_script.logger.add_error(
-                            f"Invalid talent orb amount: {amount}"
-                        )
+                        ctx.logger.add_error(f"Invalid talent orb amount: {amount}")
                         continue
 
                     amount = int(amount)
 
                     if talent.isdigit():
                         id = int(talent)
-                        s.talent_orbs.set_orb(id, amount)
-                        bc_script.logger.add_info(f"Set talent orb {id} to: {amount}")
+                        new_orbs[id] = amount
+                        ctx.logger.add_info("Set talent orb {} to: {}", id, amount)
+                    elif talent == "all":
+                        for id in orb_index.orb_ids:
+                            new_orbs[id] = amount
+                        ctx.logger.add_info(f"Set all talent orbs to: {amount}")
                     else:
-                        if talent == "all":
-                            for orb in all_orbs:
-                                s.talent_orbs.set_orb(orb.raw_orb_info.orb_id, amount)
-                            bc_script.logger.add_info(
-                                f"Set all talent orbs to: {amount}"
-                            )
-                        else:
-                            parts = talent.split("-")
-                            if not parts:
-                                bc_script.logger.add_error(
-                                    f"Invalid talent orb: {talent}"
-                                )
-                                continue
-
-                            effect = parts[0]
-                            grade = parts[1] if len(parts) > 1 else None
-                            attribute = parts[2] if len(parts) > 2 else None
-
-                            if not effect:
-                                effect = None
-                            if not grade:
-                                grade = None
-                            if not attribute:
-                                attribute = None
-
-                            for orb in all_orbs:
-                                effect_id = orb.raw_orb_info.effect_id
-                                effect_str = (
-                                    orb.effect.lower().replace(" ", "_").split("_")[0]
-                                )
-                                if effect is not None:
-                                    if effect.isdigit() and effect_id == int(effect):
-                                        pass
-                                    elif effect_str == effect:
-                                        pass
-                                    else:
-                                        continue
-
-                                grade_id = orb.raw_orb_info.grade_id
-                                grade_str = (
-                                    orb.grade.lower().replace(" ", "_").split("_")[0]
-                                )
-
-                                if grade is not None:
-                                    if grade.isdigit() and grade_id == int(grade):
-                                        pass
-                                    elif grade_str == grade:
-                                        pass
-                                    else:
-                                        continue
-
-                                attribute_id = orb.raw_orb_info.attribute_id
-                                attribute_str = (
-                                    orb.attribute.lower()
-                                    .replace(" ", "_")
-                                    .split("_")[0]
-                                )
-
-                                if attribute is not None:
-                                    if attribute.isdigit() and attribute_id == int(
-                                        attribute
-                                    ):
-                                        pass
-                                    elif attribute_str == attribute:
-                                        pass
-                                    else:
-                                        continue
-
-                                s.talent_orbs.set_orb(orb.raw_orb_info.orb_id, amount)
-                                bc_script.logger.add_info(
-                                    f"Set talent orb {orb.raw_orb_info.orb_id} to: {amount}"
-                                )
-
-    @typechecked
-    def __new__(
-        cls,
-        catfood: int | None = None,
-        xp: int | None = None,
-        normal_tickets: int | None = None,
-        rare_tickets: int | None = None,
-        platinum_tickets: int | None = None,
-        legend_tickets: int | None = None,
-        platinum_shards: int | None = None,
-        np: int | None = None,
-        leadership: int | None = None,
-        battle_items: list[int] | dict[str, int] | None = None,
-        catamins: list[int] | dict[str, int] | None = None,
-        catseyes: list[int] | dict[str, int] | None = None,
-        catfruit: list[int] | dict[str, int] | None = None,
-        **kwargs: Any,
-    ):
-        return super().__new__(cls)
+                        parts = talent.split("-")
+                        if not parts:
+                            ctx.logger.add_error(f"Invalid talent orb: {talent}")
+                            continue
+
+                        # empty or * parts match anything
+                        effect, grade, attribute = [
+                            part if part and part != "*" else None
+                            for part in (parts + [""] * 3)[:3]
+                        ]
+
+                        matched = orb_index.select(effect, grade, attribute)
+                        for id in matched:
+                            new_orbs[id] = amount
+
+                        ctx.logger.add_info(
+                            "Set {} talent orbs matching {} to: {}",
+                            len(matched),
+                            talent,
+                            amount,
+                        )
+
+                orbs = s.talent_orbs.orbs
+                if ctx.changes.enabled:
+                    for id, amount in new_orbs.items():
+                        orb = orbs.get(id)
+                        ctx.changes.add(
+                            "talent_orbs", orb.value if orb else 0, amount, id
+                        )
+                    if not self.keep_previous:
+                        for id, orb in orbs.items():
+                            if id not in new_orbs:
+                                ctx.changes.add("talent_orbs", orb.value, 0, id)
+
+                if not self.keep_previous:
+                    orbs.clear()
+                    ctx.logger.add_info("Cleared talent orbs")
+
+                orbs.update(
+                    (id, TalentOrb(id, amount)) for id, amount in new_orbs.items()
+                )
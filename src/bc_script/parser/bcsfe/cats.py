@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import dataclasses
-import typing
+from typing import TYPE_CHECKING, Any
 
+if TYPE_CHECKING:
+    import bcsfe
+    from bcsfe.core import SaveFile
 
-from bcsfe.core import SaveFile
-import bcsfe
+    from bc_script import selector
 
 import bc_script
 from bc_script.parser.parse import BaseParser
-from typeguard import typechecked
 
 
 @dataclasses.dataclass
@@ -18,14 +19,20 @@ class Cats(BaseParser):
 
     cats: list[CatEdit] | None = None
 
-    def apply(self, s: SaveFile):
-        edit = bc_script.ctx.edit
+    def apply(self, ctx: bc_script.Ctx, s: SaveFile):
+        from bc_script import selector
+
+        edit = ctx.edit
         if edit is None:
             return
 
         if self.cats is not None:
-            for cat in self.cats:
-                cat.apply(s)
+            # the game data sets that cats are selected from are shared by
+            # every entry
+            cat_sets = selector.CatSets(s)
+            for i, cat in enumerate(self.cats):
+                with ctx.tracer.span("edit.cats.cat", index=i, ids=cat.ids):
+                    cat.apply(ctx, s, cat_sets)
 
         s.max_rank_up_sale()
 
@@ -50,175 +57,180 @@ class Cats(BaseParser):
 
         talents: Talents | None = None
 
-        @typechecked
-        def __new__(
-            cls,
-            ids: list[int | str] | None | str = None,
-            unlock: bool | None = None,
-            upgrade: list[int | str] | None = None,
-            upgrade_base: int | str | None = None,
-            upgrade_plus: int | str | None = None,
-            true_form: bool | None = None,
-            ultra_form: bool | None = None,
-            set_current_forms: bool = True,
-            force_forms: bool = False,
-            claim_cat_guide: bool | None = None,
-            **kwargs: typing.Any,
+        def apply(
+            self,
+            ctx: bc_script.Ctx,
+            s: SaveFile,
+            cat_sets: selector.CatSets | None = None,
         ):
-            return super().__new__(cls)
+            from bc_script import selector
 
-        def apply(self, s: SaveFile):
-            edit = bc_script.ctx.edit
+            edit = ctx.edit
             if edit is None:
                 return
 
             if self.ids is None:
                 return
 
-            if self.ids == "all":
-                cats = s.cats.get_all_cats()
-            elif self.ids == "unlocked":
-                cats = s.cats.get_unlocked_cats()
-            elif self.ids == "non_unlocked":
-                cats = s.cats.get_non_unlocked_cats()
-            elif self.ids == "obtainable":
-                cats = s.cats.get_cats_obtainable(s) or []
-            elif self.ids == "non_obtainable":
-                cats = s.cats.get_cats_non_obtainable(s) or []
-            else:
-                if not isinstance(self.ids, list):
-                    ids = [self.ids]
-                else:
-                    ids = self.ids
-
-                cats: list[bcsfe.core.Cat] = []
-
-                for id in ids:
-                    id = str(id)
-                    if id.isdigit():
-                        cat = s.cats.get_cat_by_id(int(id))
-                        if cat is not None:
-                            cats.append(cat)
-                    elif id.startswith("rarity-"):
-                        rarity = int(id.split("-")[1])
-                        cats.extend(s.cats.get_cats_rarity(s, rarity))
-                    elif id.startswith("banner-"):
-                        banner = int(id.split("-")[1])
-                        cats.extend(s.cats.get_cats_gatya_banner(s, banner) or [])
-                    else:
-                        bc_script.logger.add_error(f"Invalid cat id: {id}")
+            if cat_sets is None:
+                cat_sets = selector.CatSets(s)
+
+            cat_selector = selector.get_selector(self.ids)
+            for error in cat_selector.errors:
+                ctx.logger.add_error(error)
+            try:
+                cats = cat_sets.to_cats(cat_selector.select(cat_sets))
+            except selector.MissingGameDataError as e:
+                ctx.logger.add_error(f"{e}, no cats were selected for ids: {self.ids}")
+                return
 
-            self.set_cats(s, cats)
+            self.set_cats(ctx, s, cats)
 
-        def set_cats(self, s: SaveFile, cats: list[bcsfe.core.Cat]):
-            self.set_cat_forms(s, cats)
+        def set_cats(self, ctx: bc_script.Ctx, s: SaveFile, cats: list[bcsfe.core.Cat]):
+            # bcsfe sets the forms of many cats at once, so the changes to each
+            # cat are found from its state before and after it is edited
+            states = None
+            if ctx.changes.enabled:
+                states = [self.get_state(cat) for cat in cats]
+
+            self.set_cat_forms(ctx, s, cats)
 
             for cat in cats:
                 if self.unlock is not None:
                     cat.unlock(s) if self.unlock else cat.reset()
-                    bc_script.logger.add_info(
-                        f"{'Unlocked' if self.unlock else 'Removed'} cat: {cat.id}"
-                    )
 
-                self.upgrade_cat(cat, s)
+                self.upgrade_cat(ctx, cat, s)
 
                 if self.claim_cat_guide is not None:
                     cat.catguide_collected = self.claim_cat_guide
-                    bc_script.logger.add_info(
-                        f"{'Claimed' if self.claim_cat_guide else 'Removed'} cat guide for cat: {cat.id}"
-                    )
+
+            if self.unlock is not None:
+                ctx.logger.add_info(
+                    "{} {} cats", "Unlocked" if self.unlock else "Removed", len(cats)
+                )
+            if self.claim_cat_guide is not None:
+                ctx.logger.add_info(
+                    "{} cat guide for {} cats",
+                    "Claimed" if self.claim_cat_guide else "Removed",
+                    len(cats),
+                )
 
             if self.talents is not None:
-                self.talents.apply(s, cats)
+                with ctx.tracer.span("edit.cats.cat.talents", cats=len(cats)):
+                    self.talents.apply(ctx, s, cats)
+
+            if states is not None:
+                for cat, state in zip(cats, states):
+                    ctx.changes.add_state_changes(
+                        "cats", cat.id, state, self.get_state(cat)
+                    )
 
-        def set_cat_forms(self, s: SaveFile, cats: list[bcsfe.core.Cat]):
+            ctx.logger.flush_counts()
+
+        @staticmethod
+        def get_state(cat: bcsfe.core.Cat) -> dict[str, Any]:
+            return {
+                "unlocked": cat.unlocked,
+                "gatya_seen": cat.gatya_seen,
+                "current_form": cat.current_form,
+                "unlocked_forms": cat.unlocked_forms,
+                "fourth_form": cat.fourth_form,
+                "catguide_collected": cat.catguide_collected,
+                "upgrade_base": cat.upgrade.base,
+                "upgrade_plus": cat.upgrade.plus,
+                "talents": {talent.id: talent.level for talent in cat.talents or []},
+            }
+
+        def set_cat_forms(
+            self, ctx: bc_script.Ctx, s: SaveFile, cats: list[bcsfe.core.Cat]
+        ):
             if self.true_form is not None:
                 if self.true_form:
                     s.cats.true_form_cats(
                         s, cats, self.force_forms, self.set_current_forms
                     )
-                    bc_script.logger.add_info("Set true form for cats")
+                    ctx.logger.add_info("Set true form for cats")
                 else:
                     for cat in cats:
                         cat.remove_true_form()
-                        bc_script.logger.add_info(
-                            f"Removed true form for cat: {cat.id}"
-                        )
+                    ctx.logger.add_info("Removed true form for {} cats", len(cats))
 
             if self.ultra_form is not None:
                 if self.ultra_form:
                     s.cats.fourth_form_cats(
                         s, cats, self.force_forms, self.set_current_forms
                     )
-                    bc_script.logger.add_info("Set ultra form for cats")
+                    ctx.logger.add_info("Set ultra form for cats")
                 else:
                     for cat in cats:
                         cat.remove_fourth_form()
-                        bc_script.logger.add_info(
-                            f"Removed ultra form for cat: {cat.id}"
-                        )
+                    ctx.logger.add_info("Removed ultra form for {} cats", len(cats))
+
+        def upgrade_cat(self, ctx: bc_script.Ctx, cat: bcsfe.core.Cat, s: SaveFile):
+            import bcsfe
 
-        def upgrade_cat(self, cat: bcsfe.core.Cat, s: SaveFile):
             if self.upgrade is not None:
                 if len(self.upgrade) != 2:
-                    bc_script.logger.add_error(f"Invalid upgrade data: {self.upgrade}")
+                    ctx.logger.add_error(f"Invalid upgrade data: {self.upgrade}")
 
-                upgrade_base = self.get_base(cat, s, self.upgrade[0])
-                upgrade_plus = self.get_plus(cat, s, self.upgrade[1])
+                upgrade_base = self.get_base(ctx, cat, s, self.upgrade[0])
+                upgrade_plus = self.get_plus(ctx, cat, s, self.upgrade[1])
 
                 if upgrade_base is None or upgrade_plus is None:
                     return
 
                 upgrade = bcsfe.core.Upgrade(plus=upgrade_plus, base=upgrade_base - 1)
                 cat.set_upgrade(s, upgrade)
-                bc_script.logger.add_info(
-                    f"Set upgrade for cat: {cat.id} to {upgrade.base+1}+{upgrade.plus}"
-                )
+                ctx.logger.add_count("Set upgrade for {} cats")
 
             if self.upgrade_base is not None:
-                upgrade_base = self.get_base(cat, s, self.upgrade_base)
+                upgrade_base = self.get_base(ctx, cat, s, self.upgrade_base)
                 if upgrade_base is None:
                     return
                 upgrade = cat.upgrade
                 upgrade.base = upgrade_base - 1
                 cat.set_upgrade(s, upgrade)
-                bc_script.logger.add_info(
-                    f"Set upgrade base for cat: {cat.id} to {upgrade.base+1}"
-                )
+                ctx.logger.add_count("Set upgrade base for {} cats")
 
             if self.upgrade_plus is not None:
-                upgrade_plus = self.get_plus(cat, s, self.upgrade_plus)
+                upgrade_plus = self.get_plus(ctx, cat, s, self.upgrade_plus)
                 if upgrade_plus is None:
                     return
                 upgrade = cat.upgrade
                 upgrade.plus = upgrade_plus
                 cat.set_upgrade(s, upgrade)
-                bc_script.logger.add_info(
-                    f"Set upgrade plus for cat: {cat.id} to +{upgrade.plus}"
-                )
+                ctx.logger.add_count("Set upgrade plus for {} cats")
+
+        def get_base(
+            self, ctx: bc_script.Ctx, cat: bcsfe.core.Cat, s: SaveFile, level: str | int
+        ):
+            import bcsfe
 
-        def get_base(self, cat: bcsfe.core.Cat, s: SaveFile, level: str | int):
             powerup = bcsfe.core.PowerUpHelper(cat, s)
 
             if isinstance(level, str) and not str(level).isdigit():
                 if level == "max":
                     upgrade_base = powerup.get_max_possible_base()
                 else:
-                    bc_script.logger.add_error(f"Invalid upgrade base: {level}")
+                    ctx.logger.add_error(f"Invalid upgrade base: {level}")
                     return None
             else:
                 upgrade_base = int(level)
 
             return upgrade_base
 
-        def get_plus(self, cat: bcsfe.core.Cat, s: SaveFile, level: str | int):
+        def get_plus(
+            self, ctx: bc_script.Ctx, cat: bcsfe.core.Cat, s: SaveFile, level: str | int
+        ):
+            import bcsfe
+
             powerup = bcsfe.core.PowerUpHelper(cat, s)
 
             if isinstance(level, str) and not str(level).isdigit():
                 if level == "max":
                     upgrade_plus = powerup.get_max_possible_plus()
                 else:
-                    bc_script.logger.add_error(f"Invalid upgrade plus: {level}")
+                    ctx.logger.add_error(f"Invalid upgrade plus: {level}")
                     return None
             else:
                 upgrade_plus = int(level)
@@ -232,32 +244,29 @@ class Cats(BaseParser):
             talents: dict[str, str | int] | None = None
             keep_existing: bool = True
 
-            @typechecked
-            def __new__(
-                cls,
-                talents: dict[str, str | int] | None = None,
-                keep_existing: bool = True,
-                **kwargs: typing.Any,
+            def apply(
+                self, ctx: bc_script.Ctx, s: SaveFile, cats: list[bcsfe.core.Cat]
             ):
-                return super().__new__(cls)
+                from bc_script import game_data
 
-            def apply(self, s: SaveFile, cats: list[bcsfe.core.Cat]):
-                edit = bc_script.ctx.edit
+                edit = ctx.edit
                 if edit is None:
                     return
 
                 if self.talents is None:
                     return
 
-                talent_data = s.cats.read_talent_data(s)
-                if talent_data is None:
-                    bc_script.logger.add_warning("Failed to read talent data")
+                tables = game_data.get_talent_tables(s)
+                if tables is None:
+                    ctx.logger.add_warning("Failed to read talent data")
                     return
 
+                all_level, levels = self.get_levels(ctx)
+
                 for cat in cats:
                     if cat.talents is None:
                         if len(cats) < 20:  # Only log if there are few cats
-                            bc_script.logger.add_warning(
+                            ctx.logger.add_warning(
                                 f"Failed to read talents for cat: {cat.id}"
                             )
                         continue
@@ -266,61 +275,77 @@ class Cats(BaseParser):
                         for talent in cat.talents:
                             talent.level = 0
 
-                    cat_talent_data = talent_data.get_cat_talents(cat)
-                    if cat_talent_data is None:
-                        bc_script.logger.add_warning(
+                    table = tables.get(cat.id)
+                    if table is None:
+                        ctx.logger.add_warning(
                             f"Failed to read talent data for cat: {cat.id}"
                         )
                         continue
 
-                    talent_names, max_levels, _, ids = cat_talent_data
-
-                    talent_ids: list[tuple[int, str]] = []
-
-                    for talent_id, level in self.talents.items():
-                        if talent_id == "all":
-                            talent_ids = [(i, str(level)) for i in range(len(ids))]
-                            break
-                        if not talent_id.isdigit():
-                            bc_script.logger.add_error(
-                                f"Invalid talent id: {talent_id}"
-                            )
-                            continue
-                        talent_ids.append((int(talent_id), str(level)))
-
-                    for talent_id, level in talent_ids:
-                        id = ids[talent_id]
-                        name = talent_names[talent_id]
-                        max_level = max_levels[talent_id]
-                        talent = cat.get_talent_from_id(id)
-                        if talent is None:
-                            bc_script.logger.add_warning(
-                                f"Failed to find talent with id: {talent_id}"
-                            )
-                            continue
-
-                        if max_level == 0:
-                            max_level = 1
-
-                        if level == "max":
-                            lv = max_level
-                        else:
-                            if not level.isdigit():
-                                bc_script.logger.add_error(
-                                    f"Invalid talent level: {level}"
+                    # talent ids in scripts are indexes into the talents that
+                    # the cat has in the save
+                    cat_talents = {talent.id: talent for talent in cat.talents}
+                    talents = [
+                        (info, cat_talents[info.ability_id])
+                        for info in table
+                        if info.ability_id in cat_talents
+                    ]
+
+                    if all_level is not None:
+                        targets = [(i, all_level) for i in range(len(talents))]
+                    else:
+                        targets = levels
+
+                    updated = 0
+                    for talent_id, level in targets:
+                        if talent_id >= len(talents):
+                            if len(cats) < 20:
+                                ctx.logger.add_warning(
+                                    f"Failed to find talent with id: {talent_id}"
                                 )
-                                continue
-                            lv = int(level)
+                            continue
+                        info, talent = talents[talent_id]
 
-                        if lv > max_level:
-                            bc_script.logger.add_warning(
-                                f"Talent level exceeds max level: {name} ({lv} > {max_level})"
+                        lv = info.max_level if level == "max" else level
+                        if lv > info.max_level:
+                            ctx.logger.add_warning(
+                                f"Talent level exceeds max level: {info.name} ({lv} > {info.max_level})"
                             )
 
                         talent.level = lv
+                        updated += 1
 
-                        bc_script.logger.add_info(
-                            f"Set talent level for cat: {cat.id} talent: {name} to {lv}"
-                        )
+                    if updated:
+                        ctx.logger.add_count("Set {} talent levels", updated)
+
+            def get_levels(
+                self, ctx: bc_script.Ctx
+            ) -> tuple[str | int | None, list[tuple[int, str | int]]]:
+                # the levels are checked once for every cat. returns the level
+                # of every talent if "all" is used, else the levels by id
+                levels: list[tuple[int, str | int]] = []
+                if self.talents is None:
+                    return None, levels
+
+                for talent_id, level in self.talents.items():
+                    lv = self.get_level(ctx, level)
+                    if talent_id == "all":
+                        return lv, []
+                    if not talent_id.isdigit():
+                        ctx.logger.add_error(f"Invalid talent id: {talent_id}")
+                        continue
+                    if lv is not None:
+                        levels.append((int(talent_id), lv))
+                return None, levels
+
+            @staticmethod
+            def get_level(ctx: bc_script.Ctx, level: str | int) -> str | int | None:
+                level = str(level)
+                if level == "max":
+                    return level
+                if not level.isdigit():
+                    ctx.logger.add_error(f"Invalid talent level: {level}")
+                    return None
+                return int(level)
 
     list_cls = CatEdit
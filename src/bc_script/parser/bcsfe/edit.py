@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 import dataclasses
-import typing
+from typing import TYPE_CHECKING
 
-
-from bcsfe.core import BackupMetaData, ManagedItem, ManagedItemType, SaveFile
+if TYPE_CHECKING:
+    from bcsfe.core import ManagedItemType, SaveFile
 
 import bc_script
 from bc_script.parser.parse import BaseParser
@@ -12,9 +12,9 @@ from bc_script.parser.bcsfe.basic_items import BasicItems
 from bc_script.parser.bcsfe.cats import Cats
 from bc_script.parser.bcsfe.special_skills import SpecialSkills
 
-import bcsfe
-
-from typeguard import typechecked
+# the values of bcsfe's ManagedItemType, so that parsing a script doesn't need
+# to import bcsfe
+DEFAULT_MANAGED_ITEMS = ["catfood", "rareticket", "platinumticket", "legendticket"]
 
 
 @dataclasses.dataclass
@@ -27,43 +27,37 @@ class Edit(BaseParser):
     special_skills: bc_script.parser.bcsfe.special_skills.SpecialSkills | None = None
 
     managed_items: list[str] | None = dataclasses.field(
-        default_factory=lambda: [s.value.lower() for s in ManagedItemType]
+        default_factory=lambda: list(DEFAULT_MANAGED_ITEMS)
     )
 
     forced_locale: str | None = None
 
-    @typechecked
-    def __new__(
-        cls,
-        managed_items: list[str] | None = None,
-        forced_locale: str | None = None,
-        **kwargs: typing.Any,
-    ):
-        return super().__new__(cls)
-
-    def apply(self, s: SaveFile):
-        bc_script.logger.add_info("Applying edit")
+    def apply(self, ctx: bc_script.Ctx, s: SaveFile):
+        ctx.logger.add_info("Applying edit")
+        ctx.locale.forced_locale = self.forced_locale
         if self.forced_locale is not None:
-            bcsfe.core.core_data.config.config[
-                bcsfe.core.ConfigKey.FORCE_LANG_GAME_DATA
-            ] = True
-            bcsfe.core.core_data.config.config[bcsfe.core.ConfigKey.LOCALE] = (
-                self.forced_locale
-            )
-            bc_script.logger.add_info(f"Forcing locale: {self.forced_locale}")
-        if self.basic_items is not None:
-            self.basic_items.apply(s)
-        if self.cats is not None:
-            self.cats.apply(s)
-        if self.special_skills is not None:
-            self.special_skills.apply(s)
+            ctx.logger.add_info(f"Forcing locale: {self.forced_locale}")
+        with ctx.locale.apply():
+            if self.basic_items is not None:
+                with ctx.tracer.span("edit.basic_items"):
+                    self.basic_items.apply(ctx, s)
+            if self.cats is not None:
+                with ctx.tracer.span("edit.cats"):
+                    self.cats.apply(ctx, s)
+            if self.special_skills is not None:
+                with ctx.tracer.span("edit.special_skills"):
+                    self.special_skills.apply(ctx, s)
+
+    def add_managed_item(
+        self, ctx: bc_script.Ctx, s: SaveFile, change: int, type: ManagedItemType
+    ):
+        from bcsfe.core import BackupMetaData, ManagedItem
 
-    def add_managed_item(self, s: SaveFile, change: int, type: ManagedItemType):
-        if self.managed_items is None:
+        if self.managed_items is None or change == 0:
             return
         if type.value.lower() in self.managed_items:
             item = ManagedItem.from_change(change, type)
-            bc_script.logger.add_info(f"Adding managed item: {item}")
+            ctx.logger.add_info(f"Adding managed item: {item}")
             BackupMetaData(s).add_managed_item(item)
 
     subclasses = [
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 import dataclasses
-import typing
+from typing import TYPE_CHECKING
 
-from bcsfe.core import CountryCode, GameVersion, Path, SaveFile, ServerHandler, JsonFile
+if TYPE_CHECKING:
+    import bcsfe
+    from bcsfe.core import CountryCode, Path, SaveFile
 
 import bc_script
+from bc_script import adb, json_file, output
 from bc_script.parser.parse import BaseParser
 
-from typeguard import typechecked
-
 
 @dataclasses.dataclass
 class Load(BaseParser):
@@ -24,33 +25,33 @@ class Load(BaseParser):
     adb: Adb | None = None
     json: Json | None = None
 
-    @typechecked
-    def __new__(
-        cls,
-        country_code: str | None = None,
-        path: str | None = None,
-        **kwargs: typing.Any,
-    ):
-        return super().__new__(cls)
-
-    def load(self) -> SaveFile | None:
-        bc_script.logger.add_info(f"Loading save file")
+    def load(self, ctx: bc_script.Ctx) -> SaveFile | None:
+        ctx.logger.add_info(f"Loading save file")
+        tracer = ctx.tracer
         if self.file is not None:
-            return self.file.load()
+            with tracer.span("load.file"):
+                return self.file.load(ctx)
         if self.transfer is not None:
-            return self.transfer.load()
+            with tracer.span("load.transfer"):
+                return self.transfer.load(ctx)
         if self.adb is not None:
-            return self.adb.load()
+            with tracer.span("load.adb"):
+                return self.adb.load(ctx)
         if self.json is not None:
-            return self.json.load()
+            with tracer.span("load.json"):
+                return self.json.load(ctx)
         return None
 
     def get_cc(self) -> CountryCode | None:
+        from bcsfe.core import CountryCode
+
         if self.country_code is None:
             return None
         return CountryCode.from_code(self.country_code)
 
     def get_path(self) -> Path | None:
+        from bcsfe.core import Path
+
         if self.path is None:
             return None
 
@@ -60,14 +61,18 @@ class Load(BaseParser):
     class File(BaseParser):
         dict_key: str = "file"
 
-        def load(self) -> SaveFile | None:
-            load = bc_script.ctx.load
+        def load(self, ctx: bc_script.Ctx) -> SaveFile | None:
+            from bcsfe.core import SaveFile
+
+            load = ctx.load
             if load is None:
                 return None
             path = load.get_path()
             if path is None:
                 return None
-            save_file = SaveFile(path.read())
+            data = path.read()
+            output.set_input(ctx, data, ("file", str(path)))
+            save_file = SaveFile(data)
             return save_file
 
     @dataclasses.dataclass
@@ -76,14 +81,9 @@ class Load(BaseParser):
         confirmation_code: str = dataclasses.field(kw_only=True)
         dict_key: str = "transfer"
 
-        @typechecked
-        def __new__(
-            cls, transfer_code: str, confirmation_code: str, **kwargs: typing.Any
-        ):
-            return super().__new__(cls)
+        def load(self, ctx: bc_script.Ctx) -> SaveFile | None:
+            from bcsfe.core import GameVersion, ServerHandler
 
-        def load(self) -> SaveFile | None:
-            ctx = bc_script.ctx
             if ctx.load is None:
                 return None
             cc = ctx.load.get_cc()
@@ -91,19 +91,19 @@ class Load(BaseParser):
                 return None
 
             gv = GameVersion.from_string("12.2.0")
-            bc_script.logger.add_info(
+            ctx.logger.add_info(
                 f"Dowloading save file with codes: {self.transfer_code}, {self.confirmation_code}"
             )
             server_handler, res = ServerHandler.from_codes(
                 self.transfer_code, self.confirmation_code, cc, gv
             )
             if res is not None or server_handler is None:
-                bc_script.logger.add_error(
+                ctx.logger.add_error(
                     f"Failed to download save. Transfer codes / country code is probably incorrect"
                 )
 
                 return None
-            bc_script.logger.add_info("Save file downloaded")
+            ctx.logger.add_info("Save file downloaded")
             return server_handler.save_file
 
     @dataclasses.dataclass
@@ -112,65 +112,90 @@ class Load(BaseParser):
         device: str | None = None
         package_name: str | None = None
 
-        @typechecked
-        def __new__(
-            cls,
-            device: str | None = None,
-            package_name: str | None = None,
-            **kwargs: typing.Any,
-        ):
-            return super().__new__(cls)
-
-        def load(self) -> SaveFile | None:
-            ctx = bc_script.ctx
+        def load(self, ctx: bc_script.Ctx) -> SaveFile | None:
+            from bcsfe.core import Data, SaveFile
+
             load = ctx.load
             if load is None:
                 return
 
-            adb_handler = bc_script.setup_adb(self.device, self.package_name)
+            adb_handler = bc_script.setup_adb(ctx, self.device, self.package_name)
             if adb_handler is None:
                 return
+            device = adb_handler.get_device()
+            package_name = adb_handler.get_package_name()
 
-            bc_script.logger.add_info("Pulling save file from device")
-            path, res = adb_handler.save_locally(load.get_path())
-
-            if path is None:
-                bc_script.logger.add_error(res.result)
-                return None
-
-            save_file = SaveFile(path.read(), package_name=self.package_name)
+            data = self.get_cached_save(ctx, adb_handler)
+            if data is not None:
+                ctx.logger.add_info(
+                    "Save file on the device is unchanged, skipped pulling it"
+                )
+                path = load.get_path()
+                if path is not None:
+                    output.write_file(ctx, str(path), data)
+            else:
+                ctx.logger.add_info("Pulling save file from device")
+                path, res = adb_handler.save_locally(load.get_path())
+
+                if path is None:
+                    ctx.logger.add_error(res.result)
+                    ctx.adb.forget(device)
+                    return None
+
+                data = path.read().to_bytes()
+                ctx.adb.saves.put(device, package_name, data)
+                ctx.logger.add_info("Save file pulled from device")
+
+            output.set_input(ctx, Data(data), ("adb", device, package_name))
+            save_file = SaveFile(Data(data), package_name=self.package_name)
             save_file.used_storage = True
 
-            bc_script.logger.add_info("Save file pulled from device")
-
             return save_file
 
+        @staticmethod
+        def get_cached_save(
+            ctx: bc_script.Ctx, adb_handler: bcsfe.core.AdbHandler
+        ) -> bytes | None:
+            # the save last pulled from or pushed to the device, if it still has it
+            device = adb_handler.get_device()
+            package_name = adb_handler.get_package_name()
+            data = ctx.adb.saves.get(device, package_name)
+            # only ask the device when there's a save to compare it to
+            if data is None:
+                return None
+            if adb.get_save_hash(adb_handler) != output.get_hash(data):
+                return None
+            return data
+
     @dataclasses.dataclass
     class Json(BaseParser):
         dict_key: str = "json"
         path: str = dataclasses.field(kw_only=True)
 
-        @typechecked
-        def __new__(cls, path: str, **kwargs: typing.Any):
-            return super().__new__(cls)
+        def load(self, ctx: bc_script.Ctx) -> SaveFile | None:
+            from bcsfe.core import Path, SaveFile
 
-        def load(self) -> SaveFile | None:
-            load = bc_script.ctx.load
+            load = ctx.load
             if load is None:
                 return None
             save_path = load.get_path()
 
             json_path = Path(self.path)
             if not json_path.exists():
-                bc_script.logger.add_error(f"Json file not found: {json_path}")
+                ctx.logger.add_error(f"Json file not found: {json_path}")
                 return None
 
-            json = JsonFile.from_path(json_path)
+            try:
+                json_data = json_file.read(str(json_path))
+            except (OSError, ValueError) as e:
+                ctx.logger.add_error(f"Failed to read json file: {json_path}: {e}")
+                return None
 
-            save_file = SaveFile.from_dict(json.to_object())
+            save_file = SaveFile.from_dict(json_data)
             if save_path is not None:
                 save_file.save_path = save_path
-                save_file.to_file(save_path)
+                if not ctx.dry_run:
+                    output.write_save(ctx, save_file, save_path)
 
-            bc_script.logger.add_info(f"Loaded save file from json: {json_path}")
+            ctx.logger.add_info(f"Loaded save file from json: {json_path}")
             return save_file
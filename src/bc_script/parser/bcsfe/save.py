@@ -1,14 +1,20 @@
 from __future__ import annotations
 
+import concurrent.futures
 import dataclasses
-import typing
+import traceback
+from typing import TYPE_CHECKING, Any, Callable
 
-from bcsfe.core import BackupMetaData, Path, SaveFile, ServerHandler, JsonFile
+if TYPE_CHECKING:
+    from bcsfe.core import Path, SaveFile
 
 import bc_script
+from bc_script import adb, json_file, output
 from bc_script.parser.parse import BaseParser
 
-from typeguard import typechecked
+# the name of a sink, the path it writes, the function that saves to it and
+# the arguments after ctx
+Sink = tuple[str, "Path | None", Callable[..., Any], tuple[Any, ...]]
 
 
 @dataclasses.dataclass
@@ -23,157 +29,288 @@ class Save(BaseParser):
     adb: Adb | None = None
     json: Json | None = None
 
-    @typechecked
-    def __new__(
-        cls,
-        path: str | None = None,
-        upload_managed_items: bool = True,
-        **kwargs: typing.Any,
-    ):
-        return super().__new__(cls)
-
-    def save(self, s: SaveFile):
-        bc_script.logger.add_info("Saving save file")
-        self.check_managed_items(s)
-        if self.file is not None:
-            self.file.save(s)
+    def save(self, ctx: bc_script.Ctx, s: SaveFile):
+        ctx.logger.add_info("Saving save file")
+        tracer = ctx.tracer
+        with tracer.span("save.check_managed_items"):
+            self.check_managed_items(ctx, s)
+
+        data: bytes | None = None
+        write_file = self.file is not None
         if self.transfer is not None:
-            self.transfer.save(s)
-        if self.adb is not None:
-            self.adb.save(s)
+            with tracer.span("save.serialize"):
+                data = s.to_data().to_bytes()
+            if output.is_unchanged(ctx, data):
+                ctx.logger.add_info("Save file is unchanged, skipped uploading it")
+            # uploading changes the save, e.g its tokens, so the other sinks
+            # have to wait for it to get the uploaded save
+            elif self.run_sink(ctx, "transfer", self.transfer.save, s):
+                write_file = True
+                data = None
+
+        sinks: list[Sink] = []
+        save_path = self.get_save_path(s)
+        if write_file or self.adb is not None:
+            # serialized once and shared by every sink that writes the save
+            if data is None:
+                with tracer.span("save.serialize"):
+                    data = s.to_data().to_bytes()
+            if write_file:
+                sinks.append(("file", save_path, self.write, (s, data)))
+            if self.adb is not None:
+                sinks.append(("adb", save_path, self.adb.save, (s, data)))
         if self.json is not None:
-            self.json.save(s)
+            sinks.append(("json", self.json.get_path(ctx), self.json.save, (s,)))
+        self.run_sinks(ctx, sinks)
+
+    def run_sinks(self, ctx: bc_script.Ctx, sinks: list[Sink]):
+        # sinks that write different paths don't depend on each other, so e.g
+        # a save can be pushed to a device while the json is written. sinks
+        # that write the same path run one after another in the order given,
+        # so e.g the json can't replace the file before it's pushed
+        groups: dict[Any, list[Sink]] = {}
+        for sink in sinks:
+            path = sink[1]
+            key = str(path) if path is not None else object()
+            groups.setdefault(key, []).append(sink)
+
+        if len(groups) <= 1:
+            for group in groups.values():
+                self.run_group(ctx, group)
+            return
+        with concurrent.futures.ThreadPoolExecutor(len(groups)) as executor:
+            futures = [
+                executor.submit(self.run_group, ctx, group) for group in groups.values()
+            ]
+        for future in futures:
+            future.result()
+
+    def run_group(self, ctx: bc_script.Ctx, sinks: list[Sink]):
+        for name, _, func, args in sinks:
+            self.run_sink(ctx, name, func, *args)
+
+    @staticmethod
+    def run_sink(
+        ctx: bc_script.Ctx, name: str, func: Callable[..., Any], *args: Any
+    ) -> Any:
+        # an error in one sink shouldn't stop the others from saving
+        with ctx.tracer.span(f"save.{name}"):
+            try:
+                return func(ctx, *args)
+            except Exception as e:
+                error = "".join(traceback.format_exception_only(type(e), e)).strip()
+                ctx.logger.add_error(f"Failed to save to {name}: {error}")
+                return None
+
+    def write(self, ctx: bc_script.Ctx, s: SaveFile, data: bytes):
+        path = self.get_save_path(s)
+        if path is None:
+            return
+        ctx.logger.add_info(f"Saving to: {path}")
+        output.write_file(ctx, str(path), data)
+
+    def check_managed_items(self, ctx: bc_script.Ctx, s: SaveFile):
+        from bcsfe.core import BackupMetaData, ServerHandler
 
-    def check_managed_items(self, s: SaveFile):
         if not self.upload_managed_items:
             return
         managed_items = BackupMetaData(s).get_managed_items()
         if not managed_items:
             return
 
-        bc_script.logger.add_info("Uploading managed items")
+        ctx.logger.add_info("Uploading managed items")
         server_handler = ServerHandler(s, print=False)
         if not server_handler.upload_meta_data():
-            bc_script.logger.add_warning("Failed to upload managed items")
+            ctx.logger.add_warning("Failed to upload managed items")
 
     def get_path(self) -> Path | None:
+        from bcsfe.core import Path
+
         if self.path is None:
             return None
         return Path(self.path)
 
+    def get_save_path(self, s: SaveFile) -> Path | None:
+        path = self.get_path()
+        if path is None:
+            path = s.save_path
+        return path
+
     @dataclasses.dataclass
     class File(BaseParser):
         dict_key: str = "file"
 
-        def save(self, s: SaveFile):
-            sv = bc_script.ctx.save
-            if sv is None:
-                return
-            path = sv.get_path()
-            if path is None:
-                path = s.save_path
-            if path is None:
-                return
-
-            bc_script.logger.add_info(f"Saving to: {path}")
-
-            s.to_file(path)
-
     @dataclasses.dataclass
     class Transfer(BaseParser):
         dict_key: str = "transfer"
 
-        def save(self, s: SaveFile):
-            sv = bc_script.ctx.save
+        def save(self, ctx: bc_script.Ctx, s: SaveFile) -> bool:
+            # returns whether the save was uploaded, which changes the save
+            from bcsfe.core import ServerHandler
+
+            sv = ctx.save
             if sv is None:
-                return
+                return False
 
-            bc_script.logger.add_info("Uploading save file to server")
+            ctx.logger.add_info("Uploading save file to server")
             codes = ServerHandler(s, print=False).get_codes(sv.upload_managed_items)
             if codes is None:
-                return
-
-            path = sv.get_path()
-            if path is None:
-                path = s.save_path
-            if path is None:
-                return
-            s.to_file(path)
+                return False
 
             print(f"Transfer Code: {codes[0]}")
             print(f"Confirmation Code: {codes[1]}")
+            return True
 
     @dataclasses.dataclass
     class Adb(BaseParser):
         dict_key: str = "adb"
         rerun: bool = False
-        device: str | None = None
+        # a device id, a list of them or "all" for every connected device
+        device: str | list[str] | None = None
         package_name: str | None = None
-
-        @typechecked
-        def __new__(
-            cls,
-            rerun: bool = False,
-            device: str | None = None,
-            package_name: str | None = None,
-            **kwargs: typing.Any,
-        ):
-            return super().__new__(cls)
-
-        def save(self, s: SaveFile):
-            ctx = bc_script.ctx
+        # how many devices are pushed to at the same time
+        jobs: int = 4
+
+        def get_devices(self, ctx: bc_script.Ctx) -> list[str | None]:
+            if self.device is None:
+                return [None]
+            if isinstance(self.device, list):
+                return list(dict.fromkeys(self.device))
+            if self.device != "all":
+                return [self.device]
+            devices = ctx.adb.get_devices()
+            if not devices:
+                ctx.logger.add_error("There are no devices connected with adb")
+            return list(devices)
+
+        def save(self, ctx: bc_script.Ctx, s: SaveFile, data: bytes):
             save = ctx.save
             if save is None:
                 return
-
-            adb_handler = bc_script.setup_adb(self.device, self.package_name, s)
-            if adb_handler is None:
-                return
-
-            path = save.get_path()
-            if path is None:
-                path = s.save_path
+            path = save.get_save_path(s)
             if path is None:
                 return
 
-            s.to_file(path)
+            devices = self.get_devices(ctx)
+            if len(devices) <= 1:
+                for device in devices:
+                    self.save_to_device(ctx, s, data, path, device)
+                return
 
-            bc_script.logger.add_info("Pushing save file to device")
+            # the save was edited and serialized once, only the pushes and
+            # reruns are done for each device
+            jobs = max(1, min(self.jobs, len(devices)))
+            with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+                results = list(
+                    executor.map(
+                        lambda device: self.save_to_device(ctx, s, data, path, device),
+                        devices,
+                    )
+                )
+            pushed = sum(results)
+            ctx.logger.add_info(
+                "Pushed save file to {}/{} devices", pushed, len(devices)
+            )
+
+        def save_to_device(
+            self,
+            ctx: bc_script.Ctx,
+            s: SaveFile,
+            data: bytes,
+            path: Path,
+            device: str | None,
+        ) -> bool:
+            # errors are logged with the device id. returns whether the device
+            # has the save
+            with ctx.tracer.span("save.adb.device", device=device):
+                try:
+                    return self.push(ctx, s, data, path, device)
+                except Exception as e:
+                    error = "".join(traceback.format_exception_only(type(e), e)).strip()
+                    ctx.logger.add_error(f"{device}: Failed to push save file: {error}")
+                    if device is not None:
+                        ctx.adb.forget(device)
+                    return False
+
+        def push(
+            self,
+            ctx: bc_script.Ctx,
+            s: SaveFile,
+            data: bytes,
+            path: Path,
+            device: str | None,
+        ) -> bool:
+            adb_handler = bc_script.setup_adb(ctx, device, self.package_name, s)
+            if adb_handler is None:
+                return False
+            device = adb_handler.get_device()
+
+            package_name = adb_handler.get_package_name()
+            source = ("adb", device, package_name)
+            if output.is_unchanged(ctx, data, source):
+                ctx.logger.add_info(
+                    f"{device}: Save file is unchanged, skipped pushing it to the device"
+                )
+                return True
+            # the device is only asked for its save's hash if the save was the
+            # last one pulled from or pushed to it
+            if ctx.adb.saves.get(device, package_name) == data and (
+                adb.get_save_hash(adb_handler) == output.get_hash(data)
+            ):
+                ctx.logger.add_info(
+                    f"{device}: Device already has the save file, skipped pushing it"
+                )
+                return True
+
+            # the file sink may be writing the same path, write_file waits
+            # for it and skips the write if it's done
+            output.write_file(ctx, str(path), data)
+
+            ctx.logger.add_info(f"{device}: Pushing save file to device")
 
             result = adb_handler.load_battlecats_save(path)
             if not result.success:
-                bc_script.logger.add_error(result.result)
+                ctx.logger.add_error(f"{device}: {result.result}")
+                ctx.adb.forget(device)
+                return False
+            ctx.adb.saves.put(device, package_name, data)
 
-            bc_script.logger.add_info("Save file pushed to device")
+            ctx.logger.add_info(f"{device}: Save file pushed to device")
 
             if self.rerun:
-                bc_script.logger.add_info("Rerunning game")
-                adb_handler.rerun_game()
-                bc_script.logger.add_info("Game rerun")
+                ctx.logger.add_info(f"{device}: Rerunning game")
+                result = adb_handler.rerun_game()
+                if not result.success:
+                    ctx.logger.add_error(
+                        f"{device}: Failed to rerun game: {result.result}"
+                    )
+                else:
+                    ctx.logger.add_info(f"{device}: Game rerun")
+            return True
 
     @dataclasses.dataclass
     class Json(BaseParser):
         dict_key: str = "json"
         path: str | None = None
 
-        @typechecked
-        def __new__(cls, path: str | None = None, **kwargs: typing.Any):
-            return super().__new__(cls)
+        def get_path(self, ctx: bc_script.Ctx) -> Path | None:
+            from bcsfe.core import Path
 
-        def save(self, s: SaveFile):
-            sv = bc_script.ctx.save
+            if self.path is not None:
+                return Path(self.path)
+            sv = ctx.save
             if sv is None:
-                return
-            path = self.path
-            if path is None:
-                path = sv.get_path()
-            else:
-                path = Path(path)
+                return None
+            return sv.get_path()
+
+        def save(self, ctx: bc_script.Ctx, s: SaveFile):
+            path = self.get_path(ctx)
             if path is None:
                 return
 
-            bc_script.logger.add_info(f"Saving to: {path}")
+            ctx.logger.add_info(f"Saving to: {path}")
 
-            json_data = s.to_dict()
-            json = JsonFile.from_object(json_data)
-            json.to_file(path)
+            try:
+                json_file.write(ctx, str(path), s.to_dict())
+            except ValueError as e:
+                ctx.logger.add_error(f"Failed to save json file: {e}")
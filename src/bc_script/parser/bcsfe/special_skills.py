@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import dataclasses
-import typing
+from typing import TYPE_CHECKING
 
-
-from bcsfe.core import SaveFile
-import bcsfe
+if TYPE_CHECKING:
+    import bcsfe
+    from bcsfe.core import SaveFile
 
 import bc_script
 from bc_script.parser.parse import BaseParser
 
-from typeguard import typechecked
+
+@dataclasses.dataclass
+class UpgradeStep:
+    base: str | int | None
+    plus: str | int | None
+    message: str
 
 
 @dataclasses.dataclass
@@ -19,14 +24,19 @@ class SpecialSkills(BaseParser):
 
     special_skills: list[SpecialSkill] | None = None
 
-    def apply(self, s: SaveFile):
-        edit = bc_script.ctx.edit
+    def apply(self, ctx: bc_script.Ctx, s: SaveFile):
+        edit = ctx.edit
         if edit is None:
             return
 
         if self.special_skills is not None:
-            for special_skill in self.special_skills:
-                special_skill.apply(s)
+            for i, special_skill in enumerate(self.special_skills):
+                with ctx.tracer.span(
+                    "edit.special_skills.special_skill",
+                    index=i,
+                    ids=special_skill.ids,
+                ):
+                    special_skill.apply(ctx, s)
 
         s.max_rank_up_sale()
 
@@ -39,19 +49,10 @@ class SpecialSkills(BaseParser):
         upgrade_base: int | str | None = None
         upgrade_plus: int | str | None = None
 
-        @typechecked
-        def __new__(
-            cls,
-            ids: list[int | str] | None | str = None,
-            upgrade: list[int | str] | None = None,
-            upgrade_base: int | str | None = None,
-            upgrade_plus: int | str | None = None,
-            **kwargs: typing.Any,
-        ):
-            return super().__new__(cls)
+        def apply(self, ctx: bc_script.Ctx, s: SaveFile):
+            from bc_script import game_data
 
-        def apply(self, s: SaveFile):
-            edit = bc_script.ctx.edit
+            edit = ctx.edit
             if edit is None:
                 return
 
@@ -66,93 +67,101 @@ class SpecialSkills(BaseParser):
             else:
                 for id in self.ids:
                     if not str(id).isdigit():
-                        bc_script.logger.add_error(f"Invalid special skill id: {id}")
+                        ctx.logger.add_error(f"Invalid special skill id: {id}")
                         continue
 
                     skill = s.special_skills.get_from_id(int(id))
                     if skill is not None:
                         skills.append((int(id), skill))
                     else:
-                        bc_script.logger.add_error(f"Special skill not found: {id}")
+                        ctx.logger.add_error(f"Special skill not found: {id}")
 
-            for id, skill in skills:
-                self.upgrade_skill(id, skill, s)
-
-        def upgrade_skill(self, id: int, skill: bcsfe.core.SpecialSkill, s: SaveFile):
-            if self.upgrade is not None:
-                if len(self.upgrade) != 2:
-                    bc_script.logger.add_error(f"Invalid upgrade data: {self.upgrade}")
-
-                upgrade_base = self.get_base(id, s, self.upgrade[0])
-                upgrade_plus = self.get_plus(id, s, self.upgrade[1])
+            steps = self.get_steps(ctx)
+            if not skills or not steps:
+                return
 
-                if upgrade_base is None or upgrade_plus is None:
-                    return
+            ability_data = game_data.get_ability_data(s)
+            if ability_data is None:
+                ctx.logger.add_warning("Failed to read ability data")
+                return
 
-                upgrade = bcsfe.core.Upgrade(plus=upgrade_plus, base=upgrade_base - 1)
-                skill.set_upgrade(upgrade)
-                bc_script.logger.add_info(
-                    f"Set upgrade for skill: {id} to {upgrade.base+1}+{upgrade.plus}"
+            for id, skill in skills:
+                if id >= len(ability_data):
+                    continue
+                base, plus = skill.upgrade.base, skill.upgrade.plus
+                self.upgrade_skill(ctx, skill, ability_data[id], steps)
+                ctx.changes.add(
+                    "special_skills.upgrade_base", base, skill.upgrade.base, id
                 )
-
-            if self.upgrade_base is not None:
-                upgrade_base = self.get_base(id, s, self.upgrade_base)
-                if upgrade_base is None:
-                    return
-                upgrade = skill.upgrade
-                upgrade.base = upgrade_base - 1
-                skill.set_upgrade(upgrade)
-                bc_script.logger.add_info(
-                    f"Set upgrade base for skill: {id} to {upgrade.base+1}"
+                ctx.changes.add(
+                    "special_skills.upgrade_plus", plus, skill.upgrade.plus, id
                 )
 
-            if self.upgrade_plus is not None:
-                upgrade_plus = self.get_plus(id, s, self.upgrade_plus)
-                if upgrade_plus is None:
-                    return
-                upgrade = skill.upgrade
-                upgrade.plus = upgrade_plus
-                skill.set_upgrade(upgrade)
-                bc_script.logger.add_info(
-                    f"Set upgrade plus for skill: {id} to +{upgrade.plus}"
-                )
+            ctx.logger.flush_counts()
 
-        def get_base(self, id: int, s: SaveFile, level: str | int):
-            ability_data = bcsfe.core.core_data.get_ability_data(s)
-            if ability_data.ability_data is None:
-                return
-            ability = ability_data.get_ability_data_item(id)
-            if ability is None:
-                return
+        def get_steps(self, ctx: bc_script.Ctx) -> list[UpgradeStep]:
+            # the levels are the same for every skill, so they are only
+            # checked once. a step with an invalid level stops the steps after
+            # it from being applied
+            steps: list[UpgradeStep] = []
+            if self.upgrade is not None:
+                if len(self.upgrade) != 2:
+                    ctx.logger.add_error(f"Invalid upgrade data: {self.upgrade}")
+                    return steps
+                base = self.get_level(ctx, self.upgrade[0], "base")
+                plus = self.get_level(ctx, self.upgrade[1], "plus")
+                if base is None or plus is None:
+                    return steps
+                steps.append(UpgradeStep(base, plus, "Set upgrade"))
 
-            if isinstance(level, str) and not str(level).isdigit():
-                if level == "max":
-                    upgrade_base = ability.max_base_level
-                else:
-                    bc_script.logger.add_error(f"Invalid upgrade base: {level}")
-                    return None
-            else:
-                upgrade_base = int(level)
+            if self.upgrade_base is not None:
+                base = self.get_level(ctx, self.upgrade_base, "base")
+                if base is None:
+                    return steps
+                steps.append(UpgradeStep(base, None, "Set upgrade base"))
 
-            return upgrade_base
+            if self.upgrade_plus is not None:
+                plus = self.get_level(ctx, self.upgrade_plus, "plus")
+                if plus is None:
+                    return steps
+                steps.append(UpgradeStep(None, plus, "Set upgrade plus"))
 
-        def get_plus(self, id: int, s: SaveFile, level: str | int):
-            ability_data = bcsfe.core.core_data.get_ability_data(s)
-            if ability_data.ability_data is None:
-                return
-            ability = ability_data.get_ability_data_item(id)
-            if ability is None:
-                return
+            return steps
 
+        @staticmethod
+        def get_level(
+            ctx: bc_script.Ctx, level: str | int, name: str
+        ) -> str | int | None:
             if isinstance(level, str) and not str(level).isdigit():
                 if level == "max":
-                    upgrade_plus = ability.max_plus_level
-                else:
-                    bc_script.logger.add_error(f"Invalid upgrade plus: {level}")
-                    return None
-            else:
-                upgrade_plus = int(level)
-
-            return upgrade_plus
+                    return level
+                ctx.logger.add_error(f"Invalid upgrade {name}: {level}")
+                return None
+            return int(level)
+
+        def upgrade_skill(
+            self,
+            ctx: bc_script.Ctx,
+            skill: bcsfe.core.SpecialSkill,
+            ability: bcsfe.core.AbilityDataItem,
+            steps: list[UpgradeStep],
+        ):
+            import bcsfe
+
+            base = skill.upgrade.base
+            plus = skill.upgrade.plus
+            for step in steps:
+                if step.base is not None:
+                    level = ability.max_base_level if step.base == "max" else step.base
+                    # bcsfe doesn't change the base if it is -1, i.e level 0
+                    if level != 0:
+                        base = level - 1
+                if step.plus is not None:
+                    level = ability.max_plus_level if step.plus == "max" else step.plus
+                    if level != -1:
+                        plus = level
+                ctx.logger.add_count(step.message + " for {} special skills")
+
+            skill.set_upgrade(bcsfe.core.Upgrade(plus=plus, base=base))
 
     list_cls = SpecialSkill
@@ -2,40 +2,48 @@ from __future__ import annotations
 
 import dataclasses
 import inspect
-from typing import Any, Callable, TypeVar
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
 
-import bcsfe
-import typeguard
+if TYPE_CHECKING:
+    import bcsfe
 
 import bc_script
+from bc_script import output
+from bc_script.parser import validate
 
 
-def parse(data: dict[str, Any]):
-    ctx = bc_script.ctx
-    pkg = bc_script.parser.pkg.Pkg.from_dict(data)
+def parse(data: dict[str, Any], ctx: bc_script.Ctx | None = None):
+    if ctx is None:
+        ctx = bc_script.Ctx()
+    pkg = bc_script.parser.pkg.Pkg.from_dict(ctx, data)
     if pkg is None:
-        bc_script.logger.add_error("Failed to load pkg")
+        ctx.logger.add_error("Failed to load pkg")
         return
     ctx.pkg = pkg
-    info = bc_script.parser.info.Info.from_dict(data)
+    info = bc_script.parser.info.Info.from_dict(ctx, data)
     if info is None:
-        bc_script.logger.add_error("Failed to load info")
+        ctx.logger.add_error("Failed to load info")
         return
     ctx.info = info
 
     if pkg.schema == "bcsfe":
-        load = bc_script.parser.bcsfe.load.Load.from_dict(data)
+        load = bc_script.parser.bcsfe.load.Load.from_dict(ctx, data)
         ctx.load = load
-        edit = bc_script.parser.bcsfe.edit.Edit.from_dict(data)
+        edit = bc_script.parser.bcsfe.edit.Edit.from_dict(ctx, data)
         ctx.edit = edit
-        save = bc_script.parser.bcsfe.save.Save.from_dict(data)
+        save = bc_script.parser.bcsfe.save.Save.from_dict(ctx, data)
         ctx.save = save
 
     return ctx
 
 
-def load_save(path: bcsfe.core.Path):
-    save = bcsfe.core.SaveFile(path.read())
+def load_save(path: bcsfe.core.Path, ctx: bc_script.Ctx | None = None):
+    import bcsfe
+
+    data = path.read()
+    if ctx is not None:
+        output.set_input(ctx, data, ("file", str(path)))
+    save = bcsfe.core.SaveFile(data)
     return save
 
 
@@ -43,32 +51,52 @@ def do(
     script_data: dict[str, Any],
     in_path: bcsfe.core.Path | None,
     out_path: bcsfe.core.Path | None,
+    ctx: bc_script.Ctx | None = None,
 ):
-    ctx = parse(script_data)
+    ctx = parse(script_data, ctx)
     if ctx is None:
         return
 
+    run(ctx, in_path, out_path)
+
+
+def run(
+    ctx: bc_script.Ctx,
+    in_path: bcsfe.core.Path | None,
+    out_path: bcsfe.core.Path | None,
+):
+    tracer = ctx.tracer
+    ctx.input_hash = None
+    ctx.input_source = None
     if in_path is not None:
-        save = load_save(in_path)
+        with tracer.span("load", path=str(in_path)):
+            save = load_save(in_path, ctx)
     else:
         if ctx.load is None:
-            bc_script.logger.add_error("Failed to load any save file")
+            ctx.logger.add_error("Failed to load any save file")
             return
-        sv = ctx.load.load()
+        with tracer.span("load"):
+            sv = ctx.load.load(ctx)
         if sv is None:
-            bc_script.logger.add_error("Failed to load any save file")
+            ctx.logger.add_error("Failed to load any save file")
             return
         save = sv
     if ctx.edit is not None:
-        ctx.edit.apply(save)
+        with tracer.span("edit"):
+            ctx.edit.apply(ctx, save)
+
+    if ctx.dry_run:
+        return
 
     save_action = ctx.save
     if save_action is None:
         if out_path is None:
             return
-        save.to_file(out_path)
+        with tracer.span("save", path=str(out_path)):
+            output.write_save(ctx, save, out_path)
     else:
-        save_action.save(save)
+        with tracer.span("save"):
+            save_action.save(ctx, save)
 
 
 @dataclasses.dataclass
@@ -86,45 +114,39 @@ class BaseParser:
     )
 
     @classmethod
-    def from_dict(cls: type[C], data: dict[str, dict[str, Any]]) -> C | None:
+    def from_dict(
+        cls: type[C], ctx: bc_script.Ctx, data: dict[str, dict[str, Any]]
+    ) -> C | None:
         dt: dict[str, Any] | list[dict[str, Any]] | None = data.get(cls.dict_key)
         if dt is None:
             if cls.warn_on_not_found:
-                bc_script.logger.add_warning(
-                    f"{cls.dict_key} key was not found in script"
-                )
+                ctx.logger.add_warning(f"{cls.dict_key} key was not found in script")
             if cls.error_on_not_found:
-                bc_script.logger.add_error(
-                    f"{cls.dict_key} key was not found in script"
-                )
+                ctx.logger.add_error(f"{cls.dict_key} key was not found in script")
             dt = {}
 
-        args = list(cls.__dataclass_fields__.keys())
-
-        for key in BaseParser.__dataclass_fields__.keys():
-            args.remove(key)
-
-        inner_classes = cls.get_inner_classes()
+        meta = cls.get_meta()
+        args = meta.args
 
         if isinstance(dt, list):
             if cls.list_cls is None:
                 raise ValueError("list_cls must be set for list types")
             new_data_ls: list[Any] = []
+            list_key = cls.list_cls.dict_key
+            inner = meta.inner_classes.get(list_key)
             for d in dt:
-                inner = inner_classes.get(cls.list_cls.dict_key)
                 if inner is not None:
-                    clazz = inner.from_dict({cls.list_cls.dict_key: d})  # type: ignore
+                    clazz = inner.from_dict(ctx, {list_key: d})  # type: ignore
                     value = clazz
                 else:
                     for key, value in d.items():  # type: ignore
-                        if key not in args:
-                            if inner is None:
-                                bc_script.logger.add_warning(
-                                    f"`{key}` is not a valid key for `{cls.__name__}`! Valid keys are: `{args}`"
-                                )
-                        else:
+                        if key not in meta.arg_set:
+                            ctx.logger.add_warning(
+                                f"`{key}` is not a valid key for `{cls.__name__}`! Valid keys are: `{args}`"
+                            )
+                        elif InputField.has_input(value):
                             value = InputField(
-                                key, value, cls.__dataclass_fields__[key].type  # type: ignore
+                                ctx, key, value, meta.field_types[key]
                             ).value
                             d[key] = value
                     value = cls.list_cls(**d)  # type: ignore
@@ -134,36 +156,74 @@ class BaseParser:
 
             try:
                 c = cls(**kwargs)  # type: ignore
-            except typeguard.TypeCheckError as e:
-                bc_script.logger.add_error(
-                    f"Failed to create {cls.__name__} with error: {e}"
-                )
+            except validate.TypeCheckError as e:
+                ctx.logger.add_error(f"Failed to create {cls.__name__} with error: {e}")
                 return None
             return c
 
         new_data: dict[str, Any] = {}
         for key, value in dt.items():
-            inner = inner_classes.get(key)
+            inner = meta.inner_classes.get(key)
             if inner is not None:
-                clazz = inner.from_dict(dt)
+                clazz = inner.from_dict(ctx, dt)
                 value = clazz
-            if key not in args:
+            if key not in meta.arg_set:
                 if inner is None:
-                    bc_script.logger.add_warning(
+                    ctx.logger.add_warning(
                         f"`{key}` is not a valid key for `{cls.__name__}`! Valid keys are: `{args}`"
                     )
             else:
-                value = InputField(key, value, cls.__dataclass_fields__[key].type).value
+                if InputField.has_input(value):
+                    value = InputField(ctx, key, value, meta.field_types[key]).value
                 new_data[key] = value
 
         try:
             return cls(**new_data)
-        except typeguard.TypeCheckError as e:
-            bc_script.logger.add_error(
-                f"Failed to create {cls.__name__} with error: {e}"
-            )
+        except validate.TypeCheckError as e:
+            ctx.logger.add_error(f"Failed to create {cls.__name__} with error: {e}")
             return None
 
+    @classmethod
+    def get_meta(cls) -> ParserMeta:
+        # the fields and inner classes of a parser never change after the
+        # class is defined, so only work them out once per class
+        meta = meta_cache.get(cls)
+        if meta is None:
+            args = [
+                key
+                for key in cls.__dataclass_fields__.keys()
+                if key not in BaseParser.__dataclass_fields__
+            ]
+            field_types: dict[str, str] = {
+                key: cls.__dataclass_fields__[key].type for key in args  # type: ignore
+            }
+            meta = ParserMeta(
+                args=args,
+                arg_set=frozenset(args),
+                field_types=field_types,
+                inner_classes=cls.get_inner_classes(),
+                validators=validate.compile_validators(field_types),
+            )
+            meta_cache[cls] = meta
+        return meta
+
+    def __post_init__(self):
+        self.validate()
+
+    def validate(self):
+        validate.check_fields(self, self.get_meta().validators)
+
+    def validate_all(self):
+        self.validate()
+        for key in self.get_meta().args:
+            value = getattr(self, key)
+            if isinstance(value, BaseParser):
+                value.validate_all()
+            elif isinstance(value, list):
+                for item in value:  # type: ignore
+                    if isinstance(item, BaseParser):
+                        item.validate_all()
+
     @classmethod
     def get_inner_classes(cls):
         classes = {
@@ -175,8 +235,38 @@ class BaseParser:
         return classes
 
 
+@dataclasses.dataclass(frozen=True)
+class ParserMeta:
+    args: list[str]
+    arg_set: frozenset[str]
+    field_types: dict[str, str]
+    inner_classes: dict[str, type[BaseParser]]
+    validators: dict[str, validate.Checker]
+
+
+meta_cache: dict[type[BaseParser], ParserMeta] = {}
+
+
 class InputField:
-    def __init__(self, name: str, value: Any, type_str: str):
+    @staticmethod
+    def has_input(value: Any) -> bool:
+        if isinstance(value, str):
+            return value.startswith("__input__")
+        if isinstance(value, list):
+            return any(
+                isinstance(val, str) and val.startswith("__input__")
+                for val in value  # type: ignore
+            )
+        if isinstance(value, dict):
+            return any(
+                (isinstance(key, str) and key.startswith("__input__"))
+                or (isinstance(val, str) and val.startswith("__input__"))
+                for key, val in value.items()  # type: ignore
+            )
+        return False
+
+    def __init__(self, ctx: bc_script.Ctx, name: str, value: Any, type_str: str):
+        self.ctx = ctx
         self.name = name
 
         if isinstance(value, dict):
@@ -249,6 +339,11 @@ class InputField:
         input_str, ty, can_be_none = self.get_input_prompt(
             name, type_str, sub_type, key
         )
+        if not self.ctx.interactive:
+            # use a value of the right type so the rest of the script can
+            # still be checked
+            self.ctx.logger.add_info(f"`{name}` is read from input")
+            return None if can_be_none else ty("0")
         val = input(input_str)
         value = None
         if val or not can_be_none:
@@ -256,7 +351,7 @@ class InputField:
                 value = ty(val)
             except ValueError:
                 value = None
-                bc_script.logger.add_error(
+                self.ctx.logger.add_error(
                     f"Invalid input for type: `{type_str}` for `{name}`"
                 )
 
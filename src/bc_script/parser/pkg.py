@@ -1,10 +1,8 @@
 from __future__ import annotations
 
 import dataclasses
-import typing
 
 from bc_script.parser.parse import BaseParser
-from typeguard import typechecked
 
 
 @dataclasses.dataclass
@@ -14,9 +12,3 @@ class Pkg(BaseParser):
 
     schema: str = "bcsfe"
     version: str = "3.0.0"
-
-    @typechecked
-    def __new__(
-        cls, schema: str = "bcsfe", version: str = "3.0.0", **kwargs: typing.Any
-    ):
-        return super().__new__(cls)
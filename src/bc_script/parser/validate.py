@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+Checker = Callable[[Any], "str | None"]
+
+
+class TypeCheckError(Exception):
+    pass
+
+
+class UnsupportedTypeError(Exception):
+    pass
+
+
+SIMPLE_TYPES: dict[str, type] = {
+    "int": int,
+    "str": str,
+    "bool": bool,
+    "float": float,
+}
+
+
+def split_top_level(type_str: str, sep: str) -> list[str]:
+    parts: list[str] = []
+    depth = 0
+    current = ""
+    for char in type_str:
+        if char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        if char == sep and depth == 0:
+            parts.append(current.strip())
+            current = ""
+        else:
+            current += char
+    parts.append(current.strip())
+    return parts
+
+
+def compile_simple(name: str, typ: type) -> Checker:
+    reason = f"is not an instance of {name}"
+
+    def check(value: Any) -> str | None:
+        if isinstance(value, typ):
+            return None
+        return reason
+
+    return check
+
+
+def check_none(value: Any) -> str | None:
+    if value is None:
+        return None
+    return "is not an instance of NoneType"
+
+
+def check_any(value: Any) -> str | None:
+    return None
+
+
+def compile_list(item_check: Checker) -> Checker:
+    def check(value: Any) -> str | None:
+        if not isinstance(value, list):
+            return "is not a list"
+        for i, item in enumerate(value):  # type: ignore
+            reason = item_check(item)
+            if reason is not None:
+                return f"item {i} {reason}"
+        return None
+
+    return check
+
+
+def compile_dict(key_check: Checker, value_check: Checker) -> Checker:
+    def check(value: Any) -> str | None:
+        if not isinstance(value, dict):
+            return "is not a dict"
+        for key, val in value.items():  # type: ignore
+            reason = key_check(key)
+            if reason is not None:
+                return f"key {key!r} {reason}"
+            reason = value_check(val)
+            if reason is not None:
+                return f"value of key {key!r} {reason}"
+        return None
+
+    return check
+
+
+def compile_union(names: list[str], checks: list[Checker]) -> Checker:
+    def check(value: Any) -> str | None:
+        reasons: list[str] = []
+        for name, type_check in zip(names, checks):
+            reason = type_check(value)
+            if reason is None:
+                return None
+            reasons.append(f"{name}: {reason}".replace("\n", "\n  "))
+        return "did not match any element in the union:\n  " + "\n  ".join(reasons)
+
+    return check
+
+
+def compile_term(term: str) -> Checker:
+    if term == "None":
+        return check_none
+    if term in ("Any", "typing.Any"):
+        return check_any
+    if term in SIMPLE_TYPES:
+        return compile_simple(term, SIMPLE_TYPES[term])
+
+    if term.endswith("]") and "[" in term:
+        outer, inner = term[:-1].split("[", 1)
+        args = split_top_level(inner, ",")
+        if outer == "list" and len(args) == 1:
+            return compile_list(compile_type(args[0]))
+        if outer == "dict" and len(args) == 2:
+            return compile_dict(compile_type(args[0]), compile_type(args[1]))
+
+    raise UnsupportedTypeError(term)
+
+
+def compile_type(type_str: str) -> Checker:
+    terms = split_top_level(type_str, "|")
+    if len(terms) == 1:
+        return compile_term(terms[0])
+    names = ["NoneType" if term == "None" else term for term in terms]
+    return compile_union(names, [compile_term(term) for term in terms])
+
+
+def compile_validators(field_types: dict[str, str]) -> dict[str, Checker]:
+    # fields with types that aren't supported, e.g other parser classes, are
+    # not validated
+    validators: dict[str, Checker] = {}
+    for name, type_str in field_types.items():
+        try:
+            validators[name] = compile_type(type_str)
+        except UnsupportedTypeError:
+            continue
+    return validators
+
+
+def check_fields(obj: Any, validators: dict[str, Checker]):
+    for name, check in validators.items():
+        value = getattr(obj, name)
+        reason = check(value)
+        if reason is not None:
+            raise TypeCheckError(f'argument "{name}" ({type(value).__name__}) {reason}')
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import sys
+from typing import Any
+
+import bcsfe
+import toml
+
+from bc_script import game_data
+
+
+def get_required_files(scripts: list[dict[str, Any]]) -> list[str]:
+    features: set[str] = set()
+    # with no scripts, every file bc_script can use is needed
+    if not scripts:
+        features.update(game_data.GAME_DATA_FILES)
+    for script_data in scripts:
+        features.update(game_data.get_script_features(script_data))
+    files: list[str] = []
+    for feature in features:
+        for file in game_data.GAME_DATA_FILES[feature]:
+            if file not in files:
+                files.append(file)
+    return sorted(files)
+
+
+def get_script_locales(scripts: list[dict[str, Any]]) -> list[str]:
+    locales: list[str] = []
+    for script_data in scripts:
+        edit = script_data.get("edit")
+        locale = edit.get("forced_locale") if isinstance(edit, dict) else None
+        if locale is None:
+            load = script_data.get("load")
+            locale = load.get("country_code") if isinstance(load, dict) else None
+        if isinstance(locale, str) and locale not in locales:
+            locales.append(locale)
+    return locales
+
+
+# bcsfe keeps the game data of each game version in its own folder
+def prefetch_locale(locale: str, files: list[str]) -> dict[str, Any]:
+    gdg = bcsfe.core.GameDataGetter(bcsfe.core.CountryCode.from_code(locale))
+    if gdg.latest_version is None:
+        return {"locale": locale, "error": "Failed to get the latest game version"}
+
+    packs: dict[str, list[str]] = {}
+    for file in files:
+        pack_name, _, file_name = file.partition("/")
+        packs.setdefault(pack_name, []).append(file_name)
+
+    downloaded: list[str] = []
+    failed: list[str] = []
+    for pack_name, file_names in packs.items():
+        results = gdg.download_all(pack_name, file_names, display_text=False)
+        for file_name, result in zip(file_names, results):
+            if result is None:
+                failed.append(f"{pack_name}/{file_name}")
+            else:
+                downloaded.append(f"{pack_name}/{file_name}")
+    return {
+        "locale": locale,
+        "version": gdg.latest_version,
+        "files": downloaded,
+        "failed": failed,
+    }
+
+
+def load_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="bc_script prefetch",
+        description="Download the game data needed by scripts so that they can be run with --offline",
+    )
+    parser.add_argument(
+        "scripts",
+        nargs="*",
+        default=[],
+        help="scripts to download game data for. defaults to all the game data bc_script uses",
+    )
+    parser.add_argument(
+        "--locale",
+        dest="locales",
+        action="append",
+        default=None,
+        help="locale to download game data for, e.g en or jp. can be given more than once. defaults to the locales of the scripts",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=4,
+        help="number of locales to download at once",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = load_args(argv)
+
+    scripts: list[dict[str, Any]] = []
+    for path in args.scripts:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                scripts.append(toml.load(f))
+        except (OSError, toml.TomlDecodeError) as e:
+            print(f"Failed to read script {path}: {e}", file=sys.stderr)
+            sys.exit(1)
+
+    locales = args.locales or get_script_locales(scripts) or ["en"]
+    files = get_required_files(scripts)
+
+    with concurrent.futures.ThreadPoolExecutor(max(args.jobs, 1)) as executor:
+        results = list(
+            executor.map(lambda locale: prefetch_locale(locale, files), locales)
+        )
+
+    index = game_data.read_index()
+    failed = False
+    for result in results:
+        locale = result["locale"]
+        error = result.get("error")
+        if error is None and result["failed"]:
+            error = f"Failed to download {', '.join(result['failed'])}"
+        if error is not None:
+            failed = True
+            print(f"{locale}: {error}", file=sys.stderr)
+        if not result.get("files"):
+            continue
+        entry = index.get(locale, {})
+        files_before = entry.get("files", [])
+        if entry.get("version") != result["version"]:
+            files_before = []
+        index[locale] = {
+            "version": result["version"],
+            "files": sorted(set(files_before) | set(result["files"])),
+        }
+        print(f"{locale}: {len(result['files'])} files for {result['version']}")
+    game_data.write_index(index)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import functools
+from typing import Callable
+
+import bcsfe
+
+from bc_script import game_data
+
+# a set of cats is stored as an int where bit i is set if cat i is in the set
+Bits = int
+
+
+class MissingGameDataError(Exception):
+    pass
+
+
+# the sets of cats in a save that selectors are evaluated over. sets from
+# game data are built once and shared by every `[[edit.cats]]` entry in a run,
+# but the unlocked cats are read every time as earlier entries can change them
+class CatSets:
+    def __init__(self, s: bcsfe.core.SaveFile):
+        self.s = s
+        self.cats = s.cats.get_all_cats()
+        self.all: Bits = 0
+        for cat in self.cats:
+            self.all |= 1 << cat.id
+        self.rarities: dict[int, Bits] | None = None
+        self.banners: dict[int, Bits] = {}
+        self.obtainable: Bits | None = None
+
+    @staticmethod
+    def from_ids(ids: list[int]) -> Bits:
+        bits = 0
+        for id in ids:
+            if id >= 0:
+                bits |= 1 << id
+        return bits
+
+    def get_unlocked(self) -> Bits:
+        bits = 0
+        for cat in self.cats:
+            if cat.unlocked:
+                bits |= 1 << cat.id
+        return bits
+
+    def get_rarity(self, rarity: int) -> Bits:
+        if self.rarities is None:
+            rarities = game_data.get_cat_rarities(self.s)
+            if rarities is None:
+                raise MissingGameDataError("Failed to load cat rarities")
+            self.rarities = {}
+            for id, cat_rarity in enumerate(rarities):
+                self.rarities[cat_rarity] = self.rarities.get(cat_rarity, 0) | (1 << id)
+        return self.rarities.get(rarity, 0) & self.all
+
+    def get_banner(self, banner: int) -> Bits:
+        bits = self.banners.get(banner)
+        if bits is None:
+            gatya_data_set = game_data.get_gatya_data_set(self.s)
+            if gatya_data_set is None:
+                raise MissingGameDataError("Failed to load gacha banners")
+            ids = gatya_data_set[banner] if 0 <= banner < len(gatya_data_set) else []
+            bits = self.from_ids(ids) & self.all
+            self.banners[banner] = bits
+        return bits
+
+    def get_obtainable(self) -> Bits:
+        if self.obtainable is None:
+            # a failed load isn't the same as no cats being obtainable, as
+            # `non_obtainable` would then select every cat
+            ids = game_data.get_obtainable_cat_ids(self.s)
+            if ids is None:
+                raise MissingGameDataError("Failed to load obtainable cats")
+            self.obtainable = self.from_ids(ids) & self.all
+        return self.obtainable
+
+    def to_cats(self, bits: Bits) -> list[bcsfe.core.Cat]:
+        return [cat for cat in self.cats if bits >> cat.id & 1]
+
+
+Term = Callable[[CatSets], Bits]
+
+
+# a compiled `ids` value of a `[[edit.cats]]` entry. each item is terms joined
+# with `|` and `&`, where `&` binds tighter and a term can be negated with `!`.
+# items are unioned, except items starting with `!` which are removed from the
+# result, or from all cats if every item starts with `!`
+class CatSelector:
+    KEYWORDS: dict[str, Term] = {
+        "all": lambda sets: sets.all,
+        "unlocked": lambda sets: sets.get_unlocked(),
+        "non_unlocked": lambda sets: sets.all & ~sets.get_unlocked(),
+        "obtainable": lambda sets: sets.get_obtainable(),
+        "non_obtainable": lambda sets: sets.all & ~sets.get_obtainable(),
+    }
+
+    def __init__(self, ids: tuple[int | str, ...]):
+        self.errors: list[str] = []
+        self.include: list[Term] = []
+        self.exclude: list[Term] = []
+        for item in ids:
+            item = str(item).strip()
+            if item.startswith("!"):
+                self.exclude.append(self.compile_expression(item[1:]))
+            else:
+                self.include.append(self.compile_expression(item))
+
+    def compile_expression(self, expression: str) -> Term:
+        union = [self.compile_intersection(part) for part in expression.split("|")]
+        if len(union) == 1:
+            return union[0]
+
+        def select_union(sets: CatSets) -> Bits:
+            bits = 0
+            for term in union:
+                bits |= term(sets)
+            return bits
+
+        return select_union
+
+    def compile_intersection(self, expression: str) -> Term:
+        intersection = [self.compile_term(part) for part in expression.split("&")]
+        if len(intersection) == 1:
+            return intersection[0]
+
+        def select_intersection(sets: CatSets) -> Bits:
+            bits = sets.all
+            for term in intersection:
+                bits &= term(sets)
+                if not bits:
+                    break
+            return bits
+
+        return select_intersection
+
+    def compile_term(self, term: str) -> Term:
+        term = term.strip()
+        if term.startswith("!"):
+            inner = self.compile_term(term[1:])
+            return lambda sets: sets.all & ~inner(sets)
+
+        keyword = self.KEYWORDS.get(term)
+        if keyword is not None:
+            return keyword
+
+        if term.isdigit():
+            return self.compile_range(int(term), int(term))
+
+        name, _, value = term.partition("-")
+        if name == "rarity" and value.isdigit():
+            rarity = int(value)
+            return lambda sets: sets.get_rarity(rarity)
+        if name == "banner" and value.isdigit():
+            banner = int(value)
+            return lambda sets: sets.get_banner(banner)
+        if name.isdigit() and value.isdigit() and int(name) <= int(value):
+            return self.compile_range(int(name), int(value))
+
+        self.errors.append(f"Invalid cat id: {term}")
+        return lambda sets: 0
+
+    @staticmethod
+    def compile_range(start: int, end: int) -> Term:
+        def select_range(sets: CatSets) -> Bits:
+            # ids past the last cat are clamped so huge ids don't make huge ints
+            stop = min(end + 1, sets.all.bit_length())
+            if start >= stop:
+                return 0
+            return ((1 << stop) - (1 << start)) & sets.all
+
+        return select_range
+
+    def select(self, sets: CatSets) -> Bits:
+        if self.include:
+            bits = 0
+            for term in self.include:
+                bits |= term(sets)
+        else:
+            bits = sets.all
+        for term in self.exclude:
+            if not bits:
+                break
+            bits &= ~term(sets)
+        return bits
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_selector(ids: tuple[int | str, ...]) -> CatSelector:
+    return CatSelector(ids)
+
+
+def get_selector(ids: list[int | str] | str | int) -> CatSelector:
+    if not isinstance(ids, list):
+        ids = [ids]
+    return compile_selector(tuple(ids))
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator
+
+import bc_script
+
+# the bcsfe functions that are counted when tracing. calls to these are where
+# bc_script spends time on io, the network and game data
+TRACED_FUNCTIONS: dict[str, list[str]] = {
+    "SaveFile": ["load", "to_data", "to_file", "to_dict", "from_dict"],
+    "GameDataGetter": [
+        "get_versions",
+        "get_file",
+        "download",
+        "download_all",
+        "save_file",
+    ],
+    "RequestHandler": ["get", "post"],
+    "ServerHandler": [
+        "from_codes",
+        "get_codes",
+        "upload_meta_data",
+        "get_auth_token",
+        "get_save_key",
+    ],
+    "AdbHandler": [
+        "get_connected_devices",
+        "get_battlecats_packages",
+        "pull_file",
+        "push_file",
+        "save_locally",
+        "load_battlecats_save",
+        "run_shell",
+        "rerun_game",
+    ],
+    "Cats": [
+        "read_talent_data",
+        "get_cats_rarity",
+        "get_cats_obtainable",
+        "get_cats_non_obtainable",
+        "get_cats_gatya_banner",
+        "true_form_cats",
+        "fourth_form_cats",
+    ],
+    "OrbInfoList": ["create"],
+    "PowerUpHelper": ["get_max_possible_base", "get_max_possible_plus"],
+    "CoreData": ["get_game_data_getter", "get_ability_data", "get_localizable"],
+}
+
+call_counts: dict[str, int] = {}
+counts_lock = threading.Lock()
+originals: list[tuple[type, str, Any]] = []
+
+
+def count_calls(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with counts_lock:
+            call_counts[name] = call_counts.get(name, 0) + 1
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument():
+    import bcsfe
+
+    if originals:
+        return
+    for cls_name, names in TRACED_FUNCTIONS.items():
+        cls = getattr(bcsfe.core, cls_name, None)
+        if cls is None:
+            continue
+        for name in names:
+            try:
+                attr = inspect.getattr_static(cls, name)
+            except AttributeError:
+                # not every bcsfe version has every function
+                continue
+            full_name = f"{cls_name}.{name}"
+            if isinstance(attr, staticmethod):
+                wrapped: Any = staticmethod(count_calls(full_name, attr.__func__))
+            elif isinstance(attr, classmethod):
+                wrapped = classmethod(count_calls(full_name, attr.__func__))
+            elif callable(attr):
+                wrapped = count_calls(full_name, attr)
+            else:
+                continue
+            originals.append((cls, name, cls.__dict__.get(name)))
+            setattr(cls, name, wrapped)
+
+
+def uninstrument():
+    while originals:
+        cls, name, original = originals.pop()
+        if original is None:
+            # the function was inherited, so remove the wrapper from the subclass
+            delattr(cls, name)
+        else:
+            setattr(cls, name, original)
+
+
+def get_call_counts() -> dict[str, int]:
+    with counts_lock:
+        return dict(call_counts)
+
+
+def reset_call_counts():
+    with counts_lock:
+        call_counts.clear()
+
+
+def add_call_counts(counts: dict[str, int]):
+    with counts_lock:
+        for name, count in counts.items():
+            call_counts[name] = call_counts.get(name, 0) + count
+
+
+# records spans as chrome trace events, which can be opened in
+# chrome://tracing or https://ui.perfetto.dev
+class Tracer:
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events: list[dict[str, Any]] = []
+        self.start = time.perf_counter()
+
+    def get_ts(self) -> float:
+        return (time.perf_counter() - self.start) * 1_000_000
+
+    @contextlib.contextmanager
+    def span(self, name: str, cat: str = "bc_script", **args: Any) -> Iterator[None]:
+        # disabled spans do nothing, so they can be left in hot code
+        if not self.enabled:
+            yield
+            return
+        counts_before = get_call_counts()
+        start = self.get_ts()
+        try:
+            yield
+        finally:
+            end = self.get_ts()
+            calls = {
+                key: count - counts_before.get(key, 0)
+                for key, count in get_call_counts().items()
+                if count != counts_before.get(key, 0)
+            }
+            if calls:
+                args["bcsfe_calls"] = calls
+            self.events.append(
+                {
+                    "name": name,
+                    "cat": cat,
+                    "ph": "X",
+                    "ts": start,
+                    "dur": end - start,
+                    "pid": os.getpid(),
+                    "tid": threading.get_ident(),
+                    "args": args,
+                }
+            )
+
+    # events recorded by a copy of this tracer, e.g in a batch worker
+    def add_events(self, events: list[dict[str, Any]]):
+        self.events.extend(events)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "traceEvents": sorted(self.events, key=lambda event: event["ts"]),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "bc_script_version": bc_script.__version__,
+                "bcsfe_version": get_package_version("bcsfe"),
+                "bcsfe_calls": get_call_counts(),
+            },
+        }
+
+    def to_file(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+
+def get_package_version(package: str) -> str | None:
+    from importlib import metadata
+
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
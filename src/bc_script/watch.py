@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import os
+import sys
+import time
+import traceback
+from typing import Any
+
+import toml
+
+import bc_script
+from bc_script import adb, log, output
+
+
+def get_mtime(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# the parsed sections of a script and the toml they were parsed from, so that
+# when the script changes only the sections whose toml changed are parsed again
+class ScriptState:
+    def __init__(self):
+        self.data: dict[str, Any] = {}
+        self.sections: dict[str, Any] = {}
+        # sections that had errors are parsed again, so the errors are shown
+        # on every run until they're fixed
+        self.stale: set[str] = set()
+
+    # returns the keys of the parsed sections, or None like parse.parse
+    def update(self, ctx: bc_script.Ctx, data: dict[str, Any]) -> list[str] | None:
+        from bc_script.parser import info, pkg
+        from bc_script.parser.bcsfe import edit, load, save
+
+        if data.get("pkg") != self.data.get("pkg"):
+            # the schema decides how the other sections are parsed
+            self.data.clear()
+            self.sections.clear()
+
+        parsed: list[str] = []
+        for cls in (pkg.Pkg, info.Info, load.Load, edit.Edit, save.Save):
+            key = cls.dict_key
+            section_data = data.get(key)
+            if (
+                key in self.sections
+                and key not in self.stale
+                and section_data == self.data.get(key)
+            ):
+                continue
+            parsed.append(key)
+            # parsing can replace `__input__` values in the data
+            self.data[key] = copy.deepcopy(section_data)
+            self.sections.pop(key, None)
+
+            schema = self.sections.get("pkg")
+            if key in ("load", "edit", "save") and (
+                schema is None or schema.schema != "bcsfe"
+            ):
+                self.sections[key] = None
+                continue
+
+            errors_before = len(ctx.logger.errors)
+            section = cls.from_dict(ctx, data)
+            if key in ("pkg", "info") and section is None:
+                ctx.logger.add_error(f"Failed to load {key}")
+                return None
+            if len(ctx.logger.errors) > errors_before:
+                self.stale.add(key)
+            else:
+                self.stale.discard(key)
+            self.sections[key] = section
+
+        ctx.pkg = self.sections.get("pkg")
+        ctx.info = self.sections.get("info")
+        ctx.load = self.sections.get("load")
+        ctx.edit = self.sections.get("edit")
+        ctx.save = self.sections.get("save")
+        return parsed
+
+
+# bc_script and bcsfe are imported, game data is loaded and adb is started
+# only once for every run
+class Watcher:
+    def __init__(
+        self,
+        script_path: str,
+        in_path: str | None,
+        out_path: str | None,
+        debug: bool = False,
+        fsync: str = "always",
+    ):
+        self.script_path = script_path
+        self.in_path = in_path
+        self.out_path = out_path
+        self.debug = debug
+        self.fsync = fsync
+        self.state = ScriptState()
+        self.adb = adb.AdbPool()
+        self.mtimes: dict[str, tuple[int, int] | None] = {}
+
+    def get_watched_paths(self) -> list[str]:
+        paths = [self.script_path]
+        if self.in_path is not None:
+            paths.append(self.in_path)
+            return paths
+        load = self.state.sections.get("load")
+        if load is None:
+            return paths
+        if load.file is not None and load.path is not None:
+            paths.append(load.path)
+        if load.json is not None:
+            paths.append(load.json.path)
+        return paths
+
+    def get_changed(self) -> list[str]:
+        return [
+            path
+            for path in self.get_watched_paths()
+            if get_mtime(path) != self.mtimes.get(path)
+        ]
+
+    def update_mtimes(self):
+        # taken after each run, so the run writing to a watched file, e.g
+        # the output save being the input save, doesn't start another run
+        self.mtimes = {path: get_mtime(path) for path in self.get_watched_paths()}
+
+    def run_once(self):
+        import bcsfe
+
+        start = time.perf_counter()
+        ctx = bc_script.Ctx(log.Log(show_info=self.debug))
+        ctx.fsync = self.fsync
+        ctx.adb = self.adb
+        parsed: list[str] | None = None
+        try:
+            with open(self.script_path, "r", encoding="utf-8") as f:
+                data = toml.load(f)
+            parsed = self.state.update(ctx, data)
+            if parsed is not None and self.out_path is not None and "save" not in data:
+                # an empty save section is still parsed, which would stop the
+                # save being written to -o
+                ctx.save = None
+            if parsed is not None:
+                in_path = self.in_path
+                out_path = self.out_path
+                bc_script.parser.parse.run(
+                    ctx,
+                    bcsfe.core.Path(in_path) if in_path is not None else None,
+                    bcsfe.core.Path(out_path) if out_path is not None else None,
+                )
+                output.sync_pending()
+        except (OSError, UnicodeDecodeError, toml.TomlDecodeError) as e:
+            ctx.logger.add_error(f"Failed to read script: {e}")
+        except Exception as e:
+            ctx.logger.add_error(
+                "".join(traceback.format_exception_only(type(e), e)).strip()
+            )
+
+        duration = (time.perf_counter() - start) * 1000
+        parsed_text = ", ".join(parsed) if parsed else "none"
+        print(f"Ran {self.script_path} in {duration:.1f}ms (parsed: {parsed_text})")
+        ctx.logger.print()
+
+    def run(self, interval: float):
+        self.run_once()
+        self.update_mtimes()
+        print(f"Watching {', '.join(self.get_watched_paths())} for changes")
+        while True:
+            time.sleep(interval)
+            if not self.get_changed():
+                continue
+            self.run_once()
+            self.update_mtimes()
+
+
+def load_args(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        prog="bc_script watch",
+        description="Run a script again whenever it or its input save changes",
+    )
+    parser.add_argument(
+        "script_path",
+        type=str,
+        help="path to the script .toml file",
+    )
+    parser.add_argument(
+        "-i",
+        dest="in_save_path",
+        default=None,
+        type=str,
+        help="path to the input save file. overrides the load section in the script",
+    )
+    parser.add_argument(
+        "-o",
+        dest="out_save_path",
+        default=None,
+        type=str,
+        help="path to the output save file. overrides the save section in the script",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.2,
+        help="seconds between checks for changes",
+    )
+    parser.add_argument(
+        "--offline",
+        dest="offline",
+        action="store_true",
+        help="only use game data downloaded with `bc_script prefetch`, never the network",
+    )
+    parser.add_argument(
+        "--fsync",
+        dest="fsync",
+        default="always",
+        choices=output.FSYNC_MODES,
+        help="when to flush written files to disk",
+    )
+    parser.add_argument(
+        "-d",
+        "--debug",
+        action="store_true",
+        help="show debug messages",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None):
+    args = load_args(argv)
+    if not os.path.exists(args.script_path):
+        print(f"File not found: {args.script_path}")
+        sys.exit(1)
+
+    if args.offline:
+        from bc_script import game_data
+
+        if not game_data.use_offline_cache():
+            print("No game data has been prefetched, run `bc_script prefetch` first")
+
+    watcher = Watcher(
+        args.script_path,
+        args.in_save_path,
+        args.out_save_path,
+        args.debug,
+        args.fsync,
+    )
+    try:
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
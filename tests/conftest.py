@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import textwrap
+import types
+
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / "cache"
+    monkeypatch.setenv("BC_SCRIPT_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def bcsfe_data():
+    # bcsfe only reads the locale of game data once its config is loaded
+    import bcsfe
+
+    if not hasattr(bcsfe.core.core_data, "config"):
+        bcsfe.core.core_data.init_data()
+
+
+@pytest.fixture
+def save_path(tmp_path):
+    from bc_script import bench
+
+    path = tmp_path / "SAVE_DATA"
+    path.write_bytes(bench.create_save(5).to_bytes())
+    return path
+
+
+def write_script(path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(text).lstrip(), encoding="utf-8")
+    return path
+
+
+def run_cli(*args: str, cwd) -> subprocess.CompletedProcess[str]:
+    # a fresh interpreter, so nothing the tests set up in bcsfe is reused
+    env = dict(os.environ)
+    env["PYTHONPATH"] = SRC_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return subprocess.run(
+        [sys.executable, "-m", "bc_script", *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+
+
+def create_orb(orb_id: int, effect: int, grade: int, attribute: int | None):
+    names = {0: "Attack Up", 1: "Defense Up"}
+    grades = {0: "D", 1: "C", 2: "S"}
+    attributes = {0: "Red", 1: "Floating", None: None}
+    raw = types.SimpleNamespace(
+        orb_id=orb_id, effect_id=effect, grade_id=grade, attribute_id=attribute
+    )
+    return types.SimpleNamespace(
+        raw_orb_info=raw,
+        effect=names[effect],
+        grade=grades[grade],
+        attribute=attributes[attribute],
+    )
@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import time
+import types
+
+import bcsfe
+
+import pytest
+
+import bc_script
+from bc_script import adb, log, output
+from bc_script.parser.bcsfe import load, save
+
+
+class FakeHandler:
+    def __init__(self, devices: dict[str, list[str]]):
+        self.devices = devices
+        self.device: str | None = None
+        self.package_name: str | None = None
+        self.calls: list[str] = []
+
+    def get_connected_devices(self) -> list[str]:
+        self.calls.append("devices")
+        return list(self.devices)
+
+    def set_device(self, device: str):
+        self.calls.append(f"root {device}")
+        self.device = device
+
+    def get_battlecats_packages(self) -> list[str]:
+        self.calls.append(f"packages {self.device}")
+        return self.devices[self.device]
+
+    def set_package_name(self, package_name: str):
+        self.package_name = package_name
+
+
+@pytest.fixture
+def handler():
+    return FakeHandler(
+        {"emulator-5554": ["jp.co.ponos.battlecatsen"], "192.168.0.2:5555": []}
+    )
+
+
+@pytest.fixture
+def pool(handler):
+    pool = adb.AdbPool()
+    pool.base = handler
+    return pool
+
+
+def test_discovery_cache(tmp_path, monkeypatch):
+    path = str(tmp_path / "adb.json")
+    cache = adb.DiscoveryCache(path, ttl=10)
+    assert cache.get("devices") is None
+    cache.put("devices", ["a"])
+    cache.put("packages:a", [])
+    assert cache.get("devices") == ["a"]
+    # empty results aren't cached
+    assert cache.get("packages:a") is None
+    # kept across runs
+    assert adb.DiscoveryCache(path, ttl=10).get("devices") == ["a"]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.get("devices") is None
+    assert adb.DiscoveryCache(path, ttl=10).get("devices") is None
+
+
+def test_discovery_cache_remove(tmp_path):
+    path = str(tmp_path / "adb.json")
+    cache = adb.DiscoveryCache(path)
+    cache.put("devices", ["a"])
+    cache.put("packages:a", ["jp"])
+    cache.remove("devices")
+    assert cache.get("devices") is None
+    assert adb.DiscoveryCache(path).get("devices") is None
+    assert adb.DiscoveryCache(path).get("packages:a") == ["jp"]
+
+
+def test_pool_shares_handlers(pool, handler):
+    assert pool.get_devices() == ["emulator-5554", "192.168.0.2:5555"]
+    assert pool.get_devices() == ["emulator-5554", "192.168.0.2:5555"]
+    assert pool.get_packages("emulator-5554") == ["jp.co.ponos.battlecatsen"]
+    assert pool.get_packages("192.168.0.2:5555") == []
+    assert pool.get_packages("192.168.0.2:5555") == []
+
+    first = pool.get("emulator-5554", "jp.co.ponos.battlecatsen")
+    assert first is pool.get("emulator-5554", "jp.co.ponos.battlecatsen")
+    assert (first.device, first.package_name) == (
+        "emulator-5554",
+        "jp.co.ponos.battlecatsen",
+    )
+    assert handler.calls == [
+        "devices",
+        "root emulator-5554",
+        "packages emulator-5554",
+        "root 192.168.0.2:5555",
+        "packages 192.168.0.2:5555",
+        "packages 192.168.0.2:5555",
+    ]
+
+    pool.forget("emulator-5554")
+    assert pool.get("emulator-5554", "jp.co.ponos.battlecatsen") is not first
+    pool.get_devices()
+    assert handler.calls[-2:] == ["root emulator-5554", "devices"]
+
+
+def test_setup_adb(pool, handler):
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    ctx.adb = pool
+    assert bc_script.setup_adb(ctx, None, None) is None
+    assert ctx.logger.errors[0].startswith("There are multiple devices found")
+
+    assert bc_script.setup_adb(ctx, "192.168.0.2:5555", None) is None
+    assert ctx.logger.errors[1] == "There are no game versions installed"
+
+    adb_handler = bc_script.setup_adb(ctx, "emulator-5554", None)
+    assert adb_handler.package_name == "jp.co.ponos.battlecatsen"
+
+
+def test_get_device_dir():
+    assert adb.get_device_dir("192.168.0.2:5555") == "192.168.0.2_5555"
+    assert adb.get_device_dir("emulator-5554") == "emulator-5554"
+
+
+class FakeDevice:
+    def __init__(self, device: str, success: bool = True):
+        self.device = device
+        self.success = success
+        self.pushed: list[bytes] = []
+        self.reruns = 0
+        self.hash_calls = 0
+        self.pulls = 0
+        # the save on the device
+        self.data: bytes | None = None
+        self.root = True
+
+    def get_device(self) -> str:
+        return self.device
+
+    def get_package_name(self) -> str:
+        return "jp.co.ponos.battlecatsen"
+
+    def load_battlecats_save(self, path):
+        if self.success:
+            self.pushed.append(path.read().to_bytes())
+            self.data = self.pushed[-1]
+        return types.SimpleNamespace(success=self.success, result="device offline")
+
+    def save_locally(self, path):
+        self.pulls += 1
+        path.write(bcsfe.core.Data(self.data))
+        return path, types.SimpleNamespace(success=True, result="")
+
+    def get_battlecats_save_path(self):
+        return bcsfe.core.Path("/data/data/jp.co.ponos.battlecatsen/files/SAVE_DATA")
+
+    def adb_root_success(self) -> bool:
+        return self.root
+
+    def run_shell(self, command: str):
+        self.hash_calls += 1
+        if self.data is None:
+            return types.SimpleNamespace(success=False, result="No such file")
+        path = command.split()[-1]
+        return types.SimpleNamespace(
+            success=True, result=f"{output.get_hash(self.data)}  {path}\n"
+        )
+
+    def run_root_shell(self, command: str):
+        return self.run_shell(command)
+
+    def rerun_game(self):
+        self.reruns += 1
+        return types.SimpleNamespace(success=True, result="")
+
+
+@pytest.fixture
+def devices(monkeypatch):
+    devices = {
+        name: FakeDevice(name, name != "offline") for name in ("a", "b", "offline")
+    }
+    monkeypatch.setattr(
+        bc_script,
+        "setup_adb",
+        lambda ctx, device, package_name, save=None: devices[device],
+    )
+    return devices
+
+
+def push(tmp_path, save_path, device, **kwargs) -> bc_script.Ctx:
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes()))
+    s.catfood = 10
+    sv = save.Save(
+        path=str(tmp_path / "out"),
+        upload_managed_items=False,
+        adb=save.Save.Adb(device=device, **kwargs),
+    )
+    ctx.save = sv
+    sv.save(ctx, s)
+    return ctx
+
+
+def test_push_to_many_devices(tmp_path, save_path, devices):
+    ctx = push(tmp_path, save_path, ["a", "b", "offline", "a"], rerun=True)
+    data = (tmp_path / "out").read_bytes()
+    assert devices["a"].pushed == [data] and devices["a"].reruns == 1
+    assert devices["b"].pushed == [data]
+    assert ctx.logger.errors == ["offline: device offline"]
+
+
+def test_get_devices(pool):
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    ctx.adb = pool
+    assert save.Save.Adb().get_devices(ctx) == [None]
+    assert save.Save.Adb(device=["a", "b", "a"]).get_devices(ctx) == ["a", "b"]
+    assert save.Save.Adb(device="all").get_devices(ctx) == [
+        "emulator-5554",
+        "192.168.0.2:5555",
+    ]
+    pool.base.devices.clear()
+    pool.discovery.remove("devices")
+    assert save.Save.Adb(device="all").get_devices(ctx) == []
+    assert ctx.logger.errors == ["There are no devices connected with adb"]
+
+
+def test_save_cache(tmp_path):
+    saves = adb.SaveCache(str(tmp_path / "saves"))
+    assert saves.get("192.168.0.2:5555", "jp") is None
+    saves.put("192.168.0.2:5555", "jp", b"save")
+    assert saves.get("192.168.0.2:5555", "jp") == b"save"
+    assert (tmp_path / "saves" / "192.168.0.2_5555" / "jp").read_bytes() == b"save"
+    assert saves.get("192.168.0.2:5555", "en") is None
+    saves.remove("192.168.0.2:5555", "jp")
+    saves.remove("192.168.0.2:5555", "jp")
+    assert saves.get("192.168.0.2:5555", "jp") is None
+
+
+def test_get_save_hash():
+    device = FakeDevice("a")
+    assert adb.get_save_hash(device) is None
+    device.data = b"save"
+    assert adb.get_save_hash(device) == output.get_hash(b"save")
+    device.root = False
+    assert adb.get_save_hash(device) == output.get_hash(b"save")
+
+    device.run_shell = lambda command: types.SimpleNamespace(
+        success=True, result="sha256sum: not found"
+    )
+    device.root = True
+    assert adb.get_save_hash(device) is None
+
+
+def test_push_skipped_when_device_has_save(tmp_path, save_path, devices):
+    push(tmp_path, save_path, "a")
+    assert len(devices["a"].pushed) == 1
+    ctx = push(tmp_path, save_path, "a")
+    assert len(devices["a"].pushed) == 1
+    assert devices["a"].hash_calls == 1
+    assert not ctx.logger.errors
+
+    # the save on the device was changed by the game
+    devices["a"].data = b"played"
+    push(tmp_path, save_path, "a")
+    assert len(devices["a"].pushed) == 2
+
+
+def pull(tmp_path, device) -> bytes:
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    ctx.load = load.Load(
+        path=str(tmp_path / "pulled"), adb=load.Load.Adb(device=device)
+    )
+    s = ctx.load.load(ctx)
+    assert s is not None and not ctx.logger.errors
+    return (tmp_path / "pulled").read_bytes()
+
+
+def test_pull_cached_save(tmp_path, save_path, devices):
+    device = devices["a"]
+    device.data = save_path.read_bytes()
+    assert pull(tmp_path, "a") == device.data
+    assert device.pulls == 1 and device.hash_calls == 0
+
+    (tmp_path / "pulled").unlink()
+    assert pull(tmp_path, "a") == device.data
+    assert device.pulls == 1 and device.hash_calls == 1
+
+    push(tmp_path, save_path, "a")
+    assert pull(tmp_path, "a") == device.data
+    assert device.pulls == 1
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import bcsfe
+import pytest
+
+import bc_script
+from bc_script import bench, game_data, log
+from bc_script.parser.bcsfe import basic_items
+
+from conftest import create_orb
+
+
+@pytest.fixture
+def orb_index(monkeypatch):
+    index = game_data.OrbIndex(
+        [create_orb(0, 0, 0, 0), create_orb(1, 0, 2, 0), create_orb(2, 1, 2, None)]
+    )
+    monkeypatch.setattr(game_data, "get_orb_index", lambda s: index)
+    return index
+
+
+def apply_orbs(s: bcsfe.core.SaveFile, **kwargs) -> bc_script.Ctx:
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    ctx.edit = True
+    basic_items.BasicItems.TalentOrbs(**kwargs).apply(ctx, s)
+    return ctx
+
+
+def get_orbs(s: bcsfe.core.SaveFile) -> dict[int, int]:
+    return {id: orb.value for id, orb in sorted(s.talent_orbs.orbs.items())}
+
+
+def test_talent_orbs(orb_index):
+    s = bcsfe.core.SaveFile(bench.create_save(1))
+    apply_orbs(s, orbs={"5": 1})
+    ctx = apply_orbs(s, orbs={"all": 2, "attack-s": 3, "*-*-red": "many", "0": 4})
+    assert ctx.logger.errors == ["Invalid talent orb amount: many"]
+    assert get_orbs(s) == {0: 4, 1: 3, 2: 2, 5: 1}
+
+    apply_orbs(s, orbs={"defense": 7}, keep_previous=False)
+    assert get_orbs(s) == {2: 7}
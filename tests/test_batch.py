@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import pickle
+import time
+
+import bcsfe
+import pytest
+
+import bc_script
+from bc_script import batch, cache, log
+
+from conftest import run_cli, write_script
+
+
+@pytest.fixture
+def ctx(tmp_path):
+    script = write_script(
+        tmp_path / "script.toml",
+        """
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [edit.basic_items]
+        catfood = 45
+        [save]
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    ctx = bc_script.Ctx(log.Log(show_warnings=False))
+    assert cache.load_script(ctx, str(script), use_cache=False) is not None
+    return ctx
+
+
+def test_ctx_can_be_pickled(ctx):
+    ctx.adb.discovery.put("devices", ["emulator-5554"])
+    copy = pickle.loads(pickle.dumps(ctx))
+    assert copy.edit == ctx.edit
+    assert copy.adb is not ctx.adb
+
+
+@pytest.mark.parametrize("method", ["fork", "spawn"])
+def test_batch(ctx, tmp_path, save_path, monkeypatch, method):
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip(f"{method} isn't supported")
+    monkeypatch.setattr(
+        batch, "get_mp_context", lambda: multiprocessing.get_context(method)
+    )
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    jobs = batch.create_jobs(
+        [(str(save_path), None), (str(tmp_path / "missing"), None)], str(out_dir)
+    )
+    results = batch.Batch(ctx, jobs, 2).run()
+
+    assert sorted(result.success for result in results) == [False, True]
+    save = bcsfe.core.SaveFile(bcsfe.core.Data((out_dir / "SAVE_DATA").read_bytes()))
+    assert save.catfood == 45
+
+
+def test_read_manifest(tmp_path):
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("# comment\n\na\nb\tout/b\n")
+    assert batch.read_manifest(str(manifest)) == [("a", None), ("b", "out/b")]
+    jobs = batch.create_jobs([("dir/a", None)], "out")
+    assert jobs == [batch.Job("dir/a", "out/a")]
+
+
+def test_same_names_keep_their_directories(tmp_path):
+    entries = [
+        (str(tmp_path / "saves" / "en" / "SAVE_DATA"), None),
+        (str(tmp_path / "saves" / "jp" / "SAVE_DATA"), None),
+        (str(tmp_path / "saves" / "kr" / "SAVE_DATA"), "kr"),
+    ]
+    jobs = batch.create_jobs(entries, "out")
+    assert [job.out_path for job in jobs] == [
+        os.path.join("out", "en", "SAVE_DATA"),
+        os.path.join("out", "jp", "SAVE_DATA"),
+        "kr",
+    ]
+
+
+def test_duplicate_outputs_fail(tmp_path):
+    entries = [
+        (str(tmp_path / "a"), str(tmp_path / "out")),
+        (str(tmp_path / "b"), str(tmp_path / "out")),
+    ]
+    with pytest.raises(ValueError, match="Multiple saves would be written to"):
+        batch.create_jobs(entries, None)
+
+
+def test_find_inputs(tmp_path):
+    for name in ("b.sav", "a.sav", ".hidden", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    (tmp_path / "dir.sav").mkdir()
+
+    assert batch.find_inputs(str(tmp_path)) == [
+        str(tmp_path / name) for name in ("a.sav", "b.sav", "notes.txt")
+    ]
+    assert batch.find_inputs(str(tmp_path / "*.sav")) == [
+        str(tmp_path / name) for name in ("a.sav", "b.sav")
+    ]
+
+
+def sleep_job(ctx, job, conn):
+    time.sleep(60)
+
+
+def crash_job(ctx, job, conn):
+    os._exit(3)
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="the jobs are replaced in the parent",
+)
+@pytest.mark.parametrize(
+    "target, error",
+    [
+        (sleep_job, "Timed out after 0.5s"),
+        (crash_job, "Worker crashed with exit code 3"),
+    ],
+)
+def test_failed_worker(ctx, monkeypatch, target, error):
+    monkeypatch.setattr(batch, "run_job", target)
+    results = batch.Batch(ctx, [batch.Job("in", "out")], 1, timeout=0.5).run()
+    assert [result.errors for result in results] == [[error]]
+    assert results[0].timed_out == (target is sleep_job)
+
+
+def test_batch_cli(tmp_path, save_path):
+    saves = tmp_path / "saves"
+    saves.mkdir()
+    for name in ("a", "b"):
+        (saves / name).write_bytes(save_path.read_bytes())
+    script = write_script(
+        tmp_path / "script.toml",
+        """
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [edit.basic_items]
+        catfood = 45
+        [save]
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    result = run_cli(
+        str(script), "-b", str(saves), "--out-dir", "out", "-j", "2", cwd=tmp_path
+    )
+    assert "2 succeeded" in result.stdout, result.stdout + result.stderr
+    for name in ("a", "b"):
+        data = bcsfe.core.Data((tmp_path / "out" / name).read_bytes())
+        assert bcsfe.core.SaveFile(data).catfood == 45
+
+
+def test_batch_cli_same_names(tmp_path, save_path):
+    for name in ("en", "jp"):
+        path = tmp_path / "saves" / name / "SAVE_DATA"
+        path.parent.mkdir(parents=True)
+        path.write_bytes(save_path.read_bytes())
+    script = write_script(
+        tmp_path / "script.toml",
+        """
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [edit.basic_items]
+        catfood = 45
+        [save]
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    pattern = str(tmp_path / "saves" / "*" / "SAVE_DATA")
+    result = run_cli(str(script), "-b", pattern, "--out-dir", "out", cwd=tmp_path)
+    assert "2 succeeded" in result.stdout, result.stdout + result.stderr
+    for name in ("en", "jp"):
+        path = tmp_path / "out" / name / "SAVE_DATA"
+        assert bcsfe.core.SaveFile(bcsfe.core.Data(path.read_bytes())).catfood == 45
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from bc_script import bench
+
+
+def create_result(name: str, best: float, heavy_modules=None):
+    result = bench.create_result(name, [best, best * 2], 100)
+    if heavy_modules is not None:
+        result["heavy_modules"] = heavy_modules
+    return result
+
+
+def test_compare():
+    baseline = [
+        create_result("parser", 1.0),
+        create_result("cats", 1.0),
+        create_result("import", 1.0, []),
+    ]
+    results = [
+        create_result("parser", 1.05),
+        create_result("cats", 1.5),
+        create_result("import", 0.5, ["bcsfe"]),
+        create_result("talents", 1.0),
+    ]
+    comparison = bench.compare(results, baseline, 0.1)
+    assert [(item["name"], item["regressed"]) for item in comparison] == [
+        ("parser", False),
+        ("cats", True),
+        ("import", True),
+    ]
+    assert comparison[1]["change"] == pytest.approx(0.5)
+    assert comparison[2]["new_heavy_modules"] == ["bcsfe"]
+
+
+def test_main_exits_on_regression(tmp_path, capsys):
+    args = ["parser", "--entries", "10", "--repeat", "1"]
+    bench.main([*args, "-o", str(tmp_path / "results.json")])
+    results = json.loads((tmp_path / "results.json").read_text())
+    (parser,) = results["results"]
+    assert parser["entries"] == 10 and parser["best"] > 0
+
+    parser["best"] /= 1000
+    (tmp_path / "baseline.json").write_text(json.dumps(results))
+    with pytest.raises(SystemExit) as e:
+        bench.main([*args, "--baseline", str(tmp_path / "baseline.json")])
+    assert e.value.code == 1
+    assert '"regressed": true' in capsys.readouterr().out
+
+
+def test_starting_bc_script_imports_no_heavy_modules():
+    total, modules = bench.measure_import_time(bench.IMPORT_MODULE)
+    assert total > 0
+    assert bench.IMPORT_MODULE in modules
+    assert [module for module in bench.HEAVY_MODULES if module in modules] == []
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+
+import toml
+
+import bc_script
+from bc_script import cache, log
+
+from conftest import write_script
+
+SCRIPT = """
+[pkg]
+schema = "bcsfe"
+[info]
+name = "test"
+[load]
+path = "SAVE_DATA"
+[load.file]
+[edit.basic_items]
+catfood = {catfood}
+"""
+
+
+def load(path, **kwargs) -> bc_script.Ctx | None:
+    ctx = bc_script.Ctx(
+        log.Log(show_warnings=False, show_errors=False), interactive=False
+    )
+    return cache.load_script(ctx, str(path), **kwargs)
+
+
+def get_entries(cache_dir) -> list[str]:
+    path = cache_dir / "scripts"
+    return sorted(os.listdir(path)) if path.exists() else []
+
+
+def fail_loads(script_text):
+    raise AssertionError("the script should have come from the cache")
+
+
+def test_cached_script_isnt_parsed_again(tmp_path, cache_dir, monkeypatch):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    assert load(script).edit.basic_items.catfood == 10
+    assert len(get_entries(cache_dir)) == 1
+
+    monkeypatch.setattr(toml, "loads", fail_loads)
+    assert load(script).edit.basic_items.catfood == 10
+
+
+def test_changed_script_is_parsed_again(tmp_path, cache_dir):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    load(script)
+    write_script(script, SCRIPT.format(catfood=20))
+    assert load(script).edit.basic_items.catfood == 20
+    assert len(get_entries(cache_dir)) == 2
+
+
+def test_uncached_scripts(tmp_path, cache_dir):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    load(script, use_cache=False)
+    # scripts that prompt for input aren't cached, as each run can differ
+    write_script(script, SCRIPT.format(catfood='"__input__"'))
+    load(script)
+    assert get_entries(cache_dir) == []
+
+
+def test_input_in_comments_is_cached(tmp_path, cache_dir):
+    script = write_script(
+        tmp_path / "script.toml", "# __input__\n" + SCRIPT.format(catfood=10)
+    )
+    load(script)
+    assert len(get_entries(cache_dir)) == 1
+
+
+def test_has_input():
+    assert not cache.has_input({"a": {"b": [1, "x"]}, "c": "__input"})
+    assert cache.has_input({"a": {"b": [{"c": "__input__(count)"}]}})
+    assert cache.has_input({"a": {"__input__": 1}})
+
+
+def test_corrupt_entry_is_replaced(tmp_path, cache_dir):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    load(script)
+    (entry,) = get_entries(cache_dir)
+    assert entry.endswith(".json")
+    (cache_dir / "scripts" / entry).write_bytes(b"not json")
+
+    assert load(script).edit.basic_items.catfood == 10
+    assert (cache_dir / "scripts" / entry).read_bytes() != b"not json"
+
+
+def write_entry(cache_dir, script, data):
+    key = cache.get_script_key(script.read_bytes())
+    path = cache_dir / "scripts" / f"{key}.json"
+    path.write_text(json.dumps({"data": data}), encoding="utf-8")
+
+
+def test_entry_is_checked_like_the_script(tmp_path, cache_dir):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    load(script)
+    data = toml.loads(SCRIPT.format(catfood=10))
+    data["edit"]["basic_items"]["catfood"] = "lots"
+    write_entry(cache_dir, script, data)
+
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    cache.load_script(ctx, str(script))
+    assert ctx.logger.errors[0].startswith("Failed to create BasicItems")
+
+
+def test_entry_of_other_user_is_ignored(tmp_path, cache_dir, monkeypatch):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    load(script)
+    write_entry(cache_dir, script, toml.loads(SCRIPT.format(catfood=20)))
+    assert load(script).edit.basic_items.catfood == 20
+
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(script).st_uid + 1)
+    assert load(script).edit.basic_items.catfood == 10
+    assert os.stat(cache_dir / "scripts").st_mode & 0o777 == 0o700
+
+
+def test_key_changes_with_sources(tmp_path, monkeypatch):
+    data = SCRIPT.encode("utf-8")
+    key = cache.get_script_key(data)
+    assert cache.get_script_key(data) == key
+    monkeypatch.setattr(cache, "source_fingerprint", "other")
+    assert cache.get_script_key(data) != key
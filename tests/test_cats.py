@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import bcsfe
+import pytest
+from bcsfe.core.game.catbase.cat import Talent
+
+import bc_script
+from bc_script import bench, game_data, log
+from bc_script.parser.bcsfe import cats
+
+Talents = cats.Cats.CatEdit.Talents
+
+
+@pytest.fixture
+def save(monkeypatch):
+    tables = {
+        0: [
+            game_data.TalentInfo(10, "Attack", 10),
+            game_data.TalentInfo(11, "Health", 5),
+            game_data.TalentInfo(12, "Speed", 3),
+        ],
+        1: [game_data.TalentInfo(20, "Range", 10)],
+    }
+    monkeypatch.setattr(game_data, "get_talent_tables", lambda s: tables)
+    s = bcsfe.core.SaveFile(bench.create_save(3))
+    s.cats.cats[0].talents = [Talent(12, 1), Talent(10, 2)]
+    s.cats.cats[1].talents = [Talent(20, 4)]
+    return s
+
+
+def apply(s: bcsfe.core.SaveFile, ids: list[int], **kwargs) -> bc_script.Ctx:
+    ctx = bc_script.Ctx(log.Log(show_warnings=False, show_errors=False))
+    ctx.edit = True
+    Talents(**kwargs).apply(ctx, s, [s.cats.cats[id] for id in ids])
+    return ctx
+
+
+def get_levels(s: bcsfe.core.SaveFile, id: int) -> dict[int, int]:
+    return {talent.id: talent.level for talent in s.cats.cats[id].talents}
+
+
+def test_all_talents(save):
+    ctx = apply(save, [0, 1, 2], talents={"all": "max"})
+    assert get_levels(save, 0) == {12: 3, 10: 10}
+    assert get_levels(save, 1) == {20: 10}
+    assert ctx.logger.warnings == ["Failed to read talents for cat: 2"]
+
+
+def test_talents_by_id(save):
+    # ids are indexes into the talents in the table that the cat has
+    ctx = apply(save, [0], talents={"1": 2, "2": 1, "x": 1, "0": "high"})
+    assert get_levels(save, 0) == {12: 2, 10: 2}
+    assert ctx.logger.errors == ["Invalid talent id: x", "Invalid talent level: high"]
+    assert ctx.logger.warnings == ["Failed to find talent with id: 2"]
+
+
+def test_dont_keep_existing(save):
+    apply(save, [0, 1], talents={"0": 4}, keep_existing=False)
+    assert get_levels(save, 0) == {12: 0, 10: 4}
+    assert get_levels(save, 1) == {20: 4}
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+
+import bcsfe
+
+from bc_script import changes
+
+from conftest import run_cli, write_script
+
+
+def test_disabled_change_set_records_nothing():
+    change_set = changes.ChangeSet()
+    change_set.add("catfood", 1, 2)
+    assert change_set.changes == []
+
+
+def test_change_set():
+    change_set = changes.ChangeSet(True)
+    change_set.add("catfood", 1, 2)
+    change_set.add("xp", 5, 5)
+    change_set.add_state_changes(
+        "cats",
+        3,
+        {"unlocked": 0, "talents": {1: 0, 2: 4}},
+        {"unlocked": 1, "talents": {1: 5, 2: 4}},
+    )
+    assert change_set.to_dict() == {
+        "count": 3,
+        "fields": {"catfood": 1, "cats.unlocked": 1, "cats.talents": 1},
+        "changes": [
+            {"field": "catfood", "old": 1, "new": 2},
+            {"field": "cats.unlocked", "id": 3, "old": 0, "new": 1},
+            {"field": "cats.talents", "id": 3, "key": 1, "old": 0, "new": 5},
+        ],
+    }
+
+
+def test_dry_run_cli(tmp_path, save_path):
+    before = save_path.read_bytes()
+    script = write_script(
+        tmp_path / "script.toml",
+        f"""
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [load]
+        path = "{save_path.as_posix()}"
+        [load.file]
+        [edit.basic_items]
+        catfood = 100
+        catamins = [1, 0]
+        [save]
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    changes = [
+        {"field": "catfood", "old": 0, "new": 100},
+        {"field": "catamins", "id": 0, "old": 0, "new": 1},
+    ]
+    result = run_cli("--dry-run", str(script), cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    # the log is printed after the changes
+    report, _ = json.JSONDecoder().raw_decode(result.stdout)
+    assert report["changes"] == changes
+
+    result = run_cli(
+        str(script), "--dry-run", "--dry-run-output", "changes.json", cwd=tmp_path
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads((tmp_path / "changes.json").read_text())
+    assert report["changes"] == changes
+    assert save_path.read_bytes() == before
+    assert bcsfe.core.SaveFile(bcsfe.core.Data(before)).catfood == 0
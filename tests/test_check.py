@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import types
+
+import pytest
+
+from bc_script import check
+
+from conftest import run_cli, write_script
+
+VALID = """
+[pkg]
+schema = "bcsfe"
+[info]
+name = "test"
+[load]
+path = "SAVE_DATA"
+[load.file]
+[edit.basic_items]
+catfood = {catfood}
+"""
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    write_script(tmp_path / "valid.toml", VALID.format(catfood=1))
+    write_script(
+        tmp_path / "nested" / "input.toml", VALID.format(catfood='"__input__"')
+    )
+    write_script(tmp_path / "nested" / "invalid.toml", VALID.format(catfood='"lots"'))
+    write_script(tmp_path / "nested" / "broken.toml", "[pkg")
+    write_script(tmp_path / ".hidden" / "skipped.toml", "")
+    write_script(tmp_path / "notes.txt", "")
+    return tmp_path
+
+
+def test_find_scripts(scripts):
+    assert check.find_scripts([str(scripts), "other.toml"]) == [
+        str(scripts / "valid.toml"),
+        str(scripts / "nested" / "broken.toml"),
+        str(scripts / "nested" / "input.toml"),
+        str(scripts / "nested" / "invalid.toml"),
+        "other.toml",
+    ]
+
+
+def test_check_script(scripts):
+    valid = check.check_script(str(scripts / "valid.toml"))
+    assert valid["valid"] and not valid["needs_input"]
+
+    needs_input = check.check_script(str(scripts / "nested" / "input.toml"))
+    assert needs_input["valid"] and needs_input["needs_input"]
+
+    invalid = check.check_script(str(scripts / "nested" / "invalid.toml"))
+    assert not invalid["valid"]
+    assert invalid["errors"][0].startswith("Failed to create BasicItems")
+
+    broken = check.check_script(str(scripts / "nested" / "broken.toml"))
+    assert broken["errors"][0].startswith("Failed to read script")
+
+
+def test_input_in_comments_isnt_input(tmp_path):
+    path = write_script(
+        tmp_path / "comment.toml", "# catfood = __input__\n" + VALID.format(catfood=1)
+    )
+    assert not check.check_script(str(path))["needs_input"]
+
+
+def test_check_scripts_in_workers(scripts, monkeypatch):
+    pools: list[int] = []
+    get_mp_context = check.batch.get_mp_context
+
+    def get_context():
+        context = get_mp_context()
+        pool = context.Pool
+
+        def create_pool(jobs):
+            pools.append(jobs)
+            return pool(jobs)
+
+        return types.SimpleNamespace(Pool=create_pool)
+
+    monkeypatch.setattr(check.batch, "get_mp_context", get_context)
+    paths = check.find_scripts([str(scripts)])
+    expected = [check.check_script(p) for p in paths]
+    # too few scripts for workers to be worth it, unless -j is given
+    assert check.check_scripts(paths) == expected
+    assert pools == []
+    assert check.check_scripts(paths, 2) == expected
+    assert pools == [2]
+
+
+def test_check_cli(scripts):
+    result = run_cli("check", str(scripts), "-o", "report.json", cwd=scripts)
+    assert result.returncode == 1
+    report = json.loads((scripts / "report.json").read_text())
+    assert report["summary"]["valid"] == 2 and report["summary"]["invalid"] == 2
+
+    result = run_cli("check", "valid.toml", cwd=scripts)
+    assert result.returncode == 0, result.stderr
+    write_script(scripts / "unknown.toml", VALID.format(catfood=1) + "cat_food = 1\n")
+    assert run_cli("check", "unknown.toml", cwd=scripts).returncode == 0
+    assert run_cli("check", "unknown.toml", "--strict", cwd=scripts).returncode == 1
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import bcsfe
+
+from bc_script import config
+
+
+def test_apply_without_locale_needs_no_bcsfe_config(monkeypatch):
+    monkeypatch.delattr(bcsfe.core.core_data, "config", raising=False)
+    with config.LocaleConfig().apply():
+        pass
+    assert not hasattr(bcsfe.core.core_data, "config")
+
+
+def test_apply_forces_and_restores_locale():
+    with config.LocaleConfig("jp").apply():
+        values = bcsfe.core.core_data.config.config
+        assert values[bcsfe.core.ConfigKey.LOCALE] == "jp"
+        assert values[bcsfe.core.ConfigKey.FORCE_LANG_GAME_DATA] is True
+    assert values.get(bcsfe.core.ConfigKey.LOCALE) != "jp"
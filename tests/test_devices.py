@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from conftest import write_script
+
+import bc_script
+from bc_script import devices, log
+from bc_script.parser import parse
+
+ADB_SCRIPT = """
+[pkg]
+schema = "bcsfe"
+
+[info]
+name = "test"
+
+[load.adb]
+
+[save]
+upload_managed_items = false
+
+[save.adb]
+"""
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    runs: list[tuple[str, str, str]] = []
+    lock = threading.Lock()
+
+    def run(ctx, in_path, out_path):
+        with lock:
+            runs.append((ctx.load.adb.device, ctx.save.adb.device, ctx.load.path))
+        if ctx.load.adb.device == "broken":
+            raise RuntimeError("device offline")
+
+    monkeypatch.setattr(parse, "run", run)
+    return runs
+
+
+def create_pool(tmp_path, device_names, jobs) -> devices.DevicePool:
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    path = str(write_script(tmp_path / "script.toml", ADB_SCRIPT))
+    scripts = devices.load_scripts(ctx, [path])
+    assert scripts is not None
+    return devices.DevicePool(
+        ctx,
+        device_names,
+        [devices.DeviceJob(path, device) for device in jobs],
+        scripts,
+        str(tmp_path / "devices"),
+    )
+
+
+def test_pool_runs_jobs(tmp_path, runs):
+    pool = create_pool(tmp_path, ["a", "192.168.0.2:5555", "a"], [None] * 4 + ["a"])
+    results = pool.run()
+    assert len(results) == 5 and all(result.success for result in results)
+    assert {device for device, _, _ in runs} <= {"a", "192.168.0.2:5555"}
+    for load_device, save_device, path in runs:
+        assert save_device == load_device
+        assert path == str(tmp_path / "devices" / load_device.replace(":", "_"))
+    # jobs pinned to a device only run on it
+    assert any(r.device == "a" and r.job.device == "a" for r in results)
+
+    report = pool.to_dict()
+    assert report["summary"]["jobs"] == 5
+    assert report["summary"]["failed"] == 0
+    assert sum(stats["jobs"] for stats in report["devices"]) == 5
+    assert [stats["device"] for stats in report["devices"]] == [
+        "a",
+        "192.168.0.2:5555",
+    ]
+
+
+def test_pool_failures(tmp_path, runs):
+    pool = create_pool(tmp_path, ["broken"], [None, "broken", "missing"])
+    pool.run()
+    assert [result.errors for result in pool.get_failed()] == [
+        ["RuntimeError: device offline"]
+    ] * 2
+    report = pool.to_dict()
+    assert report["summary"]["failed"] == 2
+    assert report["summary"]["not_run"] == 1
+    assert report["devices"][0]["succeeded"] == 0
+
+
+def test_load_scripts(tmp_path):
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    path = str(
+        write_script(
+            tmp_path / "file.toml",
+            """
+            [pkg]
+            schema = "bcsfe"
+
+            [info]
+            name = "test"
+
+            [load]
+            path = "SAVE_DATA"
+
+            [load.file]
+            """,
+        )
+    )
+    assert devices.load_scripts(ctx, [path]) is None
+    assert ctx.logger.errors == [f"{path}: Script doesn't load from or save to adb"]
+
+    assert devices.load_scripts(ctx, [str(tmp_path / "missing.toml")]) is None
+    assert ctx.logger.errors[-1].startswith("File not found")
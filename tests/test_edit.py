@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import threading
+
+import bcsfe
+
+import bc_script
+from bc_script import log
+
+from conftest import run_cli, write_script
+
+
+def test_plain_edit_in_fresh_interpreter(tmp_path, save_path):
+    script = write_script(
+        tmp_path / "script.toml",
+        f"""
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [load]
+        path = "{save_path.as_posix()}"
+        [load.file]
+        [edit.basic_items]
+        catfood = 123
+        [save]
+        path = "out"
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    result = run_cli(str(script), cwd=tmp_path)
+    assert "Traceback" not in result.stderr, result.stderr
+    save = bcsfe.core.SaveFile(bcsfe.core.Data((tmp_path / "out").read_bytes()))
+    assert save.catfood == 123
+
+
+def test_runs_in_one_process_are_isolated(tmp_path, save_path):
+    results = {}
+
+    def run(catfood):
+        script = {
+            "pkg": {"schema": "bcsfe"},
+            "info": {"name": "test"},
+            "load": {"path": str(save_path), "file": {}},
+            "edit": {"basic_items": {"catfood": catfood}},
+            "save": {
+                "path": str(tmp_path / str(catfood)),
+                "upload_managed_items": False,
+                "file": {},
+            },
+        }
+        if catfood < 0:
+            script["edit"]["basic_items"]["catfood"] = "lots"
+        ctx = bc_script.Ctx(log.Log(show_warnings=False, show_errors=False))
+        bc_script.parser.parse.do(script, None, None, ctx)
+        results[catfood] = ctx
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in (-1, 10, 20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results[-1].logger.errors) == 1
+    for catfood in (10, 20):
+        assert not results[catfood].logger.errors
+        data = bcsfe.core.Data((tmp_path / str(catfood)).read_bytes())
+        assert bcsfe.core.SaveFile(data).catfood == catfood
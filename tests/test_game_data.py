@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import bcsfe
+
+from bc_script import bench, game_data
+
+from conftest import create_orb
+
+
+def create_save(cc: str = "en") -> bcsfe.core.SaveFile:
+    return bcsfe.core.SaveFile(bench.create_save(3, cc))
+
+
+def test_tables_are_built_once_per_locale_and_version(bcsfe_data):
+    cache = game_data.GameDataCache()
+    built: list[str] = []
+
+    def build(s: bcsfe.core.SaveFile):
+        built.append(s.cc.get_code())
+        return len(built)
+
+    en = create_save()
+    assert cache.get("table", en, build) == 1
+    assert cache.get("table", create_save(), build) == 1
+    assert cache.get("other", en, build) == 2
+    assert cache.get("table", create_save("jp"), build) == 3
+
+    en.game_version = bcsfe.core.GameVersion(en.game_version.game_version - 1)
+    assert cache.get("table", en, build) == 4
+    assert built == ["en", "en", "jp", "en"]
+
+
+def test_failed_tables_are_cached_until_cleared(bcsfe_data):
+    cache = game_data.GameDataCache()
+    results = [None, [1]]
+    s = create_save()
+    assert cache.get("table", s, lambda s: results.pop(0)) is None
+    assert cache.get("table", s, lambda s: results.pop(0)) is None
+    cache.clear()
+    assert cache.get("table", s, lambda s: results.pop(0)) == [1]
+
+
+def test_orb_index():
+    index = game_data.OrbIndex(
+        [
+            create_orb(0, 0, 0, 0),
+            create_orb(1, 0, 2, 0),
+            create_orb(2, 0, 2, 1),
+            create_orb(3, 1, 2, None),
+        ]
+    )
+    assert index.select(None, None, None) == [0, 1, 2, 3]
+    assert index.select("attack", None, None) == [0, 1, 2]
+    assert index.select("0", "s", None) == [1, 2]
+    assert index.select("attack", "02", "floating") == [2]
+    assert index.select(None, "s", "0") == [1]
+    assert index.select("defense", "d", None) == []
+    assert index.select("speed", None, None) == []
+    assert index.select("attack", None, None) is index.select("attack", None, None)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import io
+
+import bcsfe
+import pytest
+
+import bc_script
+from bc_script import json_file
+
+from conftest import run_cli, write_script
+
+
+def get_save_dict(save_path) -> dict:
+    return bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes())).to_dict()
+
+
+def dump(obj) -> bytes:
+    f = io.BytesIO()
+    json_file.dump(obj, f)
+    return f.getvalue()
+
+
+@pytest.mark.skipif(json_file.orjson is None, reason="orjson isn't installed")
+def test_backends_write_the_same_json(save_path, monkeypatch):
+    obj = get_save_dict(save_path)
+    with_orjson = dump(obj)
+    monkeypatch.setattr(json_file, "orjson", None)
+    assert dump(obj) == with_orjson
+
+
+@pytest.mark.parametrize("name", ["save.json", "save.json.gz"])
+def test_write_and_read_round_trip(tmp_path, save_path, name):
+    obj = get_save_dict(save_path)
+    path = str(tmp_path / name)
+    json_file.write(bc_script.Ctx(), path, obj)
+    save = bcsfe.core.SaveFile.from_dict(json_file.read(path))
+    assert save.to_data().to_bytes() == save_path.read_bytes()
+
+
+def test_gzip_output_is_reproducible(tmp_path, save_path):
+    obj = get_save_dict(save_path)
+    json_file.write(bc_script.Ctx(), str(tmp_path / "a.json.gz"), obj)
+    json_file.write(bc_script.Ctx(), str(tmp_path / "b.json.gz"), obj)
+    assert (tmp_path / "a.json.gz").read_bytes() == (
+        tmp_path / "b.json.gz"
+    ).read_bytes()
+
+
+def test_zst_without_zstandard_is_a_value_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(json_file, "zstandard", None)
+    with pytest.raises(ValueError):
+        json_file.write(bc_script.Ctx(), str(tmp_path / "save.json.zst"), {})
+    # only the lock file is left, no output or temporary file
+    assert [path.name for path in tmp_path.iterdir()] == [".save.json.zst.lock"]
+
+
+def test_save_and_load_json_with_scripts(tmp_path, save_path):
+    header = """
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        """
+    save_script = write_script(
+        tmp_path / "save.toml",
+        header + f"""
+        [load]
+        path = "{save_path.as_posix()}"
+        [load.file]
+        [edit.basic_items]
+        catfood = 77
+        [save]
+        upload_managed_items = false
+        [save.json]
+        path = "save.json.gz"
+        """,
+    )
+    load_script = write_script(
+        tmp_path / "load.toml",
+        header + """
+        [load]
+        path = "loaded"
+        [load.json]
+        path = "save.json.gz"
+        [save]
+        upload_managed_items = false
+        """,
+    )
+    for script in (save_script, load_script):
+        result = run_cli(str(script), cwd=tmp_path)
+        assert "Finished with 0 errors" in result.stdout, result.stdout + result.stderr
+    data = bcsfe.core.Data((tmp_path / "loaded").read_bytes())
+    assert bcsfe.core.SaveFile(data).catfood == 77
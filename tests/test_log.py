@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import pickle
+import re
+import threading
+
+from bc_script import log
+
+
+def test_messages_from_threads_dont_interleave(capsys):
+    logger = log.Log(show_info=True)
+
+    def add(thread: int):
+        for i in range(200):
+            logger.add_info("Saving to: /tmp/{}/{}", thread, i)
+            logger.add_count("Saved {} files")
+
+    threads = [threading.Thread(target=add, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.flush_counts()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 8 * 200 + 1
+    for line in lines[:-1]:
+        assert re.fullmatch(r".*INFO: Saving to: /tmp/\d/\d+.*", line), line
+    assert "Saved 1600 files" in lines[-1]
+    assert len(logger.info) == 8 * 200 + 1
+
+
+def test_log_can_be_pickled():
+    logger = log.Log(show_errors=False)
+    logger.add_error("Failed to {}", "save")
+    assert pickle.loads(pickle.dumps(logger)).errors == ["Failed to save"]
+
+
+class Formatted:
+    def __init__(self):
+        self.calls = 0
+
+    def __format__(self, spec: str) -> str:
+        self.calls += 1
+        return "value"
+
+
+def test_hidden_info_isnt_formatted(capsys):
+    value = Formatted()
+    logger = log.Log(show_info=False)
+    logger.add_info("Set {}", value)
+    logger.add_count("Upgraded {} cats", 5)
+    logger.flush_counts()
+    assert value.calls == 0
+    assert logger.info == [] and logger.counts == {}
+    assert capsys.readouterr().out == ""
+
+    log.Log(show_info=True).add_info("Set {}", value)
+    assert value.calls == 1
+
+
+def test_counts_are_flushed_once(capsys):
+    logger = log.Log(show_info=True)
+    for _ in range(3):
+        logger.add_count("Upgraded {} cats")
+    logger.add_count("Set {} talents", 4)
+    logger.flush_counts()
+    logger.flush_counts()
+    assert logger.info == ["Upgraded 3 cats", "Set 4 talents"]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import bcsfe
+import pytest
+
+import bc_script
+from bc_script import log, output
+
+from conftest import run_cli, write_script
+
+
+def test_is_unchanged():
+    ctx = bc_script.Ctx(log.Log())
+    assert not output.is_unchanged(ctx, b"save")
+    output.set_input(ctx, bcsfe.core.Data(b"save"), ("adb", "device", "jp"))
+    assert output.is_unchanged(ctx, b"save")
+    assert output.is_unchanged(ctx, b"save", ("adb", "device", "jp"))
+    assert not output.is_unchanged(ctx, b"save", ("adb", "other", "jp"))
+    assert not output.is_unchanged(ctx, b"edited")
+
+
+def test_unchanged_save_isnt_written(tmp_path, save_path):
+    script = write_script(
+        tmp_path / "script.toml",
+        f"""
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [load]
+        path = "{save_path.as_posix()}"
+        [load.file]
+        [edit.basic_items]
+        catfood = 0
+        [save]
+        path = "{save_path.as_posix()}"
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    mtime = save_path.stat().st_mtime_ns
+    result = run_cli(str(script), "-d", cwd=tmp_path)
+    assert "File is unchanged, skipped writing" in result.stdout, result.stdout
+    assert save_path.stat().st_mtime_ns == mtime
+
+
+def test_write_file(tmp_path):
+    ctx = bc_script.Ctx(log.Log())
+    path = tmp_path / "dir" / "save"
+    assert output.write_file(ctx, str(path), b"save")
+    assert not output.write_file(ctx, str(path), b"save")
+    assert output.write_file(ctx, str(path), b"edited")
+    assert path.read_bytes() == b"edited"
+    assert sorted(p.name for p in path.parent.iterdir()) == [".save.lock", "save"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "save"
+    path.write_bytes(b"old")
+    path.chmod(0o600)
+
+    def write(f):
+        f.write(b"partial")
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        output.atomic_write(str(path), write)
+    assert path.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["save"]
+
+    output.atomic_write(str(path), lambda f: f.write(b"new"))
+    assert path.read_bytes() == b"new"
+    assert path.stat().st_mode & 0o777 == 0o600
+
+
+def test_batch_fsync_mode(tmp_path):
+    paths = [str(tmp_path / name) for name in ("a", "b")]
+    output.take_pending()
+    for path in paths + paths[:1]:
+        output.atomic_write(path, lambda f: f.write(b"save"), "batch")
+    output.atomic_write(str(tmp_path / "c"), lambda f: f.write(b"save"), "never")
+    assert output.take_pending() == paths
+    assert output.take_pending() == []
+
+    output.add_pending(paths + [str(tmp_path / "missing")])
+    output.sync_pending()
+    assert output.take_pending() == []
+
+
+@pytest.mark.skipif(output.fcntl is None, reason="paths are only locked with fcntl")
+def test_lock_path(tmp_path):
+    path = str(tmp_path / "save")
+    events: list[str] = []
+
+    def hold(name: str):
+        with output.lock_path(path):
+            events.append(f"{name} start")
+            time.sleep(0.1)
+            events.append(f"{name} end")
+
+    # flock locks are per open file, so threads exclude each other too
+    threads = [threading.Thread(target=hold, args=(name,)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [event.split()[1] for event in events] == ["start", "end"] * 2
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+
+import bc_script
+from bc_script import bench, log
+from bc_script.parser import parse
+from bc_script.parser.bcsfe import cats, edit, special_skills
+
+from conftest import SRC_DIR
+
+
+def create_ctx() -> bc_script.Ctx:
+    return bc_script.Ctx(log.Log(show_warnings=False, show_errors=False))
+
+
+def test_meta_is_computed_once_per_class():
+    meta = cats.Cats.CatEdit.get_meta()
+    assert meta is cats.Cats.CatEdit.get_meta()
+    assert "dict_key" not in meta.arg_set
+    assert meta.args[:2] == ["ids", "unlock"]
+    assert meta.field_types["unlock"] == "bool | None"
+    assert meta.inner_classes == {"talents": cats.Cats.CatEdit.Talents}
+
+
+def test_only_parsers_are_inner_classes():
+    inner = special_skills.SpecialSkills.get_meta().inner_classes
+    assert inner == {"special_skill": special_skills.SpecialSkills.SpecialSkill}
+    assert list(edit.Edit.get_meta().inner_classes) == [
+        "basic_items",
+        "cats",
+        "special_skills",
+    ]
+
+
+def test_parse():
+    ctx = parse.parse(bench.create_script(3), create_ctx())
+    assert ctx is not None and not ctx.logger.errors
+    assert ctx.edit.basic_items.catfood == 100
+    assert [cat.ids for cat in ctx.edit.cats.cats] == [
+        [i, f"rarity-{i}"] for i in range(3)
+    ]
+    assert ctx.edit.cats.cats[0].talents.talents == {"all": "max"}
+    assert ctx.edit.special_skills.special_skills[2].upgrade == [10, "max"]
+
+
+def test_unknown_keys_are_warned_about():
+    script = bench.create_script(1)
+    script["edit"]["basic_items"]["cat_food"] = 1
+    script["edit"]["cats"][0]["unlocked"] = True
+    ctx = parse.parse(script, create_ctx())
+    assert not ctx.logger.errors
+    assert [warning.split("!")[0] for warning in ctx.logger.warnings] == [
+        "`cat_food` is not a valid key for `BasicItems`",
+        "`unlocked` is not a valid key for `CatEdit`",
+    ]
+
+
+def test_missing_sections():
+    ctx = create_ctx()
+    ctx = parse.parse({"pkg": {"schema": "other"}}, ctx)
+    assert ctx.logger.warnings == ["info key was not found in script"]
+    assert ctx.pkg.schema == "other" and ctx.info.name == ""
+    assert ctx.edit is None
+
+    ctx = create_ctx()
+    parse.parse({}, ctx)
+    assert ctx.logger.errors[0] == "pkg key was not found in script"
+
+
+def test_parser_is_imported_when_first_used():
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, bc_script; assert 'bc_script.parser' not in sys.modules; "
+            "bc_script.parser.parse; assert 'bcsfe' not in sys.modules",
+        ],
+        env={**os.environ, "PYTHONPATH": SRC_DIR},
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import bcsfe
+import pytest
+
+from bc_script import game_data, prefetch
+
+CATS_SCRIPT = {
+    "load": {"country_code": "jp"},
+    "edit": {"cats": [{"ids": "all", "talents": {"talents": {"all": 1}}}]},
+}
+ORBS_SCRIPT = {
+    "edit": {"forced_locale": "kr", "basic_items": {"talent_orbs": {"orbs": {}}}}
+}
+
+
+def test_get_script_features():
+    assert game_data.get_script_features(CATS_SCRIPT) == {"cats", "talents"}
+    assert game_data.get_script_features(ORBS_SCRIPT) == {"talent_orbs"}
+    assert game_data.get_script_features({"edit": "cats"}) == set()
+
+
+def test_get_required_files():
+    files = prefetch.get_required_files([ORBS_SCRIPT])
+    assert files == sorted(game_data.GAME_DATA_FILES["talent_orbs"])
+    every_file = prefetch.get_required_files([])
+    assert set(every_file) == {
+        file for files in game_data.GAME_DATA_FILES.values() for file in files
+    }
+
+
+def test_get_script_locales():
+    scripts = [CATS_SCRIPT, ORBS_SCRIPT, CATS_SCRIPT, {}]
+    assert prefetch.get_script_locales(scripts) == ["jp", "kr"]
+
+
+def test_main_updates_the_index(monkeypatch):
+    results = {
+        "en": {"version": "13.0.0", "files": ["DataLocal/a.csv"], "failed": []},
+        "jp": {"error": "Failed to get the latest game version"},
+    }
+    monkeypatch.setattr(
+        prefetch,
+        "prefetch_locale",
+        lambda locale, files: {"locale": locale, **results[locale]},
+    )
+    game_data.write_index({"en": {"version": "13.0.0", "files": ["DataLocal/b.csv"]}})
+
+    with pytest.raises(SystemExit):
+        prefetch.main(["--locale", "en", "--locale", "jp"])
+    assert game_data.read_index() == {
+        "en": {"version": "13.0.0", "files": ["DataLocal/a.csv", "DataLocal/b.csv"]}
+    }
+
+    results["en"]["version"] = "13.1.0"
+    prefetch.main(["--locale", "en"])
+    assert game_data.read_index()["en"]["files"] == ["DataLocal/a.csv"]
+
+
+def test_offline_cache(monkeypatch, bcsfe_data):
+    monkeypatch.setattr(
+        bcsfe.core.CoreData,
+        "get_game_data_getter",
+        bcsfe.core.CoreData.get_game_data_getter,
+    )
+    game_data.write_index({"en": {"version": "13.0.0", "files": []}})
+    assert game_data.use_offline_cache() == ["en"]
+
+    core_data = bcsfe.core.core_data
+    getter = core_data.get_game_data_getter(cc=bcsfe.core.CountryCode.from_code("en"))
+    assert isinstance(getter, game_data.OfflineGameDataGetter)
+    assert getter.latest_version == "13.0.0"
+    assert getter.get_file("DataLocal", "unitbuy.csv") is None
+    jp = core_data.get_game_data_getter(cc=bcsfe.core.CountryCode.from_code("jp"))
+    assert jp.latest_version is None
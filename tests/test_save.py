@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import types
+
+import bcsfe
+import pytest
+
+import bc_script
+from bc_script import log, output
+from bc_script.parser.bcsfe import save
+
+
+@pytest.fixture
+def ctx(save_path):
+    ctx = bc_script.Ctx(log.Log(show_info=False))
+    ctx.input_hash = output.get_hash(save_path.read_bytes())
+    return ctx
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    uploads: list[int] = []
+
+    def upload(self, ctx, s):
+        uploads.append(s.catfood)
+        s.catfood += 1
+        return True
+
+    monkeypatch.setattr(save.Save.Transfer, "save", upload)
+    return uploads
+
+
+def test_unchanged_save_isnt_uploaded(ctx, save_path, tmp_path, uploads):
+    out_path = tmp_path / "out"
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes()))
+    sv = save.Save(
+        path=str(out_path), upload_managed_items=False, transfer=save.Save.Transfer()
+    )
+    ctx.save = sv
+    sv.save(ctx, s)
+
+    assert uploads == []
+    assert not out_path.exists()
+    assert not ctx.logger.errors
+
+
+def test_changed_save_is_uploaded_and_written(ctx, save_path, tmp_path, uploads):
+    out_path = tmp_path / "out"
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes()))
+    s.catfood = 10
+    sv = save.Save(
+        path=str(out_path), upload_managed_items=False, transfer=save.Save.Transfer()
+    )
+    ctx.save = sv
+    sv.save(ctx, s)
+
+    assert uploads == [10]
+    written = bcsfe.core.SaveFile(bcsfe.core.Data(out_path.read_bytes()))
+    assert written.catfood == 11
+
+
+def test_sinks_run_at_the_same_time(ctx):
+    barrier = threading.Barrier(2, timeout=5)
+    ran: list[str] = []
+
+    def sink(ctx, name):
+        barrier.wait()
+        ran.append(name)
+
+    sv = save.Save()
+    sv.run_sinks(
+        ctx,
+        [("file", "save", sink, ("file",)), ("json", "save.json", sink, ("json",))],
+    )
+    assert sorted(ran) == ["file", "json"]
+    assert not ctx.logger.errors
+
+
+def test_sinks_of_the_same_path_run_in_order(ctx):
+    ran: list[str] = []
+    lock = threading.Lock()
+
+    def sink(ctx, name):
+        # holding the lock for a while makes overlapping sinks fail
+        assert lock.acquire(blocking=False)
+        time.sleep(0.01)
+        ran.append(name)
+        lock.release()
+
+    sv = save.Save()
+    sv.run_sinks(
+        ctx,
+        [
+            ("file", "save", sink, ("file",)),
+            ("adb", "save", sink, ("adb",)),
+            ("json", "save", sink, ("json",)),
+        ],
+    )
+    assert ran == ["file", "adb", "json"]
+    assert not ctx.logger.errors
+
+
+class FakeDevice:
+    def __init__(self):
+        self.pushed: list[bytes] = []
+
+    def get_device(self) -> str:
+        return "a"
+
+    def get_package_name(self) -> str:
+        return "jp.co.ponos.battlecatsen"
+
+    def load_battlecats_save(self, path):
+        self.pushed.append(path.read().to_bytes())
+        return types.SimpleNamespace(success=True, result="")
+
+
+def test_sinks_sharing_the_default_path(ctx, save_path, tmp_path, monkeypatch):
+    device = FakeDevice()
+    monkeypatch.setattr(bc_script, "setup_adb", lambda *args: device)
+    out_path = tmp_path / "out"
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes()))
+    s.catfood = 10
+    sv = save.Save(
+        path=str(out_path),
+        upload_managed_items=False,
+        file=save.Save.File(),
+        adb=save.Save.Adb(),
+        json=save.Save.Json(),
+    )
+    ctx.save = sv
+    sv.save(ctx, s)
+
+    assert not ctx.logger.errors
+    assert device.pushed == [s.to_data().to_bytes()]
+    # the json sink runs last, so the file is always the json
+    assert json.loads(out_path.read_bytes())["catfood"] == 10
+
+
+def test_failed_sink_doesnt_stop_the_others(ctx, save_path, tmp_path):
+    if save.json_file.zstandard is not None:
+        pytest.skip("zstandard is installed")
+    ctx.logger.show_errors = False
+    json_path = tmp_path / "missing" / "save.json.zst"
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes()))
+    s.catfood = 10
+    sv = save.Save(
+        path=str(tmp_path / "out"),
+        upload_managed_items=False,
+        file=save.Save.File(),
+        json=save.Save.Json(path=str(json_path)),
+    )
+    ctx.save = sv
+    sv.save(ctx, s)
+
+    assert len(ctx.logger.errors) == 1
+    assert "zstandard" in ctx.logger.errors[0]
+    assert (tmp_path / "out").exists()
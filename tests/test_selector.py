@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import bcsfe
+import pytest
+
+import bc_script
+from bc_script import bench, game_data, log, selector
+from bc_script.parser.bcsfe import cats
+
+
+@pytest.fixture
+def sets(monkeypatch):
+    monkeypatch.setattr(game_data, "get_cat_rarities", lambda s: [0, 1, 1, 2, 2, 2])
+    monkeypatch.setattr(game_data, "get_gatya_data_set", lambda s: [[1, 3, -1]])
+    monkeypatch.setattr(game_data, "get_obtainable_cat_ids", lambda s: [0, 1, 2])
+    s = bcsfe.core.SaveFile(bench.create_save(6))
+    s.cats.cats[4].unlocked = 1
+    return selector.CatSets(s)
+
+
+def select(sets: selector.CatSets, ids) -> list[int]:
+    return [cat.id for cat in sets.to_cats(selector.get_selector(ids).select(sets))]
+
+
+@pytest.mark.parametrize(
+    "ids, expected",
+    [
+        (3, [3]),
+        ("1-3", [1, 2, 3]),
+        ("4-100", [4, 5]),
+        ("all", [0, 1, 2, 3, 4, 5]),
+        ("unlocked", [4]),
+        ("rarity-2", [3, 4, 5]),
+        ("banner-0", [1, 3]),
+        ("obtainable", [0, 1, 2]),
+        ("non_obtainable", [3, 4, 5]),
+        ("!obtainable", [3, 4, 5]),
+        ("rarity-1 | rarity-2 & unlocked", [1, 2, 4]),
+        ("rarity-2 & !unlocked", [3, 5]),
+        ("!unlocked & rarity-2", [0, 1, 2, 3, 5]),
+        (["0-3", "!1", "!banner-0"], [0, 2]),
+        (["!rarity-2"], [0, 1, 2]),
+    ],
+)
+def test_select(sets, ids, expected):
+    assert select(sets, ids) == expected
+
+
+def test_invalid_ids(sets):
+    cat_selector = selector.get_selector(["1", "rarity-x", "3-1"])
+    assert cat_selector.errors == ["Invalid cat id: rarity-x", "Invalid cat id: 3-1"]
+    assert select(sets, ["1", "rarity-x", "3-1"]) == [1]
+
+
+@pytest.mark.parametrize("ids", ["obtainable", "non_obtainable", "all & !obtainable"])
+def test_failed_game_data_selects_nothing(sets, monkeypatch, ids):
+    monkeypatch.setattr(game_data, "get_obtainable_cat_ids", lambda s: None)
+    with pytest.raises(selector.MissingGameDataError):
+        selector.get_selector(ids).select(sets)
+
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    ctx.edit = True
+    cats.Cats.CatEdit(ids=ids, unlock=False).apply(ctx, sets.s, sets)
+    assert len(ctx.logger.errors) == 1
+    assert [cat.id for cat in sets.s.cats.cats if cat.unlocked] == [4]
+
+
+def test_sets_are_built_once(sets, monkeypatch):
+    calls: list[str] = []
+    monkeypatch.setattr(
+        game_data, "get_cat_rarities", lambda s: calls.append("rarity") or [2] * 6
+    )
+    assert select(sets, "rarity-2 | rarity-1") == [0, 1, 2, 3, 4, 5]
+    assert select(sets, "rarity-2") == [0, 1, 2, 3, 4, 5]
+    assert calls == ["rarity"]
+    assert selector.get_selector(["rarity-2"]) is selector.get_selector("rarity-2")
+
+    sets.s.cats.cats[0].unlocked = 1
+    assert select(sets, "unlocked") == [0, 4]
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import types
+
+import bcsfe
+
+import bc_script
+from bc_script import bench, log
+from bc_script.parser.bcsfe import special_skills
+
+SpecialSkill = special_skills.SpecialSkills.SpecialSkill
+
+
+def test_get_steps():
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    skill = SpecialSkill(upgrade=[10, "max"], upgrade_base="max", upgrade_plus=5)
+    assert skill.get_steps(ctx) == [
+        special_skills.UpgradeStep(10, "max", "Set upgrade"),
+        special_skills.UpgradeStep("max", None, "Set upgrade base"),
+        special_skills.UpgradeStep(None, 5, "Set upgrade plus"),
+    ]
+    assert not ctx.logger.errors
+
+
+def test_invalid_step_stops_later_steps():
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    skill = SpecialSkill(upgrade=[10, 2], upgrade_base="high", upgrade_plus=5)
+    assert skill.get_steps(ctx) == [special_skills.UpgradeStep(10, 2, "Set upgrade")]
+    assert ctx.logger.errors == ["Invalid upgrade base: high"]
+
+
+def test_upgrade_skill():
+    ctx = bc_script.Ctx(log.Log(show_info=False))
+    s = bcsfe.core.SaveFile(bench.create_save(1))
+    skill = s.special_skills.get_valid_skills()[0]
+    ability = types.SimpleNamespace(max_base_level=10, max_plus_level=90)
+    steps = SpecialSkill(upgrade=[5, 3], upgrade_plus="max").get_steps(ctx)
+
+    SpecialSkill().upgrade_skill(ctx, skill, ability, steps)
+    assert (skill.upgrade.base, skill.upgrade.plus) == (4, 90)
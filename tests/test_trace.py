@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+
+import bcsfe
+import pytest
+
+from bc_script import trace
+
+from conftest import run_cli, write_script
+
+
+@pytest.fixture
+def instrumented():
+    trace.reset_call_counts()
+    trace.instrument()
+    yield
+    trace.uninstrument()
+    trace.reset_call_counts()
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = trace.Tracer()
+    with tracer.span("run"):
+        pass
+    assert tracer.events == []
+
+
+def test_spans_count_bcsfe_calls(save_path, instrumented):
+    tracer = trace.Tracer(True)
+    with tracer.span("run", path="save"):
+        with tracer.span("load"):
+            s = bcsfe.core.SaveFile(bcsfe.core.Data(save_path.read_bytes()))
+        with tracer.span("save"):
+            s.to_data()
+            s.to_data()
+
+    run, load, save = sorted(tracer.to_dict()["traceEvents"], key=lambda e: e["ts"])
+    assert [run["name"], load["name"], save["name"]] == ["run", "load", "save"]
+    assert run["ts"] <= load["ts"] and run["dur"] >= load["dur"] + save["dur"]
+    assert run["args"]["path"] == "save"
+    assert save["args"]["bcsfe_calls"] == {"SaveFile.to_data": 2}
+    total = trace.get_call_counts()["SaveFile.to_data"]
+    assert run["args"]["bcsfe_calls"]["SaveFile.to_data"] == total
+
+
+def test_uninstrument_restores_bcsfe():
+    original = bcsfe.core.SaveFile.__dict__["to_data"]
+    trace.instrument()
+    assert bcsfe.core.SaveFile.__dict__["to_data"] is not original
+    trace.uninstrument()
+    assert bcsfe.core.SaveFile.__dict__["to_data"] is original
+
+
+def test_trace_cli(tmp_path, save_path):
+    script = write_script(
+        tmp_path / "script.toml",
+        f"""
+        [pkg]
+        schema = "bcsfe"
+        [info]
+        name = "test"
+        [load]
+        path = "{save_path.as_posix()}"
+        [load.file]
+        [edit.basic_items]
+        catfood = 5
+        [save]
+        path = "out"
+        upload_managed_items = false
+        [save.file]
+        """,
+    )
+    result = run_cli(str(script), "--trace", "trace.json", cwd=tmp_path)
+    assert "Finished with 0 errors" in result.stdout, result.stdout + result.stderr
+    data = json.loads((tmp_path / "trace.json").read_text())
+    names = {event["name"] for event in data["traceEvents"]}
+    assert {"load_script", "run", "load", "edit", "edit.basic_items"} <= names
+    assert data["otherData"]["bcsfe_version"] == bcsfe.__version__
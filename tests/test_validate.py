@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+import bc_script
+from bc_script import log
+from bc_script.parser import validate
+from bc_script.parser.bcsfe import cats
+
+
+@pytest.mark.parametrize(
+    "type_str, value",
+    [
+        ("int", 1),
+        ("str | None", None),
+        ("list[int | str] | None | str", [1, "max"]),
+        ("list[int | str] | None | str", "all"),
+        ("dict[str, int]", {"a": 1}),
+        ("dict[str, list[int]]", {"a": [1, 2]}),
+        ("Any", object()),
+    ],
+)
+def test_valid(type_str, value):
+    assert validate.compile_type(type_str)(value) is None
+
+
+@pytest.mark.parametrize(
+    "type_str, value, reason",
+    [
+        ("int", "1", "is not an instance of int"),
+        ("list[int]", (1,), "is not a list"),
+        ("list[int]", [1, "2"], "item 1 is not an instance of int"),
+        ("dict[str, int]", {1: 1}, "key 1 is not an instance of str"),
+        ("dict[str, int]", {"a": None}, "value of key 'a' is not an instance of int"),
+        (
+            "int | None",
+            "1",
+            "did not match any element in the union:\n"
+            "  int: is not an instance of int\n"
+            "  NoneType: is not an instance of NoneType",
+        ),
+    ],
+)
+def test_invalid(type_str, value, reason):
+    assert validate.compile_type(type_str)(value) == reason
+
+
+def test_unsupported_types_arent_validated():
+    with pytest.raises(validate.UnsupportedTypeError):
+        validate.compile_type("bc_script.parser.bcsfe.cats.Cats | None")
+    validators = validate.compile_validators(
+        {"cats": "bc_script.parser.bcsfe.cats.Cats | None", "unlock": "bool"}
+    )
+    assert list(validators) == ["unlock"]
+
+
+def test_parser_fields_are_checked():
+    with pytest.raises(validate.TypeCheckError, match='argument "unlock" \\(str\\)'):
+        cats.Cats.CatEdit(ids="all", unlock="yes")
+
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    data = {"cat": {"ids": "all", "upgrade": "max"}}
+    assert cats.Cats.CatEdit.from_dict(ctx, data) is None
+    assert ctx.logger.errors[0].startswith(
+        'Failed to create CatEdit with error: argument "upgrade" (str)'
+    )
+
+
+def test_validate_all_checks_nested_sections():
+    section = cats.Cats(cats=[cats.Cats.CatEdit(ids="all")])
+    section.validate_all()
+    section.cats[0].unlock = "yes"
+    with pytest.raises(validate.TypeCheckError):
+        section.validate_all()
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import os
+
+import bcsfe
+import toml
+
+import bc_script
+from bc_script import log, watch
+
+from conftest import write_script
+
+SCRIPT = """
+[pkg]
+schema = "bcsfe"
+
+[info]
+name = "test"
+
+[load]
+path = "SAVE_DATA"
+
+[load.file]
+
+[edit.basic_items]
+catfood = {catfood}
+
+[save]
+upload_managed_items = false
+"""
+
+ALL_SECTIONS = ["pkg", "info", "load", "edit", "save"]
+
+
+def update(state: watch.ScriptState, text: str) -> tuple[bc_script.Ctx, list[str]]:
+    ctx = bc_script.Ctx(log.Log(show_errors=False))
+    return ctx, state.update(ctx, toml.loads(text))
+
+
+def test_only_changed_sections_are_parsed():
+    state = watch.ScriptState()
+    ctx, parsed = update(state, SCRIPT.format(catfood=10))
+    assert parsed == ALL_SECTIONS
+    load = ctx.load
+
+    ctx, parsed = update(state, SCRIPT.format(catfood=10))
+    assert parsed == []
+    assert ctx.load is load and ctx.edit is not None
+
+    ctx, parsed = update(state, SCRIPT.format(catfood=20))
+    assert parsed == ["edit"]
+    assert ctx.load is load
+
+    # the schema decides how every other section is parsed
+    ctx, parsed = update(state, SCRIPT.format(catfood=20).replace("bcsfe", "other"))
+    assert parsed == ALL_SECTIONS
+    assert ctx.load is None and ctx.edit is None
+
+
+def test_sections_with_errors_are_parsed_again():
+    state = watch.ScriptState()
+    update(state, SCRIPT.format(catfood=10))
+    for _ in range(2):
+        ctx, parsed = update(state, SCRIPT.format(catfood='"lots"'))
+        assert parsed == ["edit"]
+        assert ctx.logger.errors
+
+    ctx, parsed = update(state, SCRIPT.format(catfood=10))
+    assert parsed == ["edit"] and not ctx.logger.errors
+    assert update(state, SCRIPT.format(catfood=10))[1] == []
+
+
+def test_get_changed(tmp_path):
+    script = write_script(tmp_path / "script.toml", SCRIPT.format(catfood=10))
+    save = tmp_path / "SAVE_DATA"
+    save.write_bytes(b"save")
+    watcher = watch.Watcher(str(script), str(save), None)
+    assert watcher.get_changed() == [str(script), str(save)]
+    watcher.update_mtimes()
+    assert watcher.get_changed() == []
+
+    save.write_bytes(b"edited")
+    assert watcher.get_changed() == [str(save)]
+    watcher.update_mtimes()
+    os.remove(script)
+    assert watcher.get_changed() == [str(script)]
+
+
+def test_run_once(tmp_path, save_path, capsys):
+    # without a save section the save is written to -o
+    text = SCRIPT.split("[save]")[0]
+    script = write_script(tmp_path / "script.toml", text.format(catfood=10))
+    out_path = tmp_path / "out" / "SAVE_DATA"
+    out_path.parent.mkdir()
+    watcher = watch.Watcher(str(script), str(save_path), str(out_path))
+    watcher.run_once()
+    assert "(parsed: pkg, info, load, edit, save)" in capsys.readouterr().out
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(out_path.read_bytes()))
+    assert s.catfood == 10
+
+    write_script(script, text.format(catfood=20))
+    watcher.run_once()
+    assert "(parsed: edit)" in capsys.readouterr().out
+    s = bcsfe.core.SaveFile(bcsfe.core.Data(out_path.read_bytes()))
+    assert s.catfood == 20